@@ -0,0 +1,84 @@
+"""
+Benchmark target expiry at 50k live targets.
+
+Compares the per-POST cost of the old full scan of `targets` with the
+background reaper (a vectorized scan of the store's last-update column),
+through the real Flask handler (test client), and times a reaper sweep
+that expires every target at once.
+
+    python bench_expiry.py --live 50000 --batch 100 --posts 500
+"""
+import argparse
+import json
+import time
+
+import webserver
+from stats import percentiles
+
+
+def record(i, t):
+    return {"id": f"T-{i}", "timestamp": t,
+            "position": {"north": float(i), "east": 0.0, "down": -100.0},
+            "velocity": {"vn": 1.0, "ve": 0.0, "vd": 0.0}}
+
+
+def legacy_scan(now, timestamps):
+    """The per-POST expiry loop the handler used to run (read-only here)."""
+    for tgt_id in list(timestamps.keys()):
+        age = now - timestamps[tgt_id]
+        if age > webserver.INACTIVE_THRESHOLD:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BMC expiry benchmark")
+    parser.add_argument("--live", type=int, default=50000, help="live targets in the store")
+    parser.add_argument("--batch", type=int, default=100, help="targets per measured POST")
+    parser.add_argument("--posts", type=int, default=500, help="measured POSTs")
+    args = parser.parse_args()
+
+    client = webserver.app.test_client()
+    now = time.time()
+    for lo in range(0, args.live, 5000):
+        client.post("/api/TARGET", json=[record(i, now) for i in range(lo, min(args.live, lo + 5000))])
+    assert len(webserver.store) == args.live
+    timestamps = dict(webserver.store.snapshot().timestamps)
+
+    bodies = [json.dumps([record((k * args.batch + j) % args.live, now) for j in range(args.batch)])
+              for k in range(args.posts)]
+    post_times = []
+    scan_times = []
+    for body in bodies:
+        start = time.perf_counter()
+        resp = client.post("/api/TARGET", data=body, content_type="application/json")
+        post_times.append(time.perf_counter() - start)
+        assert resp.status_code == 200, resp.get_json()
+        start = time.perf_counter()
+        legacy_scan(time.time(), timestamps)
+        scan_times.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    idle = webserver.reap_inactive_targets()
+    idle_sweep = time.perf_counter() - start
+    assert not idle, "idle sweep removed live targets"
+    start = time.perf_counter()
+    expired = webserver.reap_inactive_targets(time.time() + webserver.INACTIVE_THRESHOLD + 1.0)
+    full_sweep = time.perf_counter() - start
+
+    post = percentiles(post_times)
+    scan = percentiles(scan_times)
+    print(json.dumps({
+        "live_targets": args.live,
+        "batch": args.batch,
+        "post_with_reaper": post,
+        "legacy_scan_per_post": scan,
+        "legacy_post_estimate_p50_ms": round(post["p50_ms"] + scan["p50_ms"], 3),
+        "reaper_idle_sweep_ms": round(idle_sweep * 1000.0, 3),
+        "reaper_expire_all_ms": round(full_sweep * 1000.0, 3),
+        "expired": len(expired),
+        "remaining": len(webserver.store),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark the spatial index behind GET /api/TARGET area queries.
+
+Fills a TargetStore with targets spread like RandomTarget's swarm, then
+measures the grid upkeep on ingest (batches of moving targets) and the
+latency of box, radius and k-nearest queries on the grid against a full
+vectorized scan of the position column.
+
+    python bench_spatial.py --targets 100000 --batch 100 --queries 200
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from stats import percentiles
+from store import TargetStore
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def scan_nearest(pos, live, k, point):
+    d = np.sqrt(((pos[live] - point) ** 2).sum(axis=1))
+    top = np.argpartition(d, k - 1)[:k]
+    return live[top[np.argsort(d[top])]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BMC spatial index benchmark")
+    parser.add_argument("--targets", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=100, help="targets per ingest batch")
+    parser.add_argument("--batches", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--cell", type=float, default=50.0, help="grid cell size (m)")
+    parser.add_argument("--extent", type=float, default=500.0, help="targets spawn within +-extent (m)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    n = args.targets
+    pos = np.column_stack([rng.uniform(-args.extent, args.extent, n), rng.uniform(-args.extent, args.extent, n),
+                           rng.uniform(-500.0, 0.0, n)])
+    vel = np.column_stack([rng.uniform(-20, 20, n), rng.uniform(-20, 20, n), rng.uniform(-5, 5, n)])
+
+    p0, v0 = pos.tolist(), vel.tolist()
+
+    def records(ids, t):
+        return [{"id": f"T-{i}", "timestamp": t,
+                 "position": {"north": p0[i][0] + v0[i][0] * t, "east": p0[i][1] + v0[i][1] * t,
+                              "down": p0[i][2] + v0[i][2] * t},
+                 "velocity": {"vn": v0[i][0], "ve": v0[i][1], "vd": v0[i][2]}}
+                for i in ids.tolist()]
+
+    store = TargetStore(capacity=n, cell_size=args.cell)
+    for lo in range(0, n, 10000):
+        store.upsert(records(np.arange(lo, min(n, lo + 10000)), 0.0), now=0.0)
+
+    # ingest: batches of targets that moved for 0.1 s, with and without grid upkeep
+    batches = [records(rng.choice(n, args.batch, replace=False), 0.1 * (k + 1)) for k in range(args.batches)]
+    ingest = timed(lambda b: store.upsert(b, now=1.0), [(b,) for b in batches])
+    store.grid.update = lambda rows, pos: None
+    ingest_no_grid = timed(lambda b: store.upsert(b, now=1.0), [(b,) for b in batches])
+    del store.grid.update
+    for b in batches:
+        store.upsert(b, now=1.0)  # put the index back in step with the table
+
+    table = store._table
+    live = table.live_rows()
+    e = args.extent
+    boxes = []
+    for _ in range(args.queries):
+        cn, ce = rng.uniform(-e, e, 2)
+        half = rng.uniform(10.0, 100.0)
+        boxes.append((cn - half, cn + half, ce - half, ce + half))
+    circles = [(*rng.uniform(-e, e, 2), rng.uniform(10.0, 100.0)) for _ in range(args.queries)]
+    ks = [(int(k),) for k in rng.choice([1, 10, 100], args.queries)]
+
+    report = {
+        "targets": len(store),
+        "grid": store.grid.stats(),
+        "ingest_batch": args.batch,
+        "ingest_with_grid": ingest,
+        "ingest_without_grid": ingest_no_grid,
+        "box_grid": timed(lambda *b: store.grid.box(table.pos, *b), boxes),
+        "box_scan": timed(table.in_box, boxes),
+        "radius_grid": timed(lambda *c: store.grid.within(table.pos, *c), circles),
+        "radius_scan": timed(table.within, circles),
+        "nearest_grid": timed(lambda k: store.grid.nearest(table.pos, k), ks),
+        "nearest_scan": timed(lambda k: scan_nearest(table.pos, live, k, (0.0, 0.0, 0.0)), ks),
+        "box_store_with_records": timed(store.in_box, boxes),
+        "nearest_store_with_records": timed(store.nearest, ks),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Stress test and throughput benchmark for the target store.
+
+stress: writer threads update groups of targets in one batch each (every
+        record of a batch carries the same generation), a reaper expires
+        groups that stop updating, and reader threads check every snapshot:
+        targets and timestamps agree, no batch is seen half applied,
+        generations never go backwards, and a snapshot never changes after
+        it was taken. Any violation is counted and the run exits non-zero.
+http:   starts the webserver in a subprocess and drives it with concurrent
+        clients (keep-alive connections) that bulk-POST updates or GET the
+        full target map; reports requests/s and latency per kind.
+
+    python bench_store.py --clients 16 --targets 5000 --duration 10
+    python bench_store.py --mode http --server-dir /path/to/other/checkout/BMC_Code
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+from stats import percentiles
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# ---------- stress (in process) ----------
+def stress(clients, targets, group_size, duration):
+    sys.path.insert(0, HERE)
+    from store import TargetStore
+
+    store = TargetStore()
+    writers = max(1, clients // 2)
+    readers = max(1, clients - writers)
+    groups = max(writers, targets // group_size)
+    stop = threading.Event()
+    writes = [0] * writers
+    checks = [0] * readers
+    violations = []
+
+    def writer(k):
+        gen = 0
+        while not stop.is_set():
+            gen += 1
+            for g in range(k, groups, writers):
+                if g % 10 == 9 and gen > 1:
+                    continue  # every tenth group is written once and left to the reaper
+                store.upsert([{"id": f"G{g}-{i}", "group": g, "gen": gen, "timestamp": gen}
+                              for i in range(group_size)])
+                writes[k] += 1
+
+    def reaper():
+        while not stop.is_set():
+            time.sleep(0.05)
+            store.reap(time.time() - 0.5)
+
+    def reader(k):
+        last_gen = {}
+        while not stop.is_set():
+            snap = store.snapshot()
+            tg, ts = snap.targets, snap.timestamps
+            before = (len(tg), snap.version, snap.seq)
+            if tg.keys() != ts.keys():
+                violations.append("targets and timestamps disagree")
+            seen = {}
+            try:
+                for record in tg.values():
+                    seen.setdefault(record["group"], []).append(record["gen"])
+            except RuntimeError as e:
+                # "dictionary changed size during iteration": a writer touched the snapshot
+                violations.append(f"snapshot mutated while reading: {e}")
+                continue
+            for g, gens in seen.items():
+                if len(gens) != group_size or min(gens) != max(gens):
+                    violations.append(f"group {g}: torn batch {sorted(set(gens))} ({len(gens)} records)")
+                elif gens[0] < last_gen.get(g, 0):
+                    violations.append(f"group {g}: generation went back {last_gen[g]} -> {gens[0]}")
+                else:
+                    last_gen[g] = gens[0]
+            if (len(tg), snap.version, snap.seq) != before or len(ts) != len(tg):
+                violations.append("snapshot changed after it was taken")
+            checks[k] += 1
+
+    threads = [threading.Thread(target=writer, args=(k,)) for k in range(writers)]
+    threads += [threading.Thread(target=reader, args=(k,)) for k in range(readers)]
+    threads.append(threading.Thread(target=reaper))
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {
+        "mode": "stress",
+        "writers": writers,
+        "readers": readers,
+        "group_size": group_size,
+        "batches_written_per_s": round(sum(writes) / duration),
+        "snapshots_checked": sum(checks),
+        "violations": len(violations),
+        "first_violations": violations[:5],
+        "store": store.stats(),
+    }
+
+
+# ---------- http (subprocess server) ----------
+def http_client(port, kind, body, stop, out):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Content-Type": "application/x-ndjson"}
+    while not stop.is_set():
+        start = time.perf_counter()
+        if kind == "write":
+            conn.request("POST", "/api/TARGET/bulk", body=body, headers=headers)
+        else:
+            conn.request("GET", "/api/TARGET")
+        resp = conn.getresponse()
+        data = resp.read()
+        out.append((time.perf_counter() - start, resp.status, len(data)))
+    conn.close()
+
+
+def run_http(server_dir, port, clients, writers, targets, batch, duration):
+    server = subprocess.Popen(
+        [sys.executable, "-c", "import webserver; webserver.start_reaper(); "
+                               f"webserver.app.run(port={port}, threaded=True)"],
+        cwd=server_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/api/status", timeout=0.5).read()
+                break
+            except OSError:
+                time.sleep(0.1)
+        now = time.time()
+
+        def ndjson(lo, hi):
+            return "\n".join(json.dumps({"id": f"T-{i}", "timestamp": now,
+                                         "position": {"north": float(i), "east": 0.0, "down": -50.0},
+                                         "velocity": {"vn": 1.0, "ve": 0.0, "vd": 0.0}})
+                             for i in range(lo, hi)).encode()
+
+        for lo in range(0, targets, 5000):
+            req = urllib.request.Request(f"http://127.0.0.1:{port}/api/TARGET/bulk",
+                                         data=ndjson(lo, min(targets, lo + 5000)),
+                                         headers={"Content-Type": "application/x-ndjson"}, method="POST")
+            urllib.request.urlopen(req).read()
+
+        stop = threading.Event()
+        results = []
+        threads = []
+        for k in range(clients):
+            kind = "write" if k < writers else "read"
+            lo = (k * batch) % max(1, targets - batch)
+            out = []
+            results.append((kind, out))
+            threads.append(threading.Thread(target=http_client,
+                                            args=(port, kind, ndjson(lo, lo + batch), stop, out)))
+        for t in threads:
+            t.start()
+        time.sleep(duration)
+        stop.set()
+        for t in threads:
+            t.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=5)
+
+    report = {"mode": "http", "server_dir": server_dir, "clients": clients, "targets": targets, "batch": batch}
+    for kind in ("write", "read"):
+        samples = [s for k, out in results if k == kind for s in out]
+        report[kind] = dict(requests_per_s=round(len(samples) / duration, 1),
+                            errors=sum(1 for _, status, _ in samples if status >= 400),
+                            clients=sum(1 for k, _ in results if k == kind),
+                            **percentiles([lat for lat, _, _ in samples]))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Target store stress test and benchmark")
+    parser.add_argument("--mode", choices=("stress", "http", "both"), default="both")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=None, help="http: writing clients (default: half)")
+    parser.add_argument("--targets", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=100, help="http: targets per bulk POST")
+    parser.add_argument("--group-size", type=int, default=20, help="stress: targets per atomic batch")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=5079)
+    parser.add_argument("--server-dir", default=HERE, help="http: BMC_Code directory to run the server from")
+    args = parser.parse_args()
+
+    reports = []
+    if args.mode in ("stress", "both"):
+        reports.append(stress(args.clients, args.targets, args.group_size, args.duration))
+    if args.mode in ("http", "both"):
+        writers = args.clients // 2 if args.writers is None else args.writers
+        reports.append(run_http(args.server_dir, args.port, args.clients, writers, args.targets,
+                                args.batch, args.duration))
+    print(json.dumps(reports, indent=2))
+    if any(r.get("violations") for r in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
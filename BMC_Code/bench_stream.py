@@ -0,0 +1,117 @@
+"""
+Benchmark the operator event stream (/api/stream) against operator count.
+
+Starts the webserver in a subprocess, connects N stream readers, feeds
+target updates through the bulk endpoint at a fixed rate and reports the
+server's CPU use and what each reader received. Run it for a few operator
+counts to see how server cost scales.
+
+    python bench_stream.py --operators 1 50 --targets 1000 --rate 10 --duration 10
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def cpu_seconds(pid):
+    """utime + stime of a process (Linux /proc), or None elsewhere."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def reader(port, stop, counts, k):
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(b"GET /api/stream HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n")
+    sock.settimeout(0.5)
+    while not stop.is_set():
+        try:
+            data = sock.recv(1 << 16)
+        except socket.timeout:
+            continue
+        if not data:
+            break
+        counts[k][0] += len(data)
+        counts[k][1] += data.count(b"event: batch")
+    sock.close()
+
+
+def run(port, operators, targets, rate, duration):
+    server = subprocess.Popen(
+        [sys.executable, "-c", "import webserver; webserver.start_reaper(); "
+                               f"webserver.app.run(port={port}, threaded=True)"],
+        cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/api/status", timeout=0.5).read()
+                break
+            except OSError:
+                time.sleep(0.1)
+        stop = threading.Event()
+        counts = [[0, 0] for _ in range(operators)]
+        threads = [threading.Thread(target=reader, args=(port, stop, counts, k), daemon=True)
+                   for k in range(operators)]
+        for t in threads:
+            t.start()
+        time.sleep(0.5)
+
+        cpu0 = cpu_seconds(server.pid)
+        start = time.perf_counter()
+        posts = 0
+        while time.perf_counter() - start < duration:
+            now = time.time()
+            body = "\n".join(json.dumps({"id": f"T-{i}", "timestamp": now,
+                                         "position": {"north": i + now % 100, "east": 0.0, "down": -50.0},
+                                         "velocity": {"vn": 1.0, "ve": 0.0, "vd": 0.0}}) for i in range(targets))
+            req = urllib.request.Request(f"http://127.0.0.1:{port}/api/TARGET/bulk", data=body.encode(),
+                                         headers={"Content-Type": "application/x-ndjson"}, method="POST")
+            urllib.request.urlopen(req).read()
+            posts += 1
+            time.sleep(max(0.0, start + posts / rate - time.perf_counter()))
+        elapsed = time.perf_counter() - start
+        cpu1 = cpu_seconds(server.pid)
+        stop.set()
+        for t in threads:
+            t.join(timeout=2)
+    finally:
+        server.terminate()
+        server.wait(timeout=5)
+
+    batches = sorted(c[1] for c in counts)
+    return {
+        "operators": operators,
+        "targets": targets,
+        "update_rate": rate,
+        "server_cpu_pct": None if cpu0 is None else round(100.0 * (cpu1 - cpu0) / elapsed, 1),
+        "batches_per_operator_min": batches[0],
+        "batches_per_operator_max": batches[-1],
+        "bytes_per_operator_per_s": round(sum(c[0] for c in counts) / operators / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Operator stream benchmark")
+    parser.add_argument("--operators", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--targets", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=10.0, help="bulk updates of all targets per second")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=5078)
+    args = parser.parse_args()
+    results = [run(args.port, n, args.targets, args.rate, args.duration) for n in args.operators]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Server-Sent Events broadcaster for operator clients.
+
+Store changes (target upserts and removals, turret azimuth, selection) are
+coalesced into one pending batch; a single flush thread serializes each
+batch once every `interval` seconds and hands the same bytes to every
+subscriber. Per-operator cost is a queue put and a socket write, so server
+load stays flat as operators are added.
+
+A subscriber that falls `max_queue` batches behind is marked overflowed and
+gets a fresh full snapshot instead of the backlog.
+
+Events:
+    event: snapshot  data: {"t", "targets": {id: target}, "turret_azimuth", "selected"}
+    event: batch     data: {"t", "upserts": {id: target}, "removed": [id], ["turret_azimuth"], ["selected"]}
+Targets carry `_last_update` (server time, seconds).
+"""
+import json
+import queue
+import threading
+import time
+
+
+def encode_event(name, payload):
+    data = json.dumps(payload, separators=(',', ':'))
+    return f"event: {name}\ndata: {data}\n\n".encode('utf-8')
+
+
+class Subscriber:
+    def __init__(self, max_queue):
+        self.queue = queue.Queue(max_queue)
+        self.overflow = False
+
+
+class Broadcaster:
+    """Coalesces store changes and fans them out to SSE subscribers."""
+
+    def __init__(self, interval=0.1, max_queue=64):
+        self.interval = interval
+        self.max_queue = max_queue
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.thread = None
+        self._upserts = {}   # id -> (target dict, last update)
+        self._removed = set()
+        self._fields = {}
+        self.batches = 0
+        self.bytes = 0
+        self.last_batch_targets = 0
+
+    # ---------- producers (call while holding the store lock) ----------
+    def upsert(self, records, t):
+        if not self.subscribers:
+            return
+        with self.lock:
+            for record in records:
+                target_id = record['id']
+                self._upserts[target_id] = (record, t)
+                self._removed.discard(target_id)
+
+    def remove(self, target_ids):
+        if not self.subscribers:
+            return
+        with self.lock:
+            for target_id in target_ids:
+                self._upserts.pop(target_id, None)
+                self._removed.add(target_id)
+
+    def set(self, **fields):
+        if not self.subscribers:
+            return
+        with self.lock:
+            self._fields.update(fields)
+
+    # ---------- subscribers ----------
+    def subscribe(self):
+        sub = Subscriber(self.max_queue)
+        with self.lock:
+            self.subscribers.add(sub)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="sse-broadcaster", daemon=True)
+                self.thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            self.subscribers.discard(sub)
+            if not self.subscribers:
+                # nobody to send to: new subscribers start from a snapshot anyway
+                self._upserts.clear()
+                self._removed.clear()
+                self._fields.clear()
+
+    # ---------- flush thread ----------
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not (self._upserts or self._removed or self._fields):
+                    continue
+                upserts, removed, fields = self._upserts, self._removed, self._fields
+                self._upserts, self._removed, self._fields = {}, set(), {}
+                subscribers = list(self.subscribers)
+            payload = {
+                't': time.time(),
+                'upserts': {target_id: dict(record, _last_update=t) for target_id, (record, t) in upserts.items()},
+                'removed': list(removed),
+            }
+            payload.update(fields)
+            data = encode_event('batch', payload)
+            for sub in subscribers:
+                try:
+                    sub.queue.put_nowait(data)
+                except queue.Full:
+                    sub.overflow = True
+            self.batches += 1
+            self.bytes += len(data)
+            self.last_batch_targets = len(upserts) + len(removed)
+
+    def stats(self):
+        return {
+            'subscribers': len(self.subscribers),
+            'batches': self.batches,
+            'bytes_per_subscriber': self.bytes,
+            'last_batch_targets': self.last_batch_targets,
+            'interval_s': self.interval,
+        }
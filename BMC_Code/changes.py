@@ -0,0 +1,63 @@
+"""
+Change sequence for the target store, for delta queries.
+
+Every store write (one POST, one bulk request, one UDP datagram, one reaper
+batch, one DELETE) advances `seq` by one. Upserts are kept as an ordered
+map id -> seq of the last write, most recent last, so the ids changed since
+a given seq are found by walking back from the end: cost is proportional
+to the size of the delta, not to the number of targets. Removals are kept
+in a bounded log; a client asking for changes older than the log can hold
+(`floor`) has to resync from a full snapshot.
+
+The sequence starts at the current time in milliseconds, so numbers from
+an earlier server run are always below `floor` and force a resync instead
+of silently mixing two runs.
+"""
+import collections
+import time
+
+
+class ChangeIndex:
+    def __init__(self, max_removals=100000, start=None):
+        self.seq = int(time.time() * 1000) if start is None else start
+        self.floor = self.seq
+        self.max_removals = max_removals
+        self._upserts = collections.OrderedDict()  # id -> seq of last upsert
+        self._removals = collections.deque()       # (seq, id)
+
+    def upsert(self, target_ids):
+        self.seq += 1
+        seq, order = self.seq, self._upserts
+        for target_id in target_ids:
+            order[target_id] = seq
+            order.move_to_end(target_id)
+        return seq
+
+    def remove(self, target_ids):
+        self.seq += 1
+        seq = self.seq
+        for target_id in target_ids:
+            self._upserts.pop(target_id, None)
+            self._removals.append((seq, target_id))
+        while len(self._removals) > self.max_removals:
+            self.floor = self._removals.popleft()[0]
+        return seq
+
+    def since(self, seq):
+        """Return (upserted ids, removed ids) after `seq`, or None if a resync is needed."""
+        if seq < self.floor or seq > self.seq:
+            return None
+        upserted = []
+        for target_id, s in reversed(self._upserts.items()):
+            if s <= seq:
+                break
+            upserted.append(target_id)
+        removed = []
+        seen = set(upserted)
+        for s, target_id in reversed(self._removals):
+            if s <= seq:
+                break
+            if target_id not in seen:
+                seen.add(target_id)
+                removed.append(target_id)
+        return upserted, removed
@@ -7,3 +7,18 @@ LAUNCHER_URL = "http://172.20.10.2:4000"
 
 # Endpoint path for target updates
 LAUNCHER_ENDPOINT = "/bmc/target"
+
+# Launcher notifications: at most this many POSTs per second (newer requests
+# replace unsent ones), per-request timeout, and retry backoff bounds (seconds)
+LAUNCHER_MAX_RATE = 20.0
+LAUNCHER_TIMEOUT = 1.0
+LAUNCHER_RETRY_INITIAL = 0.1
+LAUNCHER_RETRY_MAX = 2.0
+
+# UDP telemetry listener (binary frames from RandomTarget's UDP sink)
+UDP_LISTEN_ENABLED = True
+UDP_LISTEN_HOST = "0.0.0.0"
+UDP_LISTEN_PORT = 5005
+
+# Multicast group to join instead of unicast (e.g. "239.1.2.3"); empty = unicast
+UDP_MULTICAST_GROUP = ""
@@ -0,0 +1,123 @@
+"""
+Incremental parsers for the bulk ingest endpoint (POST /api/TARGET/bulk).
+
+Both parsers consume the request body as an iterable of byte chunks, as it
+streams in, and return (records, rejects). `records` are target dicts in
+the POST /api/TARGET shape; `rejects` is a list of (position, reason) for
+the items that could not be used.
+
+- NDJSON: one target object per line. Lines are parsed a chunk at a time;
+  if a chunk fails as a whole, its lines are retried one by one so a bad
+  line only rejects itself.
+- Binary: a sequence of RTTF frames, the same layout as the UDP telemetry
+  datagrams (see udp_listener.py).
+"""
+import json
+import zlib
+
+from udp_listener import HEADER, RECORD, MAGIC, VERSION, decode_records
+
+
+def body_chunks(stream, gzip_encoded=False, chunk_size=64 * 1024):
+    """Yield the request body in chunks, gunzipping on the fly if needed."""
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzip_encoded else None
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if inflater is not None:
+            chunk = inflater.decompress(chunk)
+            if not chunk:
+                continue
+        yield chunk
+    if inflater is not None:
+        tail = inflater.flush()
+        if tail:
+            yield tail
+
+
+def validate_target(data):
+    """Return an error message, or None if `data` can be stored as a target."""
+    if not isinstance(data, dict):
+        return "Target must be an object"
+    if not data.get('id'):
+        return "Target ID is required"
+    if 'position' not in data:
+        return "Position object is required"
+    return None
+
+
+def parse_ndjson(chunks):
+    records, rejects = [], []
+    line_no = 0
+    pending = b""
+
+    def take(lines, first_no):
+        lines = [ln for ln in lines if ln.strip()]
+        if not lines:
+            return
+        try:
+            # fast path: the whole chunk in one json.loads call
+            items = json.loads(b"[" + b",".join(lines) + b"]")
+        except ValueError:
+            items = None
+        if items is not None and len(items) == len(lines):
+            numbered = zip(range(first_no, first_no + len(lines)), items)
+        else:
+            # a bad line, or one holding several values ("{...},{...}"): line by line
+            numbered = []
+            for k, line in enumerate(lines):
+                try:
+                    numbered.append((first_no + k, json.loads(line)))
+                except ValueError as e:
+                    rejects.append((first_no + k, f"Invalid JSON: {e}"))
+        for no, item in numbered:
+            error = validate_target(item)
+            if error is None:
+                records.append(item)
+            else:
+                rejects.append((no, error))
+
+    for chunk in chunks:
+        pending += chunk
+        cut = pending.rfind(b"\n")
+        if cut < 0:
+            continue
+        lines = pending[:cut].split(b"\n")
+        pending = pending[cut + 1:]
+        take(lines, line_no + 1)
+        line_no += len(lines)
+    if pending:
+        take([pending], line_no + 1)
+    # a chunk retried line by line reports JSON errors before the validation errors
+    rejects.sort(key=lambda reject: reject[0])
+    return records, rejects
+
+
+def parse_frames(chunks):
+    records, rejects = [], []
+    buf = bytearray()
+    offset = 0      # body offset of buf[0], for reject positions
+    for chunk in chunks:
+        buf += chunk
+        pos = 0
+        while len(buf) - pos >= HEADER.size:
+            magic, version, count, _, _, _ = HEADER.unpack_from(buf, pos)
+            if magic != MAGIC or version != VERSION:
+                # framing is lost; nothing after this point can be trusted
+                rejects.append((offset + pos, "Bad frame header"))
+                return records, rejects
+            end = pos + HEADER.size + count * RECORD.size
+            if end > len(buf):
+                break
+            for rec in decode_records(bytes(buf[pos + HEADER.size:end])):
+                if rec['id']:
+                    records.append(rec)
+                else:
+                    rejects.append((offset + pos, "Target ID is required"))
+            pos = end
+        del buf[:pos]
+        offset += pos
+    if buf:
+        rejects.append((offset, "Truncated frame"))
+    return records, rejects
@@ -0,0 +1,211 @@
+"""
+Launcher notifier: one long-lived worker that POSTs the selected target to
+the launcher (LAUNCHER_URL + LAUNCHER_ENDPOINT).
+
+- Latest-value mailbox: `notify()` only records which target to send and
+  never blocks. Requests that arrive while a send is in flight, or faster
+  than `max_rate`, collapse into one; the payload is built when it is sent,
+  so the launcher always gets the newest position.
+- One persistent keep-alive HTTP connection, reopened when it goes stale.
+  A send is repeated on a fresh connection only if the launcher cannot have
+  seen it (the stale socket failed while writing, or closed without any
+  response), so a command is never delivered twice.
+- Failed sends are retried with exponential backoff; a newer notification
+  replaces the one being retried.
+"""
+import collections
+import http.client
+import json
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from stats import percentile
+
+
+class LauncherNotifier:
+    def __init__(self, url, build_payload, max_rate=20.0, timeout=1.0, retry_initial=0.1, retry_max=2.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported launcher URL: {url}")
+        self.url = url
+        self.build_payload = build_payload  # target_id -> payload dict, or None if the target is gone
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.timeout = timeout
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        self._cond = threading.Condition()
+        self._pending = None        # target id waiting to be sent
+        self._pending_since = None  # when the oldest coalesced request arrived
+        self._thread = None
+        self._conn = None
+
+        self._latencies = collections.deque(maxlen=2048)  # POST round trip
+        self._delays = collections.deque(maxlen=2048)     # notify() -> launcher ack
+        self.requested = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.backoff = 0.0
+        self.last_error = None
+        self._last_print = 0.0
+
+    # ---------- producer side ----------
+    def notify(self, target_id):
+        """Ask for `target_id` to be sent; replaces any request not sent yet"""
+        with self._cond:
+            self.requested += 1
+            if self._pending is not None:
+                self.coalesced += 1
+            else:
+                self._pending_since = time.perf_counter()
+            self._pending = target_id
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="launcher-notifier", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    # ---------- worker ----------
+    def _take(self, timeout=None):
+        """Wait for a pending request (up to `timeout`); returns (target_id, since) or (None, None)"""
+        with self._cond:
+            if self._pending is None:
+                self._cond.wait(timeout)
+            target_id, since = self._pending, self._pending_since
+            self._pending = self._pending_since = None
+        return target_id, since
+
+    def _run(self):
+        last_send = 0.0
+        retry = None  # (target_id, since) of a failed send
+        while True:
+            if retry is None:
+                target_id, since = self._take()
+            else:
+                # back off, unless something newer arrives meanwhile
+                target_id, since = self._take(self.backoff)
+                if target_id is None:
+                    target_id, since = retry
+                    self.retries += 1
+                else:
+                    # the newer request supersedes the failed one
+                    self.coalesced += 1
+                    since = min(since, retry[1])
+            if target_id is None:
+                continue
+
+            wait = last_send + self.min_interval - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+                # anything that came in while rate limited is newer
+                newer, newer_since = self._take(0)
+                if newer is not None:
+                    self.coalesced += 1
+                    target_id, since = newer, min(since, newer_since)
+
+            try:
+                payload = self.build_payload(target_id)
+                if payload is None:
+                    self.dropped += 1
+                    retry = None
+                    continue
+                last_send = time.perf_counter()
+                ok = self._post(payload)
+            except Exception as e:
+                # a payload that cannot be built or encoded will not get better by retrying
+                self._failure(f"{type(e).__name__}: {e}")
+                retry = None
+                continue
+            if ok:
+                self._delays.append(time.perf_counter() - since)
+                self.backoff = 0.0
+                retry = None
+            else:
+                self.backoff = min(self.retry_max, self.backoff * 2 or self.retry_initial)
+                retry = (target_id, since)
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+        conn = cls(self._host, self._port, timeout=self.timeout)
+        conn.connect()
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    def _post(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+        error = None
+        for attempt in (0, 1):
+            start = time.perf_counter()
+            reused = self._conn is not None
+            written = False
+            try:
+                if self._conn is None:
+                    self._conn = self._connect()
+                self._conn.request("POST", self._path, body=body, headers=headers)
+                written = True
+                resp = self._conn.getresponse()
+                resp.read()
+                if resp.will_close:
+                    self._conn.close()
+                    self._conn = None
+                if resp.status >= 400:
+                    error = f"HTTP {resp.status}"
+                    break
+                self._latencies.append(time.perf_counter() - start)
+                self.sent += 1
+                return True
+            except (http.client.HTTPException, OSError) as e:
+                if self._conn is not None:
+                    self._conn.close()
+                self._conn = None
+                error = str(e)
+                # a stale keep-alive socket fails on first use: reconnect and resend once, but
+                # only if the request never went out or the peer closed without answering
+                # (after a timeout the launcher may already have acted on it)
+                if not (reused and (not written or isinstance(e, http.client.RemoteDisconnected))):
+                    break
+        self._failure(error)
+        return False
+
+    def _failure(self, error):
+        self.failed += 1
+        self.last_error = error
+        now = time.monotonic()
+        if now - self._last_print >= 1.0:
+            # at most one line per second while the launcher is unreachable
+            self._last_print = now
+            print(f"Error notifying launcher: {error} (failed so far: {self.failed})")
+
+    def stats(self):
+        """Counters plus POST and end-to-end latency percentiles (milliseconds)"""
+        lat = sorted(self._latencies)
+        delay = sorted(self._delays)
+        out = {
+            'url': self.url,
+            'max_rate': round(1.0 / self.min_interval, 3) if self.min_interval else None,
+            'requested': self.requested,
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'failed': self.failed,
+            'retries': self.retries,
+            'dropped': self.dropped,
+            'pending': self._pending is not None,
+            'backoff_s': self.backoff,
+            'last_error': self.last_error,
+        }
+        for q in (50, 95, 99):
+            v = percentile(lat, q)
+            out[f'latency_p{q}_ms'] = None if v is None else round(v * 1000.0, 3)
+        for q in (50, 99):
+            v = percentile(delay, q)
+            out[f'delay_p{q}_ms'] = None if v is None else round(v * 1000.0, 3)
+        return out
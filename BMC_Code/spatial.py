@@ -0,0 +1,179 @@
+"""
+Spatial index over target positions.
+
+A uniform grid on north/east: every table row with a known horizontal
+position sits in the set of its cell. The index is kept up to date on
+ingest: a batch computes its cells in one vectorized step and only rows
+that crossed a cell border touch the cell sets, so slowly moving targets
+cost next to nothing. Queries visit the cells covering the area and
+check the candidate rows exactly against the table's position column.
+
+Rows are the TargetTable's row numbers; positions are passed in with each
+call (`pos`, the table's (n, 3) north/east/down column), so the index does
+not hold a copy of them.
+"""
+import numpy as np
+
+UNSET = np.iinfo(np.int64).min  # cell coordinate of rows that are not indexed
+CELL_LIMIT = 2.0 ** 53          # cell coordinates are clamped to +-CELL_LIMIT (far beyond any real extent)
+
+
+class GridIndex:
+    """Rows by north/east grid cell of `cell_size` metres."""
+
+    def __init__(self, cell_size=50.0, capacity=1024):
+        self.cell_size = float(cell_size)
+        self.cells = {}     # (i, j) -> set of rows
+        self.cell = np.full((max(16, int(capacity)), 2), UNSET, dtype=np.int64)  # row -> (i, j)
+        self.count = 0      # indexed rows
+        self.moves = 0      # rows that changed cell (or were added / removed)
+
+    def __len__(self):
+        return self.count
+
+    def _cell_of(self, north, east):
+        # clamped, so query bounds that overflow to +-inf (e.g. north + radius) stay usable
+        i, j = np.clip(np.floor(np.array([north, east], dtype=float) / self.cell_size), -CELL_LIMIT, CELL_LIMIT)
+        return int(i), int(j)
+
+    # ---------- maintenance ----------
+    def update(self, rows, pos):
+        """Re-index `rows` whose positions are now `pos` ((len(rows), 2+) north/east[/down])."""
+        rows = np.asarray(rows, dtype=np.intp)
+        if not len(rows):
+            return
+        if rows.max() >= len(self.cell):
+            size = len(self.cell)
+            while size <= rows.max():
+                size *= 2
+            self.cell = np.concatenate([self.cell, np.full((size - len(self.cell), 2), UNSET, dtype=np.int64)])
+        ne = np.asarray(pos, dtype=float)[:, :2]
+        known = np.isfinite(ne).all(axis=1)
+        new = np.full((len(rows), 2), UNSET, dtype=np.int64)
+        new[known] = np.clip(np.floor(ne[known] / self.cell_size), -CELL_LIMIT, CELL_LIMIT)
+        old = self.cell[rows]
+        moved = np.flatnonzero((new != old).any(axis=1))
+        if not len(moved):
+            return
+        cells = self.cells
+        for row, oi, oj, ni, nj in zip(rows[moved].tolist(), old[moved, 0].tolist(), old[moved, 1].tolist(),
+                                       new[moved, 0].tolist(), new[moved, 1].tolist()):
+            if oi != UNSET:
+                members = cells[(oi, oj)]
+                members.discard(row)
+                if not members:
+                    del cells[(oi, oj)]
+                self.count -= 1
+            if ni != UNSET:
+                members = cells.get((ni, nj))
+                if members is None:
+                    members = cells[(ni, nj)] = set()
+                members.add(row)
+                self.count += 1
+        self.cell[rows[moved]] = new[moved]
+        self.moves += len(moved)
+
+    def discard(self, rows):
+        """Drop `rows` from the index (removed targets)."""
+        rows = [row for row in rows if row < len(self.cell)]
+        if rows:
+            self.update(rows, np.full((len(rows), 2), np.nan))
+
+    # ---------- queries ----------
+    def _rows_in_cells(self, i0, i1, j0, j1):
+        """Candidate rows of the cells i0..i1 x j0..j1 (inclusive)."""
+        cells = self.cells
+        found = []
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(cells):
+            # area larger than the occupied grid: walk the occupied cells instead
+            for (i, j), members in cells.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    found.extend(members)
+        else:
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    members = cells.get((i, j))
+                    if members:
+                        found.extend(members)
+        return np.array(found, dtype=np.intp)
+
+    def box(self, pos, n_min, n_max, e_min, e_max):
+        """Rows whose north/east position lies inside the box (bounds inclusive), in row order."""
+        i0, j0 = self._cell_of(n_min, e_min)
+        i1, j1 = self._cell_of(n_max, e_max)
+        rows = self._rows_in_cells(i0, i1, j0, j1)
+        n = pos[rows, 0]
+        e = pos[rows, 1]
+        return np.sort(rows[(n >= n_min) & (n <= n_max) & (e >= e_min) & (e <= e_max)])
+
+    def within(self, pos, north, east, radius):
+        """(rows, horizontal distances) within `radius` of (north, east), nearest first."""
+        i0, j0 = self._cell_of(north - radius, east - radius)
+        i1, j1 = self._cell_of(north + radius, east + radius)
+        rows = self._rows_in_cells(i0, i1, j0, j1)
+        d = np.hypot(pos[rows, 0] - north, pos[rows, 1] - east)
+        keep = d <= radius
+        rows, d = rows[keep], d[keep]
+        order = np.lexsort((rows, d))
+        return rows[order], d[order]
+
+    def nearest(self, pos, k, point=(0.0, 0.0, 0.0)):
+        """
+        (rows, distances) of the `k` rows closest to `point` (north, east, down),
+        nearest first. Distances are 3-D; an unknown `down` counts as level.
+        Searches square rings of cells outwards until no unvisited cell can hold
+        anything closer than the k-th candidate.
+        """
+        north, east, down = point
+        if k <= 0 or not self.count:
+            return np.array([], dtype=np.intp), np.array([])
+        ci, cj = self._cell_of(north, east)
+        cells = self.cells
+        rows, dists = [], []
+        found = 0
+        ring = 0
+        while True:
+            if 8 * ring > len(cells):
+                # rings wider than the occupied grid: take every cell not visited yet
+                batch = [r for (i, j), members in cells.items()
+                         if max(abs(i - ci), abs(j - cj)) >= ring for r in members]
+                last = True
+            else:
+                batch = []
+                if ring == 0:
+                    batch.extend(cells.get((ci, cj), ()))
+                else:
+                    for i in range(ci - ring, ci + ring + 1):
+                        for j in (cj - ring, cj + ring):
+                            batch.extend(cells.get((i, j), ()))
+                    for j in range(cj - ring + 1, cj + ring):
+                        for i in (ci - ring, ci + ring):
+                            batch.extend(cells.get((i, j), ()))
+                last = False
+            if batch:
+                batch = np.array(batch, dtype=np.intp)
+                p = pos[batch]
+                dists.append(np.hypot(np.hypot(p[:, 0] - north, p[:, 1] - east),
+                                      np.nan_to_num(p[:, 2] - down)))
+                rows.append(batch)
+                found += len(batch)
+            if last or found >= self.count:
+                break
+            if found >= k:
+                # anything outside rings 0..ring is at least ring * cell_size away horizontally
+                kth = np.partition(np.concatenate(dists), k - 1)[k - 1]
+                if kth <= ring * self.cell_size:
+                    break
+            ring += 1
+        rows = np.concatenate(rows)
+        dists = np.concatenate(dists)
+        order = np.lexsort((rows, dists))[:k]
+        return rows[order], dists[order]
+
+    def stats(self):
+        return {
+            'cell_size': self.cell_size,
+            'indexed': self.count,
+            'cells': len(self.cells),
+            'moves': self.moves,
+        }
@@ -0,0 +1,25 @@
+"""
+Percentiles for the server's latency counters and the benchmarks.
+
+Nearest-rank, the same definition as RandomTarget's sender, so figures
+reported on both sides of a run compare directly.
+"""
+import math
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def percentiles(samples):
+    """p50 / p99 of unsorted durations in seconds, as milliseconds."""
+    samples = sorted(samples)
+    out = {}
+    for q in (50, 99):
+        v = percentile(samples, q)
+        out[f"p{q}_ms"] = None if v is None else round(v * 1000.0, 3)
+    return out
@@ -0,0 +1,246 @@
+"""
+Target store for the BMC webserver.
+
+Targets are kept in a columnar TargetTable (table.py). Writers (POST
+handlers, bulk ingest, UDP listener, reaper) go through one write lock and
+keep their critical sections to column writes; each request or datagram
+is applied as one batch.
+
+Readers never take that lock for long: `snapshot()` hands out an immutable
+StoreSnapshot of the whole state (targets, last-update times, selection,
+turret azimuth) in O(1). The table inside a snapshot is the live table at
+that moment; the first write after a snapshot was taken copies it before
+changing anything (copy-on-write), so a snapshot is never torn and never
+changes afterwards. Snapshots are shared by all readers until the next
+write.
+
+A GridIndex (spatial.py) over the live table is updated with every write
+and answers area queries (`in_box`, `within`, `nearest`) under the lock.
+"""
+import threading
+import time
+
+from changes import ChangeIndex
+from spatial import GridIndex
+from table import ColumnView, RecordsView, TargetTable
+
+
+class StoreSnapshot:
+    """Read-only view of the store at one version."""
+
+    __slots__ = ('version', 'seq', 'table', 'targets', 'timestamps', 'selected', 'turret_azimuth', 'taken')
+
+    def __init__(self, version, seq, table, selected, turret_azimuth):
+        self.version = version          # bumps on every store change
+        self.seq = seq                  # target change seq (see changes.py)
+        self.table = table              # read only from here on
+        self.targets = RecordsView(table)                       # id -> record, built on access
+        self.timestamps = ColumnView(table, table.last_update)  # id -> last update
+        self.selected = selected
+        self.turret_azimuth = turret_azimuth
+        self.taken = time.time()
+
+    def __len__(self):
+        return len(self.table)
+
+
+class TargetStore:
+    """
+    `listener` (the SSE broadcaster) gets upsert(records, t) / remove(ids) /
+    set(**fields) calls under the write lock, in store order.
+    """
+
+    def __init__(self, listener=None, capacity=1024, cell_size=50.0):
+        self.lock = threading.Lock()
+        self.listener = listener
+        self.changes = ChangeIndex()
+        self._table = TargetTable(capacity)
+        self.grid = GridIndex(cell_size, capacity)  # follows the live table's rows
+        self._selected = None
+        self._turret_azimuth = 0
+        self._version = 0
+        self._snapshot = None
+        self._shared = False    # table is referenced by a snapshot: copy before writing
+        self.snapshots = 0
+        self.copies = 0
+
+    # ---------- writers (take the lock) ----------
+    def _own(self):
+        self._version += 1
+        self._snapshot = None
+        if self._shared:
+            self._table = self._table.copy()
+            self._shared = False
+            self.copies += 1
+
+    def upsert(self, records, now=None, keep_newer=False):
+        """
+        Store validated target records (dicts with an 'id'); returns the ids stored.
+        With `keep_newer`, a record older (by 'timestamp') than the stored one is skipped.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            if keep_newer:
+                index, stored = self._table.index, self._table.timestamp
+                records = [r for r in records
+                           if r['id'] not in index or not stored[index[r['id']]] > r['timestamp']]
+            if not records:
+                return []
+            ids = [r['id'] for r in records]
+            self._own()
+            rows = self._table.upsert(records, now)
+            self.grid.update(rows, self._table.pos[rows])
+            self.changes.upsert(ids)
+            if self.listener is not None:
+                self.listener.upsert(records, now)
+        return ids
+
+    def remove(self, target_id):
+        """Delete one target (and the selection if it pointed at it); False if unknown."""
+        with self.lock:
+            if target_id not in self._table:
+                return False
+            self._own()
+            self.grid.discard((self._table.row(target_id),))
+            self._table.remove((target_id,))
+            self.changes.remove((target_id,))
+            if self.listener is not None:
+                self.listener.remove((target_id,))
+            if self._selected == target_id:
+                self._selected = None
+                if self.listener is not None:
+                    self.listener.set(selected=None)
+        return True
+
+    def reap(self, cutoff, limit=None):
+        """
+        Remove targets last updated before `cutoff` (one vectorized scan of the
+        last-update column); at most `limit` per call. Returns (ids, more_due).
+        """
+        with self.lock:
+            expired = self._table.expired(cutoff)
+            more = limit is not None and len(expired) > limit
+            if more:
+                expired = expired[:limit]
+            if expired:
+                self._own()
+                index = self._table.index
+                self.grid.discard([index[target_id] for target_id in expired])
+                self._table.remove(expired)
+                self.changes.remove(expired)
+                if self.listener is not None:
+                    self.listener.remove(expired)
+            return expired, more
+
+    def select(self, target_id):
+        """Make `target_id` the selected target; False if it is not stored."""
+        with self.lock:
+            if target_id not in self._table:
+                return False
+            self._version += 1
+            self._snapshot = None
+            self._selected = target_id
+            if self.listener is not None:
+                self.listener.set(selected=target_id)
+        return True
+
+    def set_turret_azimuth(self, azimuth):
+        with self.lock:
+            self._version += 1
+            self._snapshot = None
+            self._turret_azimuth = azimuth
+            if self.listener is not None:
+                self.listener.set(turret_azimuth=azimuth)
+
+    # ---------- readers ----------
+    def _snapshot_locked(self):
+        snap = self._snapshot
+        if snap is None:
+            snap = self._snapshot = StoreSnapshot(self._version, self.changes.seq, self._table,
+                                                  self._selected, self._turret_azimuth)
+            self._shared = True
+            self.snapshots += 1
+        return snap
+
+    def snapshot(self):
+        """Immutable view of the current state (shared until the next write)."""
+        snap = self._snapshot
+        if snap is not None:
+            return snap
+        with self.lock:
+            return self._snapshot_locked()
+
+    def get(self, target_id):
+        """(record, last update) of one target, or None; cheaper than a snapshot for single lookups."""
+        with self.lock:
+            table = self._table
+            row = table.row(target_id)
+            return None if row is None else (table.record(row), float(table.last_update[row]))
+
+    def snapshot_with(self, fn):
+        """Call fn() and take a snapshot atomically with respect to writers; returns (result, snapshot)."""
+        with self.lock:
+            return fn(), self._snapshot_locked()
+
+    def since(self, seq):
+        """
+        Changes after `seq` as (current seq, [(id, record, last update)], removed ids),
+        or None if a resync is needed. Copies only the delta, not the whole store.
+        """
+        with self.lock:
+            delta = self.changes.since(seq)
+            if delta is None:
+                return None
+            upserted, removed = delta
+            table = self._table
+            rows = [table.index[i] for i in upserted]
+            records = table.records(rows)
+            last = table.last_update[rows].tolist()
+            return self.changes.seq, list(zip(upserted, records, last)), removed
+
+    def _entries(self, rows):
+        table = self._table
+        rows = rows.tolist()
+        return list(zip(table.ids_of(rows), table.records(rows), table.last_update[rows].tolist()))
+
+    def in_box(self, n_min, n_max, e_min, e_max):
+        """(seq, [(id, record, last update)]) of targets whose north/east lies in the box."""
+        with self.lock:
+            rows = self.grid.box(self._table.pos, n_min, n_max, e_min, e_max)
+            return self.changes.seq, self._entries(rows)
+
+    def within(self, north, east, radius):
+        """(seq, entries, distances) of targets within `radius` (horizontal) of (north, east), nearest first."""
+        with self.lock:
+            rows, dists = self.grid.within(self._table.pos, north, east, radius)
+            return self.changes.seq, self._entries(rows), dists.tolist()
+
+    def nearest(self, k, point=(0.0, 0.0, 0.0)):
+        """(seq, entries, distances) of the `k` targets closest (3-D) to `point`, nearest first."""
+        with self.lock:
+            rows, dists = self.grid.nearest(self._table.pos, k, point)
+            return self.changes.seq, self._entries(rows), dists.tolist()
+
+    @property
+    def selected(self):
+        return self._selected
+
+    @property
+    def turret_azimuth(self):
+        return self._turret_azimuth
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, target_id):
+        return target_id in self._table
+
+    def stats(self):
+        return dict(self._table.stats(), **{
+            'targets': len(self._table),
+            'version': self._version,
+            'seq': self.changes.seq,
+            'snapshots': self.snapshots,
+            'copies': self.copies,
+            'grid': self.grid.stats(),
+        })
@@ -0,0 +1,409 @@
+"""
+Columnar target table.
+
+Targets live in NumPy columns (position, velocity, target timestamp, last
+update, flags) indexed by row, with an id -> row dict in front. Rows of
+removed targets go on a free list and are reused by the next insert, so
+the columns only grow with the peak target count.
+
+Fields other than id / timestamp / position{north,east,down} /
+velocity{vn,ve,vd} are kept per row as sidecar data. A position or
+velocity object that does not fit the columns (other keys, non-numeric
+values) is kept whole in the sidecar too. Missing components are stored
+as NaN and left out again when the record is rebuilt, so a JSON view of
+a row has the same content as the record that was stored (numbers come
+back as floats).
+
+JSON views (`record`, `records`, `json_map`) are only built when asked for; status,
+expiry, bounds and area queries work on the columns directly.
+"""
+import json
+from collections.abc import Mapping
+from operator import itemgetter
+
+import numpy as np
+
+LIVE = 1
+HAS_VELOCITY = 2
+HAS_POSITION = 4
+
+CORE_FIELDS = frozenset(('id', 'timestamp', 'position', 'velocity'))
+POSITION_KEYS = ('north', 'east', 'down')
+VELOCITY_KEYS = ('vn', 've', 'vd')
+NAN = float('nan')
+NAN3 = (NAN, NAN, NAN)
+_core = itemgetter('id', 'position', 'velocity', 'timestamp')
+_position = itemgetter(*POSITION_KEYS)
+_velocity = itemgetter(*VELOCITY_KEYS)
+# one JSON object member for a row that fits the columns exactly (json.dumps spacing, float repr)
+_PLAIN_ROW = ('%s: {"id": %s, "timestamp": %r, "position": {"north": %r, "east": %r, "down": %r}, '
+              '"velocity": {"vn": %r, "ve": %r, "vd": %r}, "_active": %s, "_last_update": %r}')
+
+
+def _components(obj, keys):
+    """Column values for a position/velocity object, or None if it must go to the sidecar"""
+    if type(obj) is not dict or not obj.keys() <= set(keys):
+        return None
+    values = []
+    for key in keys:
+        v = obj.get(key, NAN)
+        if type(v) is int:
+            v = float(v)
+        elif type(v) is not float:
+            return None
+        values.append(v)
+    return values
+
+
+def _object(values, keys):
+    return {key: v for key, v in zip(keys, values) if v == v}  # v == v drops NaN
+
+
+class TargetTable:
+    def __init__(self, capacity=1024):
+        capacity = max(16, int(capacity))
+        self.index = {}                 # target id -> row
+        self.ids = [None] * capacity    # row -> target id
+        self.id_json = [None] * capacity  # row -> str(id) as a JSON string (object key), for json_map()
+        self.extra = [None] * capacity  # row -> sidecar dict or None
+        self.pos = np.full((capacity, 3), np.nan)
+        self.vel = np.full((capacity, 3), np.nan)
+        self.timestamp = np.full(capacity, np.nan)
+        self.last_update = np.zeros(capacity)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+        self.free = []                  # released rows, reused first
+        self.size = 0                   # rows in use or on the free list
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, target_id):
+        return target_id in self.index
+
+    @property
+    def capacity(self):
+        return len(self.ids)
+
+    def copy(self):
+        """Independent table with the same contents (rows keep their numbers)."""
+        other = TargetTable.__new__(TargetTable)
+        other.index = dict(self.index)
+        other.ids = list(self.ids)
+        other.id_json = list(self.id_json)
+        other.extra = list(self.extra)  # sidecar dicts are never mutated, only replaced
+        other.pos = self.pos.copy()
+        other.vel = self.vel.copy()
+        other.timestamp = self.timestamp.copy()
+        other.last_update = self.last_update.copy()
+        other.flags = self.flags.copy()
+        other.free = list(self.free)
+        other.size = self.size
+        return other
+
+    # ---------- writes ----------
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        extra = capacity - self.capacity
+        self.ids.extend([None] * extra)
+        self.id_json.extend([None] * extra)
+        self.extra.extend([None] * extra)
+        self.pos = np.concatenate([self.pos, np.full((extra, 3), np.nan)])
+        self.vel = np.concatenate([self.vel, np.full((extra, 3), np.nan)])
+        self.timestamp = np.concatenate([self.timestamp, np.full(extra, np.nan)])
+        self.last_update = np.concatenate([self.last_update, np.zeros(extra)])
+        self.flags = np.concatenate([self.flags, np.zeros(extra, dtype=np.uint8)])
+
+    def _row(self, target_id):
+        row = self.index.get(target_id)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                row = self.size
+                self.size += 1
+                if row >= self.capacity:
+                    self._grow(row + 1)
+            self.index[target_id] = row
+            self.ids[row] = target_id
+            self.id_json[row] = json.dumps(str(target_id))
+        return row
+
+    def upsert(self, records, now):
+        """Store records (dicts with an 'id'); the last one wins for repeated ids."""
+        rows, pos, vel, ts, flags = [], [], [], [], []
+        index, extra = self.index, self.extra
+        for record in records:
+            # fast path: exactly id/timestamp/position/velocity with float components
+            try:
+                target_id, p, v, t = _core(record)
+                fast = (len(record) == 4 and type(p) is dict and type(v) is dict and len(p) == 3
+                        and len(v) == 3 and type(t) is float)
+                if fast:
+                    pp = _position(p)
+                    vv = _velocity(v)
+            except KeyError:
+                fast = False
+                target_id = record['id']
+                p = record.get('position')
+                v = record.get('velocity')
+                t = record.get('timestamp', NAN)
+            row = index.get(target_id)
+            if row is None:
+                row = self._row(target_id)
+            rows.append(row)
+            if (fast and type(pp[0]) is float and type(pp[1]) is float and type(pp[2]) is float
+                    and type(vv[0]) is float and type(vv[1]) is float and type(vv[2]) is float):
+                pos.append(pp)
+                vel.append(vv)
+                ts.append(t)
+                flags.append(LIVE | HAS_POSITION | HAS_VELOCITY)
+                extra[row] = None
+                continue
+
+            side = {key: value for key, value in record.items() if key not in CORE_FIELDS} or None
+            flag = LIVE
+            if p is None and 'position' not in record:
+                p = NAN3
+            else:
+                p = _components(p, POSITION_KEYS)
+                if p is None:
+                    p = NAN3
+                    side = dict(side or {}, position=record['position'])
+                else:
+                    flag |= HAS_POSITION
+            pos.append(p)
+
+            if v is None and 'velocity' not in record:
+                v = NAN3
+            else:
+                v = _components(v, VELOCITY_KEYS)
+                if v is None:
+                    v = NAN3
+                    side = dict(side or {}, velocity=record['velocity'])
+                else:
+                    flag |= HAS_VELOCITY
+            vel.append(v)
+            flags.append(flag)
+
+            if type(t) is not float:
+                if type(t) is int:
+                    t = float(t)
+                else:
+                    side = dict(side or {}, timestamp=t)
+                    t = NAN
+            ts.append(t)
+            extra[row] = side
+
+        if len(set(rows)) < len(rows):
+            # repeated ids: keep the last record of each (fancy assignment order is unspecified)
+            keep = sorted({row: k for k, row in enumerate(rows)}.values())
+            rows, pos, vel, ts, flags = ([col[k] for k in keep] for col in (rows, pos, vel, ts, flags))
+        rows = np.array(rows, dtype=np.intp)
+        self.pos[rows] = pos
+        self.vel[rows] = vel
+        self.timestamp[rows] = ts
+        self.flags[rows] = flags
+        self.last_update[rows] = now
+        return rows
+
+    def remove(self, target_ids):
+        """Drop targets; their rows go on the free list. Returns the ids that were present."""
+        removed = []
+        rows = []
+        for target_id in target_ids:
+            row = self.index.pop(target_id, None)
+            if row is None:
+                continue
+            self.ids[row] = None
+            self.id_json[row] = None
+            self.extra[row] = None
+            self.free.append(row)
+            rows.append(row)
+            removed.append(target_id)
+        if rows:
+            self.flags[rows] = 0
+            self.pos[rows] = np.nan
+        return removed
+
+    # ---------- column queries ----------
+    def live_rows(self):
+        return np.flatnonzero(self.flags[:self.size] & LIVE)
+
+    def expired(self, cutoff):
+        """Ids of targets last updated before `cutoff`."""
+        size = self.size
+        rows = np.flatnonzero((self.flags[:size] & LIVE).astype(bool) & (self.last_update[:size] < cutoff))
+        return self.ids_of(rows)
+
+    def active(self, rows, now, threshold):
+        """Per-row `_active` flags: updated less than `threshold` seconds before `now`."""
+        return (now - self.last_update[rows]) < threshold
+
+    def in_box(self, n_min, n_max, e_min, e_max):
+        """Rows whose north/east position lies inside the box (bounds inclusive)."""
+        size = self.size
+        n = self.pos[:size, 0]
+        e = self.pos[:size, 1]
+        # NaN positions (free rows, unknown position) compare False everywhere
+        return np.flatnonzero((n >= n_min) & (n <= n_max) & (e >= e_min) & (e <= e_max))
+
+    def within(self, north, east, radius):
+        """(rows, horizontal distances) of targets within `radius` of (north, east), nearest first."""
+        size = self.size
+        d = np.hypot(self.pos[:size, 0] - north, self.pos[:size, 1] - east)
+        rows = np.flatnonzero(d <= radius)
+        order = np.argsort(d[rows], kind='stable')
+        return rows[order], d[rows][order]
+
+    def bounds(self):
+        """(n_min, n_max, e_min, e_max) over live targets with a known position, or None."""
+        pos = self.pos[self.live_rows(), :2]
+        pos = pos[~np.isnan(pos).any(axis=1)]
+        if not len(pos):
+            return None
+        lo = pos.min(axis=0)
+        hi = pos.max(axis=0)
+        return float(lo[0]), float(hi[0]), float(lo[1]), float(hi[1])
+
+    # ---------- JSON views ----------
+    def row(self, target_id):
+        return self.index.get(target_id)
+
+    def ids_of(self, rows):
+        ids = self.ids
+        return [ids[row] for row in np.asarray(rows).tolist()]
+
+    def record(self, row):
+        """The stored record of one row as a fresh dict."""
+        return self.records([row])[0]
+
+    def records(self, rows, now=None, threshold=None, last_update=False):
+        """
+        Records for `rows` (list or array) as fresh dicts. With `now`, each also
+        gets `_active` (needs `threshold`) and `_last_update`, as served by the API;
+        with `last_update` only the latter.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        ids, extra = self.ids, self.extra
+        pos = self.pos[rows]
+        vel = self.vel[rows]
+        flags = self.flags[rows]
+        has_pos = (flags & HAS_POSITION).astype(bool)
+        has_vel = (flags & HAS_VELOCITY).astype(bool)
+        pos_whole = (~np.isnan(pos).any(axis=1) & has_pos).tolist()
+        vel_whole = (~np.isnan(vel).any(axis=1) & has_vel).tolist()
+        has_pos = has_pos.tolist()
+        has_vel = has_vel.tolist()
+        pos = pos.tolist()
+        vel = vel.tolist()
+        ts = self.timestamp[rows].tolist()
+        if now is not None:
+            active = self.active(rows, now, threshold).tolist()
+        if now is not None or last_update:
+            last = self.last_update[rows].tolist()
+        out = []
+        for k, row in enumerate(rows.tolist()):
+            t = ts[k]
+            if t == t:
+                record = {'id': ids[row], 'timestamp': t}
+            else:
+                record = {'id': ids[row]}
+            if pos_whole[k]:
+                p = pos[k]
+                record['position'] = {'north': p[0], 'east': p[1], 'down': p[2]}
+            elif has_pos[k]:
+                record['position'] = _object(pos[k], POSITION_KEYS)
+            if vel_whole[k]:
+                v = vel[k]
+                record['velocity'] = {'vn': v[0], 've': v[1], 'vd': v[2]}
+            elif has_vel[k]:
+                record['velocity'] = _object(vel[k], VELOCITY_KEYS)
+            side = extra[row]
+            if side is not None:
+                record.update(side)
+            if now is not None:
+                record['_active'] = active[k]
+            if now is not None or last_update:
+                record['_last_update'] = last[k]
+            out.append(record)
+        return out
+
+    def json_map(self, rows, now, threshold):
+        """
+        JSON text of {id: record with _active/_last_update} for `rows`, the body
+        of GET /api/TARGET. Complete rows with a string id, finite values and no
+        sidecar data are written with one format operation each instead of
+        building and encoding dicts.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        pos = self.pos[rows]
+        vel = self.vel[rows]
+        ts = self.timestamp[rows]
+        both = HAS_POSITION | HAS_VELOCITY
+        # %r of inf/nan is not JSON: such rows take the json.dumps path
+        plain = (np.isfinite(pos).all(axis=1) & np.isfinite(vel).all(axis=1) & np.isfinite(ts)
+                 & ((self.flags[rows] & both) == both)).tolist()
+        active = self.active(rows, now, threshold).tolist()
+        ids, id_json, extra = self.ids, self.id_json, self.extra
+        columns = zip(rows.tolist(), plain, active, ts.tolist(), pos.tolist(), vel.tolist(),
+                      self.last_update[rows].tolist())
+        parts = []
+        for row, is_plain, act, t, p, v, last in columns:
+            if is_plain and extra[row] is None and type(ids[row]) is str:
+                key = id_json[row]
+                parts.append(_PLAIN_ROW % (key, key, t, p[0], p[1], p[2], v[0], v[1], v[2],
+                                           'true' if act else 'false', last))
+            else:
+                record = self.records([row], now, threshold)[0]
+                parts.append(f"{id_json[row]}: {json.dumps(record)}")
+        return "{" + ", ".join(parts) + "}"
+
+    def stats(self):
+        return {
+            'rows': len(self.index),
+            'capacity': self.capacity,
+            'free_rows': len(self.free),
+            'sidecar_rows': sum(1 for side in self.extra[:self.size] if side is not None),
+        }
+
+
+
+class RecordsView(Mapping):
+    """Read-only {id: record} over a table that is no longer written to (records built on access)"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __getitem__(self, target_id):
+        return self.table.record(self.table.index[target_id])
+
+    def __iter__(self):
+        return iter(self.table.index)
+
+    def __len__(self):
+        return len(self.table.index)
+
+    def __contains__(self, target_id):
+        return target_id in self.table.index
+
+    def values(self):
+        return self.table.records(list(self.table.index.values()))
+
+    def items(self):
+        return list(zip(self.table.index, self.values()))
+
+
+class ColumnView(RecordsView):
+    """Read-only {id: value} over one 1-D column of a table that is no longer written to"""
+
+    def __init__(self, table, column):
+        self.table = table
+        self.column = column
+
+    def __getitem__(self, target_id):
+        return float(self.column[self.table.index[target_id]])
+
+    def values(self):
+        return self.column[list(self.table.index.values())].tolist()
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+import webserver
+from store import TargetStore
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(webserver, 'background_started', True)  # no reaper / UDP listener threads
+    monkeypatch.setattr(webserver, 'store', TargetStore())
+    monkeypatch.setattr(webserver, 'full_snapshot_cache', (None, 0.0, None, None))
+    clock = [1000.0]
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+    webserver.app.config['TESTING'] = True
+    with webserver.app.test_client() as client:
+        client.clock = clock
+        yield client
+
+
+def target(target_id, north=0.0):
+    return {'id': target_id, 'position': {'north': north, 'east': 0.0, 'down': 0.0}}
+
+
+def test_full_get_unchanged_store_is_not_modified_across_polls(client):
+    webserver.store.upsert([target('T-1'), target('T-2', 10.0)], now=1000.0)
+    first = client.get('/api/TARGET')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    for _ in range(8):
+        client.clock[0] += 0.5  # well past several 0.5 s steps, still inside INACTIVE_THRESHOLD
+        polled = client.get('/api/TARGET', headers={'If-None-Match': etag})
+        assert polled.status_code == 304
+
+
+def test_full_get_etag_changes_when_a_target_goes_inactive(client):
+    webserver.store.upsert([target('T-1')], now=1000.0)
+    webserver.store.upsert([target('T-2')], now=1002.0)
+    first = client.get('/api/TARGET')
+    assert all(t['_active'] for t in first.get_json().values())
+    etag = first.headers['ETag']
+
+    client.clock[0] = 1000.0 + webserver.INACTIVE_THRESHOLD
+    flipped = client.get('/api/TARGET', headers={'If-None-Match': etag})
+    assert flipped.status_code == 200
+    body = flipped.get_json()
+    assert not body['T-1']['_active'] and body['T-2']['_active']
+
+    client.clock[0] += 1.0
+    again = client.get('/api/TARGET', headers={'If-None-Match': flipped.headers['ETag']})
+    assert again.status_code == 304
@@ -0,0 +1,212 @@
+"""
+UDP telemetry listener for the BMC server.
+
+Receives the fixed-layout binary frames sent by RandomTarget's UDP sink
+(RandomTarget/udp_frames.py) on a unicast port or a multicast group and
+hands decoded targets to a callback, skipping HTTP entirely.
+
+Datagram layout (little endian):
+    header: 4s magic b"RTTF" | u16 version | u16 count | u32 stream | u64 seq | f64 sent time
+    count * record: 24s id (utf-8, NUL padded) | f64 timestamp
+                    | f64 north, east, down | f64 vn, ve, vd
+
+Sequence numbers count datagrams per stream. A jump forward counts the
+skipped datagrams as lost; a datagram that later fills a gap is counted as
+reordered (and no longer lost); anything else behind the expected number is
+a duplicate. A new stream id means the sender restarted.
+"""
+import ipaddress
+import socket
+import struct
+import threading
+import time
+
+MAGIC = b"RTTF"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQd")
+RECORD = struct.Struct("<24sd6d")
+GAP_WINDOW = 4096  # missing sequence numbers remembered for reorder detection
+
+
+def decode_records(data):
+    """Decode packed records into target dicts shaped like POST /api/TARGET bodies."""
+    return [
+        {
+            "id": raw_id.rstrip(b"\0").decode("utf-8", "replace"),
+            "timestamp": t,
+            "position": {"north": n, "east": e, "down": d},
+            "velocity": {"vn": vn, "ve": ve, "vd": vd},
+        }
+        for raw_id, t, n, e, d, vn, ve, vd in RECORD.iter_unpack(data)
+    ]
+
+
+class StreamState:
+    """Loss / reorder bookkeeping for one sender stream."""
+
+    def __init__(self, seq):
+        self.expected = seq
+        self.missing = set()
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.duplicates = 0
+
+    def observe(self, seq):
+        """Returns False if the datagram is a duplicate and should be ignored."""
+        if seq == self.expected:
+            self.expected += 1
+        elif seq > self.expected:
+            gap = seq - self.expected
+            self.lost += gap
+            if gap <= GAP_WINDOW:
+                self.missing.update(range(self.expected, seq))
+                if len(self.missing) > GAP_WINDOW:
+                    # forget the oldest gaps; they stay counted as lost
+                    for old in sorted(self.missing)[:len(self.missing) - GAP_WINDOW]:
+                        self.missing.discard(old)
+            self.expected = seq + 1
+        elif seq in self.missing:
+            self.missing.discard(seq)
+            self.lost -= 1
+            self.reordered += 1
+        else:
+            self.duplicates += 1
+            return False
+        self.received += 1
+        return True
+
+
+class UdpTelemetryListener:
+    """Background thread decoding telemetry datagrams into `on_targets`.
+
+    `on_targets(records, late)` receives a list of target dicts in the same
+    shape as POST /api/TARGET bodies; `late` is True for reordered datagrams
+    so the store can keep newer data it already has. It returns the number of
+    records it rejected (None counts as 0).
+    """
+
+    def __init__(self, on_targets, host="0.0.0.0", port=5005, group="", rcvbuf=8 * 1024 * 1024):
+        self.on_targets = on_targets
+        self.host = host
+        self.port = port
+        self.group = group
+        self.rcvbuf = rcvbuf
+        self.sock = None
+        self.thread = None
+        self.running = False
+
+        self.lock = threading.Lock()
+        self.streams = {}
+        self.stream = None
+        self.restarts = 0
+        self.datagrams = 0
+        self.records = 0
+        self.bad = 0
+        self.rejected = 0
+        self.last_sent = None
+        self.started = None
+
+    def _open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        if self.group and ipaddress.ip_address(self.group).is_multicast:
+            sock.bind(("", self.port))
+            iface = socket.inet_aton(self.host if self.host not in ("", "0.0.0.0") else "0.0.0.0")
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, socket.inet_aton(self.group) + iface)
+        else:
+            sock.bind((self.host, self.port))
+        sock.settimeout(0.5)
+        return sock
+
+    def start(self):
+        self.sock = self._open()
+        self.running = True
+        self.started = time.time()
+        self.thread = threading.Thread(target=self._run, name="udp-telemetry", daemon=True)
+        self.thread.start()
+        where = f"group {self.group}" if self.group else self.host
+        print(f"UDP telemetry listener on {where}:{self.port}")
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _run(self):
+        buf = bytearray(65536)
+        view = memoryview(buf)
+        while self.running:
+            try:
+                n = self.sock.recv_into(buf)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                self.handle(view[:n])
+            except Exception as e:
+                with self.lock:
+                    self.bad += 1
+                print(f"Error handling telemetry datagram: {e}")
+
+    def handle(self, data):
+        """Decode and apply one datagram (also usable without the thread)."""
+        if len(data) < HEADER.size:
+            with self.lock:
+                self.bad += 1
+            return
+        magic, version, count, stream, seq, sent = HEADER.unpack_from(data, 0)
+        end = HEADER.size + count * RECORD.size
+        if magic != MAGIC or version != VERSION or len(data) < end:
+            with self.lock:
+                self.bad += 1
+            return
+        with self.lock:
+            state = self.streams.get(stream)
+            if state is None:
+                if self.stream is not None:
+                    self.restarts += 1
+                    # keep only the previous stream's totals around
+                    self.streams = {self.stream: self.streams[self.stream]}
+                state = self.streams[stream] = StreamState(seq)
+                self.stream = stream
+            fresh = seq >= state.expected
+            if not state.observe(seq):
+                return
+            self.datagrams += 1
+            self.records += count
+            self.last_sent = sent
+
+        rejected = self.on_targets(decode_records(data[HEADER.size:end]), not fresh)
+        if rejected:
+            with self.lock:
+                self.rejected += rejected
+
+    def stats(self):
+        with self.lock:
+            lost = sum(s.lost for s in self.streams.values())
+            reordered = sum(s.reordered for s in self.streams.values())
+            duplicates = sum(s.duplicates for s in self.streams.values())
+            expected = self.datagrams + lost
+            elapsed = time.time() - self.started if self.started else 0.0
+            return {
+                "listening": f"{self.group or self.host}:{self.port}",
+                "stream": self.stream,
+                "restarts": self.restarts,
+                "datagrams": self.datagrams,
+                "records": self.records,
+                "records_per_s": round(self.records / elapsed, 1) if elapsed > 0 else 0.0,
+                "lost": lost,
+                "reordered": reordered,
+                "duplicates": duplicates,
+                "bad": self.bad,
+                "rejected": self.rejected,
+                "loss_ratio": round(lost / expected, 6) if expected else 0.0,
+                "last_frame_age_ms": round((time.time() - self.last_sent) * 1000.0, 3) if self.last_sent else None,
+            }
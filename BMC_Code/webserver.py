@@ -1,88 +1,238 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 import json
+import gzip
 from pathlib import Path
 import time
-import urllib.request
-import urllib.error
+import math
 import threading
+import os
 from config import LAUNCHER_URL, LAUNCHER_ENDPOINT
+from config import LAUNCHER_MAX_RATE, LAUNCHER_TIMEOUT, LAUNCHER_RETRY_INITIAL, LAUNCHER_RETRY_MAX
+from config import UDP_LISTEN_ENABLED, UDP_LISTEN_HOST, UDP_LISTEN_PORT, UDP_MULTICAST_GROUP
+from udp_listener import UdpTelemetryListener
+from broadcast import Broadcaster, encode_event
+from store import TargetStore
+from notifier import LauncherNotifier
+import ingest
+import queue
 
 app = Flask(__name__)
 
 # In-memory storage for targets (replace with database if needed)
-targets = {}
-target_timestamps = {}  # Track last update time for each target
-selected_target = None  # Track currently selected target
-turret_azimuth = 0  # Track current turret azimuth in degrees
 INACTIVE_THRESHOLD = 5.0  # seconds
+REAPER_INTERVAL = 0.5  # seconds between expiry sweeps
+REAP_BATCH = 4096  # targets removed per store lock acquisition
+broadcaster = Broadcaster(interval=0.1)  # coalesced change batches for /api/stream subscribers
+SPATIAL_CELL_SIZE = 50.0  # metres; grid cell of the spatial index behind area queries
+store = TargetStore(listener=broadcaster, cell_size=SPATIAL_CELL_SIZE)  # targets, last updates, selection, turret azimuth
+udp_listener = None
+reaper_thread = None
+background_started = False
+background_lock = threading.Lock()
+SSE_KEEPALIVE = 15.0  # seconds between keep-alive comments on idle streams
+full_snapshot_cache = (None, 0.0, None, None)  # (seq, valid until, etag, body) of the last full GET body
+full_snapshot_build_lock = threading.Lock()
+BOX_PARAMS = ('n_min', 'n_max', 'e_min', 'e_max')
+AREA_PARAMS = BOX_PARAMS + ('radius', 'nearest')
 
 # ============= Helper Functions =============
-updateing_target = False
-def notify_launcher(target_id):
-    updateing_target = True
-    """Notify launcher about the selected target position"""
-    if not target_id or target_id not in targets:
-        updateing_target = False
-        return False
-    
-    try:
-        target_data = targets[target_id]
-        position = target_data.get('position', {})
-        velocity = target_data.get('velocity', {})
-        
-        payload = {
-            'target_id': 1,
-            'position_north': position.get('north', 0),
-            'position_east': position.get('east', 0),
-            'position_down': position.get('down', 0),
-            'velocity_north': velocity.get('vn', 0),
-            'velocity_east': velocity.get('ve', 0),
-            'velocity_down': velocity.get('vd', 0),
-        }
-        
-        launcher_url = f"{LAUNCHER_URL}{LAUNCHER_ENDPOINT}"
-        data_bytes = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            launcher_url, 
-            data=data_bytes, 
-            headers={'Content-Type': 'application/json'}, 
-            method="POST"
-        )
-        
-        with urllib.request.urlopen(req, timeout=1.0) as resp:
-            response_data = resp.read()
-        
-        print(f"Notified launcher about target {target_id}: {payload}")
-        updateing_target = False
-        return True
-    except Exception as e:
-        print(f"Error notifying launcher: {e}")
-        updateing_target =False
-        return False
+def launcher_payload(target_id):
+    """Launcher message for a target's current position, or None if it is gone"""
+    entry = store.get(target_id)
+    if entry is None:
+        return None
+    target_data = entry[0]
+    position = target_data.get('position')
+    velocity = target_data.get('velocity')
+    position = position if isinstance(position, dict) else {}
+    velocity = velocity if isinstance(velocity, dict) else {}
+    return {
+        'target_id': 1,
+        'position_north': position.get('north', 0),
+        'position_east': position.get('east', 0),
+        'position_down': position.get('down', 0),
+        'velocity_north': velocity.get('vn', 0),
+        'velocity_east': velocity.get('ve', 0),
+        'velocity_down': velocity.get('vd', 0),
+    }
+
+launcher_notifier = LauncherNotifier(f"{LAUNCHER_URL}{LAUNCHER_ENDPOINT}", launcher_payload,
+                                     max_rate=LAUNCHER_MAX_RATE, timeout=LAUNCHER_TIMEOUT,
+                                     retry_initial=LAUNCHER_RETRY_INITIAL, retry_max=LAUNCHER_RETRY_MAX)
 
 def notify_launcher_async(target_id):
-    """Send launcher notification asynchronously without blocking"""
-    if not updateing_target:
-        thread = threading.Thread(target=notify_launcher, args=(target_id,), daemon=True)
-        thread.start()
+    """Queue a launcher notification (latest wins, sent by the notifier thread)"""
+    if target_id:
+        launcher_notifier.notify(target_id)
+
+def notify_if_selected(ids):
+    """Notify the launcher if the selected target is among the stored ids"""
+    selected = store.selected
+    if selected and selected in ids:
+        notify_launcher_async(selected)
 
 # ============= Helper Functions =============
 
-def get_target_with_status(target_id, target_data):
+def get_target_with_status(target_data, last_update, now=None):
     """Add active/inactive status based on last update time"""
-    last_update = target_timestamps.get(target_id, time.time())
-    is_active = (time.time() - last_update) < INACTIVE_THRESHOLD
-    
-    result = target_data.copy() if isinstance(target_data, dict) else target_data
-    if isinstance(result, dict):
-        result['_active'] = is_active
-        result['_last_update'] = last_update
-    return result
+    now = time.time() if now is None else now
+    return dict(target_data, _active=(now - last_update) < INACTIVE_THRESHOLD, _last_update=last_update)
 
-def get_all_targets_with_status():
-    """Get all targets with active/inactive status"""
-    return {target_id: get_target_with_status(target_id, data) 
-            for target_id, data in targets.items()}
+def full_snapshot(now=None):
+    """
+    Serialized GET /api/TARGET body, as (etag, seq, body bytes)
+    The body only changes with the change seq and when an `_active` flag flips
+    (the next deadline is the oldest active target's last update + INACTIVE_THRESHOLD);
+    it is built once per such state and shared by every request in between.
+    The ETag is the seq plus the number of active targets, which only ever
+    drops while the seq stays the same, so it changes exactly when the body does.
+    """
+    global full_snapshot_cache
+    now = time.time() if now is None else now
+    with full_snapshot_build_lock:
+        # one request builds the body, concurrent ones wait and reuse it
+        snap = store.snapshot()
+        cached_seq, valid_until, etag, body = full_snapshot_cache
+        if cached_seq == snap.seq and now < valid_until:
+            return etag, cached_seq, body
+        table = snap.table
+        rows = table.live_rows()
+        body = table.json_map(rows, now, INACTIVE_THRESHOLD).encode('utf-8')
+        active = table.active(rows, now, INACTIVE_THRESHOLD)
+        last = table.last_update[rows][active]
+        valid_until = float(last.min()) + INACTIVE_THRESHOLD if len(last) else float('inf')
+        etag = f"{snap.seq}.{len(last)}"
+        full_snapshot_cache = (snap.seq, valid_until, etag, body)
+    return etag, snap.seq, body
+
+def targets_since(seq):
+    """Delta for GET /api/TARGET?since=<seq>, or None if the client must resync"""
+    now = time.time()
+    delta = store.since(seq)
+    if delta is None:
+        return None
+    current, upserted, removed = delta
+    upserts = {target_id: get_target_with_status(data, last_update, now)
+               for target_id, data, last_update in upserted}
+    return {'seq': current, 'since': seq, 'upserts': upserts, 'removed': removed}
+
+def query_number(args, name, default=None):
+    """Finite float query parameter; raises ValueError if missing (without default) or invalid"""
+    value = args.get(name)
+    if value is None:
+        if default is None:
+            raise ValueError(f'{name} is required')
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValueError(f'{name} must be a finite number')
+    return number
+
+def area_query(args):
+    """
+    Area query of GET /api/TARGET from the spatial index, as (seq, {id: target with status}),
+    or None without area parameters. Radius and nearest results are ordered nearest first
+    and carry `_distance` (metres). Raises ValueError for bad or mixed parameters.
+    """
+    kinds = any(name in args for name in BOX_PARAMS) + ('radius' in args) + ('nearest' in args)
+    if not kinds:
+        return None
+    if kinds > 1:
+        raise ValueError('use only one of the box (n_min/n_max/e_min/e_max), radius or nearest queries')
+    now = time.time()
+    if 'radius' in args:
+        radius = query_number(args, 'radius')
+        if radius < 0:
+            raise ValueError('radius must not be negative')
+        seq, entries, dists = store.within(query_number(args, 'north', 0.0), query_number(args, 'east', 0.0), radius)
+    elif 'nearest' in args:
+        try:
+            k = int(args['nearest'])
+        except ValueError:
+            k = 0
+        if k < 1:
+            raise ValueError('nearest must be a positive integer')
+        seq, entries, dists = store.nearest(k)  # operator at the origin
+    else:
+        n_min, n_max, e_min, e_max = (query_number(args, name) for name in BOX_PARAMS)
+        if n_min > n_max or e_min > e_max:
+            raise ValueError('box minimum must not exceed its maximum')
+        seq, entries = store.in_box(n_min, n_max, e_min, e_max)
+        return seq, {target_id: get_target_with_status(data, last_update, now)
+                     for target_id, data, last_update in entries}
+    return seq, {target_id: dict(get_target_with_status(data, last_update, now), _distance=d)
+                 for (target_id, data, last_update), d in zip(entries, dists)}
+
+def apply_udp_targets(records, late):
+    """Store targets decoded by the UDP listener (same shape as POST bodies); returns the reject count"""
+    valid = [data for data in records if ingest.validate_target(data) is None]
+    # a reordered datagram must not overwrite newer data
+    ids = store.upsert(valid, keep_newer=late)
+    notify_if_selected(ids)
+    return len(records) - len(valid)
+
+def start_udp_listener():
+    """Start the UDP telemetry listener thread if enabled in config"""
+    global udp_listener
+    if not UDP_LISTEN_ENABLED or udp_listener is not None:
+        return udp_listener
+    try:
+        udp_listener = UdpTelemetryListener(apply_udp_targets, host=UDP_LISTEN_HOST, port=UDP_LISTEN_PORT,
+                                            group=UDP_MULTICAST_GROUP).start()
+    except OSError as e:
+        print(f"UDP telemetry listener not started: {e}")
+    return udp_listener
+
+def reap_inactive_targets(now=None):
+    """Remove targets not updated for INACTIVE_THRESHOLD seconds; returns their ids"""
+    cutoff = (time.time() if now is None else now) - INACTIVE_THRESHOLD
+    expired = []
+    while True:
+        # bounded batches per lock acquisition so ingest never waits for a mass expiry
+        batch, more = store.reap(cutoff, limit=REAP_BATCH)
+        expired.extend(batch)
+        if not more:
+            return expired
+
+def reaper_loop():
+    """Background expiry: cost depends on elapsed time, not on request rate"""
+    while True:
+        time.sleep(REAPER_INTERVAL)
+        try:
+            expired = reap_inactive_targets()
+            if expired:
+                print(f"Removed {len(expired)} inactive target(s) (no update for {INACTIVE_THRESHOLD:.0f}s)")
+        except Exception as e:
+            print(f"Error reaping inactive targets: {e}")
+
+def start_reaper():
+    """Start the expiry reaper thread once"""
+    global reaper_thread
+    with background_lock:
+        if reaper_thread is None:
+            reaper_thread = threading.Thread(target=reaper_loop, name="target-reaper", daemon=True)
+            reaper_thread.start()
+    return reaper_thread
+
+def start_background_workers():
+    """Start the reaper and the UDP listener once, in whichever process serves requests"""
+    global background_started
+    if background_started:
+        return
+    start_reaper()
+    with background_lock:
+        if background_started:
+            return
+        background_started = True
+    start_udp_listener()
+
+@app.before_request
+def ensure_background_workers():
+    # flask run, WSGI servers and plain imports never run the __main__ block below
+    start_background_workers()
 
 # ============= REST API Endpoints =============
 
@@ -94,41 +244,26 @@ def update_target():
     Can accept either a single target object or an array of targets
     """
     try:
-        data = request.get_json()                       
-
-        def handle_target(data):
-
-            # Extract target ID (required)
-            target_id = data.get('id')
-            
-            if not target_id:
-                return jsonify({'error': 'Target ID is required'}), 400
-            
-            # Validate hierarchical structure
-            if 'position' not in data:
-                return jsonify({'error': 'Position object is required'}), 400
-        
-            # Store target data and update timestamp
-            targets[target_id] = data
-            target_timestamps[target_id] = time.time()
+        if request.headers.get('Content-Encoding', '').lower() == 'gzip':
+            # RandomTarget sender can gzip request bodies
+            data = json.loads(gzip.decompress(request.get_data()))
+        else:
+            data = request.get_json()
 
         if isinstance(data, list):
-            for target in data:
-                response = handle_target(target)
+            # invalid entries of a list are skipped
+            records = [target for target in data if ingest.validate_target(target) is None]
         else:
-            handle_target(data)
+            error = ingest.validate_target(data)
+            if error is not None:
+                return jsonify({'error': error}), 400
+            records = [data]
 
-        for tgt_id in targets.keys():
-            
-            age = time.time() - target_timestamps[tgt_id]
-            if age > INACTIVE_THRESHOLD:
-                print(f"target_timestamps[{tgt_id}] = {target_timestamps[tgt_id]} ({age:.1f}s old) - removing inactive target")
-                del targets[tgt_id]
-                del target_timestamps[tgt_id] 
+        # Store target data and update timestamps (expiry is left to the reaper thread)
+        store.upsert(records)
 
         # If there's a selected target, notify launcher asynchronously
-        if selected_target:
-            notify_launcher_async(selected_target)
+        notify_launcher_async(store.selected)
 
         return jsonify({
             'status': 'success',
@@ -140,34 +275,97 @@ def update_target():
         return jsonify({'error': str(e)}), 500
 
 
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+FRAME_TYPES = ('application/octet-stream', 'application/x-rttf')
+MAX_REPORTED_REJECTS = 20
+
+@app.route('/api/TARGET/bulk', methods=['POST'])
+def bulk_ingest():
+    """
+    POST endpoint for bulk target updates
+    Body is NDJSON (one target object per line) or RTTF binary frames, parsed
+    incrementally as it streams in and stored in one batch under one lock.
+    Responds with counts only (no echo of the payload).
+    """
+    try:
+        mimetype = request.mimetype
+        chunks = ingest.body_chunks(request.stream,
+                                    request.headers.get('Content-Encoding', '').lower() == 'gzip')
+        if mimetype in NDJSON_TYPES:
+            records, rejects = ingest.parse_ndjson(chunks)
+        elif mimetype in FRAME_TYPES:
+            records, rejects = ingest.parse_frames(chunks)
+        else:
+            return jsonify({'error': f'Unsupported Content-Type {mimetype!r}; use application/x-ndjson '
+                                     f'or application/octet-stream'}), 415
+
+        notify_if_selected(store.upsert(records))
+
+        return jsonify({
+            'status': 'success' if not rejects else 'partial',
+            'accepted': len(records),
+            'rejected': len(rejects),
+            'rejects': [{'at': at, 'error': reason} for at, reason in rejects[:MAX_REPORTED_REJECTS]]
+        }), 200 if records or not rejects else 400
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/TARGET', methods=['GET'])
 def get_targets():
-    """GET endpoint to retrieve all targets with active/inactive status"""
-    return jsonify(get_all_targets_with_status()), 200
+    """
+    GET endpoint to retrieve all targets with active/inactive status
+    ?since=<seq> returns only the changes after that seq; the full map carries
+    an ETag and answers If-None-Match with 304 while nothing has changed.
+    ?n_min=&n_max=&e_min=&e_max=, ?radius=[&north=&east=] and ?nearest=<k>
+    return only the targets in that area (see area_query).
+    """
+    since = request.args.get('since')
+    if any(name in request.args for name in AREA_PARAMS):
+        if since is not None:
+            return jsonify({'error': 'since cannot be combined with an area query'}), 400
+        try:
+            seq, targets = area_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # json.dumps keeps the nearest-first order (jsonify sorts keys)
+        return Response(json.dumps(targets), mimetype='application/json',
+                        headers={'X-Change-Seq': str(seq)}), 200
+
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({'error': 'since must be an integer change seq'}), 400
+        delta = targets_since(since)
+        if delta is not None:
+            return jsonify(delta), 200
+        # too old (or from another server run): hand back everything
+        etag, seq, body = full_snapshot()
+        return Response(b'{"seq":%d,"since":%d,"reset":true,"targets":%s}' % (seq, since, body),
+                        mimetype='application/json'), 200
+
+    etag, seq, body = full_snapshot()
+    response = Response(body, mimetype='application/json', headers={'X-Change-Seq': str(seq)})
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 
 @app.route('/api/TARGET/<target_id>', methods=['GET'])
 def get_target(target_id):
     """GET endpoint to retrieve specific target with active/inactive status"""
-    if target_id in targets:
-        return jsonify(get_target_with_status(target_id, targets[target_id])), 200
+    entry = store.get(target_id)
+    if entry is not None:
+        return jsonify(get_target_with_status(*entry)), 200
     return jsonify({'error': 'Target not found'}), 404
 
 
 @app.route('/api/TARGET/<target_id>', methods=['DELETE'])
 def delete_target(target_id):
     """DELETE endpoint to remove a target"""
-    global selected_target
-    
-    if target_id in targets:
-        del targets[target_id]
-        if target_id in target_timestamps:
-            del target_timestamps[target_id]
-        
-        # Clear selection if deleted target was selected
-        if selected_target == target_id:
-            selected_target = None
-        
+    # the store also clears the selection if it pointed at this target
+    if store.remove(target_id):
         return jsonify({'status': 'success', 'message': f'Target {target_id} deleted'}), 200
     return jsonify({'error': 'Target not found'}), 404
 
@@ -175,13 +373,9 @@ def delete_target(target_id):
 @app.route('/api/TARGET/<target_id>/select', methods=['POST'])
 def select_target(target_id):
     """POST endpoint to select a target and notify launcher asynchronously"""
-    global selected_target
-    
-    if target_id not in targets:
+    if not store.select(target_id):
         return jsonify({'error': 'Target not found'}), 404
     
-    selected_target = target_id
-    
     # Notify launcher asynchronously without blocking
     notify_launcher_async(target_id)
     
@@ -195,8 +389,6 @@ def select_target(target_id):
 @app.route('/api/turret/azimuth_update', methods=['POST'])
 def update_turret_azimuth():
     """POST endpoint to update turret azimuth angle"""
-    global turret_azimuth
-    
     try:
         data = request.get_json()
         
@@ -213,7 +405,7 @@ def update_turret_azimuth():
         
         # Normalize azimuth to 0-360 range
         azimuth = azimuth % 360
-        turret_azimuth = azimuth
+        store.set_turret_azimuth(azimuth)
         
         print(f"Turret azimuth updated: {azimuth}°")
         
@@ -227,6 +419,54 @@ def update_turret_azimuth():
         return jsonify({'error': str(e)}), 500
 
 
+def stream_snapshot(snap):
+    """Full state for a stream subscriber, from a store snapshot"""
+    table = snap.table
+    rows = table.live_rows()
+    return {
+        't': time.time(),
+        'targets': dict(zip(table.ids_of(rows), table.records(rows, last_update=True))),
+        'turret_azimuth': snap.turret_azimuth,
+        'selected': snap.selected
+    }
+
+
+@app.route('/api/stream')
+def stream():
+    """
+    Server-Sent Events stream for operator clients
+    Sends a full 'snapshot' event, then coalesced 'batch' events (upserts,
+    removals, turret azimuth, selection) from the shared broadcaster.
+    """
+    # subscribe and snapshot atomically so no change falls in between
+    sub, snap = store.snapshot_with(broadcaster.subscribe)
+    first = encode_event('snapshot', stream_snapshot(snap))
+
+    def events():
+        try:
+            yield first
+            while True:
+                try:
+                    data = sub.queue.get(timeout=SSE_KEEPALIVE)
+                except queue.Empty:
+                    yield b': keep-alive\n\n'
+                    continue
+                if sub.overflow:
+                    # too far behind: replace the backlog with a fresh snapshot
+                    def resync():
+                        sub.overflow = False
+                        while not sub.queue.empty():
+                            sub.queue.get_nowait()
+                    _, snap = store.snapshot_with(resync)
+                    data = encode_event('snapshot', stream_snapshot(snap))
+                yield data
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 # ============= Web Interface Routes =============
 
 @app.route('/')
@@ -246,11 +486,29 @@ def status():
     """API status endpoint"""
     return jsonify({
         'status': 'online',
-        'targets_count': len(targets),
-        'turret_azimuth': turret_azimuth
+        'targets_count': len(store),
+        'turret_azimuth': store.turret_azimuth,
+        'store': store.stats(),
+        'udp': udp_listener.stats() if udp_listener is not None else None,
+        'stream': broadcaster.stats(),
+        'launcher': launcher_notifier.stats()
     }), 200
 
 
+@app.route('/api/udp/stats')
+def udp_stats():
+    """UDP telemetry listener counters (loss / reorder / duplicates)"""
+    if udp_listener is None:
+        return jsonify({'error': 'UDP listener not running'}), 404
+    return jsonify(udp_listener.stats()), 200
+
+
+@app.route('/api/launcher/stats')
+def launcher_stats():
+    """Launcher notifier counters (sent / coalesced / retries) and latency"""
+    return jsonify(launcher_notifier.stats()), 200
+
+
 # ============= Error Handlers =============
 
 @app.errorhandler(404)
@@ -274,5 +532,9 @@ if __name__ == '__main__':
     print("📍 Web Interface: http://localhost:5000")
     print("📍 API Endpoint: http://localhost:5000/api/TARGET")
     print("Press Ctrl+C to stop the server")
+
+    # the debug reloader runs this block twice; only its child serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_workers()
     
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -1,2 +1,2 @@
 # package marker
-__all__ = ["config", "target", "logger", "ui"]
\ No newline at end of file
+__all__ = ["config", "swarm", "target", "logger", "ui"]
\ No newline at end of file
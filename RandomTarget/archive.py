@@ -0,0 +1,343 @@
+"""Columnar, chunk-compressed recording archive for target streams.
+
+A recording is a sequence of frames (time, ids, NED position, velocity).
+Frames are buffered into chunks; each chunk stores its columns as typed
+arrays (f64 frame times, u32 per-frame counts, u32 id codes into a
+chunk-local id table, f32 north/east/down/vn/ve/vd) and compresses them with
+zlib. A footer index of (offset, first time, last time) per chunk makes the
+archive seekable by time; an archive without a footer (writer crashed) is
+still readable by scanning chunk headers.
+
+File layout (little endian):
+    b"RTAR" u32 version
+    chunk*:  CHUNK_HEAD (magic b"CHNK", frames, rows, t_first, t_last,
+             raw_len, comp_len, codec) + compressed payload
+    index:   u32 count + count * INDEX_ENTRY
+    trailer: b"RTIX" u64 index offset
+
+Capture with ArchiveWriter (used by the "archive" sink), or convert existing
+recordings:
+
+    python RandomTarget/archive.py import out.rta received_json/*.seg telemetry_log/*.bin
+    python RandomTarget/archive.py info out.rta
+"""
+import argparse
+import bisect
+import json
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+MAGIC = b"RTAR"
+VERSION = 1
+CODEC_ZLIB = 1
+_FILE_HEAD = struct.Struct("<4sI")
+CHUNK_HEAD = struct.Struct("<4sIIddIIB3x")
+INDEX_ENTRY = struct.Struct("<QddII")
+_TRAILER = struct.Struct("<4sQ")
+_U32 = struct.Struct("<I")
+
+
+def _encode_chunk(times, counts, ids, pos, vel):
+    """Pack buffered frames into one raw column block."""
+    table, codes = np.unique(np.asarray(ids, dtype=object).astype(str), return_inverse=True)
+    id_blob = "\n".join(table.tolist()).encode("utf-8")
+    cols = [
+        np.asarray(times, dtype="<f8").tobytes(),
+        np.asarray(counts, dtype="<u4").tobytes(),
+        _U32.pack(len(table)) + _U32.pack(len(id_blob)) + id_blob,
+        codes.astype("<u4").tobytes(),
+    ]
+    # one column per component compresses far better than interleaved xyz
+    for arr in (pos, vel):
+        for k in range(3):
+            cols.append(np.ascontiguousarray(arr[:, k], dtype="<f4").tobytes())
+    return b"".join(cols)
+
+
+def _decode_chunk(raw, frames, rows):
+    """Inverse of _encode_chunk: (times, counts, ids array, pos, vel)."""
+    off = 0
+    times = np.frombuffer(raw, "<f8", frames, off)
+    off += 8 * frames
+    counts = np.frombuffer(raw, "<u4", frames, off)
+    off += 4 * frames
+    ntable, blob_len = struct.unpack_from("<II", raw, off)
+    off += 8
+    table = np.array(raw[off:off + blob_len].decode("utf-8").split("\n") if ntable else [], dtype=object)
+    off += blob_len
+    codes = np.frombuffer(raw, "<u4", rows, off)
+    off += 4 * rows
+    cols = []
+    for _ in range(6):
+        cols.append(np.frombuffer(raw, "<f4", rows, off).astype(np.float64))
+        off += 4 * rows
+    pos = np.column_stack(cols[:3]) if rows else np.zeros((0, 3))
+    vel = np.column_stack(cols[3:]) if rows else np.zeros((0, 3))
+    return times, counts, table[codes] if rows else table[:0], pos, vel
+
+
+class ArchiveWriter:
+    """Append frames to an archive; call close() to write the seek index."""
+
+    def __init__(self, path, chunk_frames=256, chunk_rows=1 << 18, level=6):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.chunk_rows = chunk_rows
+        self.level = level
+        dirpath = os.path.dirname(path)
+        if dirpath:
+            os.makedirs(dirpath, exist_ok=True)
+        self._file = open(path, "wb")
+        self._file.write(_FILE_HEAD.pack(MAGIC, VERSION))
+        self._index = []
+        self._reset()
+        self.frames_written = 0
+        self.rows_written = 0
+        self.last_t = None
+
+    def _reset(self):
+        self._times, self._counts, self._ids, self._pos, self._vel = [], [], [], [], []
+        self._rows = 0
+
+    def append(self, t, ids, pos, vel):
+        """Add one frame. Frames must arrive in non-decreasing time order."""
+        if self.last_t is not None and t < self.last_t:
+            t = self.last_t     # keep the time column monotonic for seeking
+        self.last_t = t
+        self._times.append(t)
+        self._counts.append(len(ids))
+        self._ids.extend(ids)
+        self._pos.append(np.asarray(pos, dtype=np.float64).reshape(-1, 3))
+        self._vel.append(np.asarray(vel, dtype=np.float64).reshape(-1, 3))
+        self._rows += len(ids)
+        self.frames_written += 1
+        self.rows_written += len(ids)
+        if len(self._times) >= self.chunk_frames or self._rows >= self.chunk_rows:
+            self.flush()
+
+    def append_snapshot(self, snap):
+        self.append(snap.t, snap.ids.tolist(), snap.pos, snap.vel)
+
+    def append_records(self, records, t=None):
+        """Add a frame from JSON records ({"id", "timestamp", "position", "velocity"})."""
+        if isinstance(records, dict):
+            records = [records]
+        ids, pos, vel = [], [], []
+        for rec in records:
+            p, v = rec.get("position") or {}, rec.get("velocity") or {}
+            ids.append(str(rec.get("id")))
+            pos.append((p.get("north", 0.0), p.get("east", 0.0), p.get("down", 0.0)))
+            vel.append((v.get("vn", 0.0), v.get("ve", 0.0), v.get("vd", 0.0)))
+            if t is None:
+                t = rec.get("timestamp")
+        self.append(float(t or 0.0), ids, np.array(pos, dtype=np.float64), np.array(vel, dtype=np.float64))
+
+    def flush(self):
+        """Compress and write the buffered frames as one chunk."""
+        if not self._times:
+            return
+        pos = np.concatenate(self._pos) if self._pos else np.zeros((0, 3))
+        vel = np.concatenate(self._vel) if self._vel else np.zeros((0, 3))
+        raw = _encode_chunk(self._times, self._counts, self._ids, pos, vel)
+        comp = zlib.compress(raw, self.level)
+        offset = self._file.tell()
+        self._file.write(CHUNK_HEAD.pack(b"CHNK", len(self._times), self._rows, self._times[0], self._times[-1],
+                                         len(raw), len(comp), CODEC_ZLIB))
+        self._file.write(comp)
+        self._index.append((offset, self._times[0], self._times[-1], len(self._times), self._rows))
+        self._reset()
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        index_offset = self._file.tell()
+        self._file.write(_U32.pack(len(self._index)))
+        for entry in self._index:
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.write(_TRAILER.pack(b"RTIX", index_offset))
+        self._file.close()
+        self._file = None
+
+
+class ArchiveReader:
+    """Random access to an archive by time."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        magic, version = _FILE_HEAD.unpack(self._file.read(_FILE_HEAD.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a target archive")
+        if version != VERSION:
+            raise ValueError(f"Unsupported archive version {version}")
+        self.index = self._read_index() or self._scan_chunks()
+        self._lasts = [e[2] for e in self.index]
+
+    def _read_index(self):
+        f = self._file
+        size = f.seek(0, os.SEEK_END)
+        if size < _FILE_HEAD.size + _TRAILER.size:
+            return None
+        f.seek(size - _TRAILER.size)
+        magic, index_offset = _TRAILER.unpack(f.read(_TRAILER.size))
+        if magic != b"RTIX":
+            return None
+        f.seek(index_offset)
+        (count,) = _U32.unpack(f.read(_U32.size))
+        data = f.read(count * INDEX_ENTRY.size)
+        return [INDEX_ENTRY.unpack_from(data, k * INDEX_ENTRY.size) for k in range(count)]
+
+    def _scan_chunks(self):
+        """Rebuild the index from chunk headers (archive closed uncleanly)."""
+        index = []
+        f = self._file
+        f.seek(_FILE_HEAD.size)
+        while True:
+            offset = f.tell()
+            head = f.read(CHUNK_HEAD.size)
+            if len(head) < CHUNK_HEAD.size:
+                break
+            magic, frames, rows, t0, t1, _, comp_len, _ = CHUNK_HEAD.unpack(head)
+            if magic != b"CHNK" or len(f.read(comp_len)) < comp_len:
+                break
+            index.append((offset, t0, t1, frames, rows))
+        return index
+
+    @property
+    def t_start(self):
+        return self.index[0][1] if self.index else None
+
+    @property
+    def t_end(self):
+        return self.index[-1][2] if self.index else None
+
+    @property
+    def frame_count(self):
+        return sum(e[3] for e in self.index)
+
+    @property
+    def row_count(self):
+        return sum(e[4] for e in self.index)
+
+    def read_chunk(self, k):
+        offset = self.index[k][0]
+        self._file.seek(offset)
+        magic, frames, rows, _, _, raw_len, comp_len, codec = CHUNK_HEAD.unpack(self._file.read(CHUNK_HEAD.size))
+        if codec != CODEC_ZLIB:
+            raise ValueError(f"Unknown chunk codec {codec}")
+        raw = zlib.decompress(self._file.read(comp_len))
+        return _decode_chunk(raw, frames, rows)
+
+    def frames(self, start=None, end=None):
+        """Yield (t, ids, pos, vel) for frames with start <= t <= end."""
+        first = 0 if start is None else bisect.bisect_left(self._lasts, start)
+        for k in range(first, len(self.index)):
+            if end is not None and self.index[k][1] > end:
+                return
+            times, counts, ids, pos, vel = self.read_chunk(k)
+            bounds = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=bounds[1:])
+            bounds = bounds.tolist()
+            for i, t in enumerate(times.tolist()):
+                if start is not None and t < start:
+                    continue
+                if end is not None and t > end:
+                    return
+                lo, hi = bounds[i], bounds[i + 1]
+                yield t, ids[lo:hi].tolist(), pos[lo:hi], vel[lo:hi]
+
+    def close(self):
+        self._file.close()
+
+
+def _import_file(writer, path):
+    """Append one recording file to the archive. Returns frames added."""
+    before = writer.frames_written
+    if path.endswith(".seg"):
+        # server_local.py receiver segments: one frame per POST body
+        here = os.path.dirname(os.path.abspath(__file__))
+        if here not in sys.path:
+            sys.path.insert(0, here)
+        from server_local import read_segment
+        for t_recv, _, body in read_segment(path):
+            try:
+                records = json.loads(body)
+            except ValueError:
+                continue
+            writer.append_records(records, t=None if records else t_recv)
+    elif path.endswith(".bin"):
+        from .telemetry_log import read_frames
+        for t, ids, pos, vel in read_frames(path):
+            writer.append(t, ids, pos, vel)
+    elif path.endswith(".ndjson"):
+        # telemetry_log NDJSON: consecutive lines with the same timestamp form a frame
+        frame, frame_t = [], None
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                if frame and rec.get("timestamp") != frame_t:
+                    writer.append_records(frame)
+                    frame = []
+                frame.append(rec)
+                frame_t = rec.get("timestamp")
+        if frame:
+            writer.append_records(frame)
+    elif path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            writer.append_records(json.load(f))
+    else:
+        raise ValueError(f"Don't know how to import {path}")
+    return writer.frames_written - before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Target stream archive tool")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="convert recordings (.seg, .bin, .ndjson, .json) into an archive")
+    imp.add_argument("archive")
+    imp.add_argument("inputs", nargs="+")
+    info = sub.add_parser("info", help="summarize an archive")
+    info.add_argument("archive")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "import":
+        writer = ArchiveWriter(args.archive)
+        try:
+            for path in sorted(args.inputs):
+                try:
+                    n = _import_file(writer, path)
+                    print(f"{path}: {n} frames", file=sys.stderr)
+                except Exception as e:
+                    print(f"{path}: skipped ({e})", file=sys.stderr)
+        finally:
+            writer.close()
+    reader = ArchiveReader(args.archive)
+    try:
+        print(json.dumps({
+            "archive": args.archive,
+            "bytes": os.path.getsize(args.archive),
+            "chunks": len(reader.index),
+            "frames": reader.frame_count,
+            "rows": reader.row_count,
+            "t_start": reader.t_start,
+            "t_end": reader.t_end,
+            "duration_s": None if reader.t_start is None else round(reader.t_end - reader.t_start, 3),
+        }, indent=2))
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    if __package__ is None or __package__ == "":
+        parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if parent not in sys.path:
+            sys.path.insert(0, parent)
+        __package__ = "RandomTarget"
+    main()
@@ -0,0 +1,85 @@
+"""CPU benchmark: integrating vs lazy (closed-form) swarm kinematics.
+
+Runs the engine loop in real time for each swarm size and mode, with an
+optional reader taking snapshots at a fixed rate, and reports process CPU
+time per wall-clock second.
+
+    python RandomTarget/bench_kinematics.py --duration 5 --read-rate 10
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+if __package__ is None or __package__ == "":
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+
+from RandomTarget.swarm import Swarm
+
+
+def run_case(n, lazy, duration, tick_rate, read_rate, lifetime):
+    swarm = Swarm(capacity=n, seed=1, lazy=lazy)
+    swarm.spawn([f"T-{i}" for i in range(n)])
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    next_tick = next_read = start_wall
+    ticks = reads = 0
+    while True:
+        now_wall = time.perf_counter()
+        if now_wall - start_wall >= duration:
+            break
+        now = time.time()
+        if now_wall >= next_tick:
+            swarm.tick(now, lifetime)
+            deadline = swarm.next_expiry(lifetime)
+            if lazy:
+                # same wake-up policy as target.swarm_thread_task
+                wait = 1.0 if deadline is None else min(1.0, max(0.0, deadline - now))
+            else:
+                wait = tick_rate
+            next_tick = now_wall + wait
+            ticks += 1
+        if read_rate > 0 and now_wall >= next_read:
+            swarm.snapshot(now)
+            next_read = now_wall + 1.0 / read_rate
+            reads += 1
+        wake = min(next_tick, next_read) if read_rate > 0 else next_tick
+        time.sleep(max(0.0, wake - time.perf_counter()))
+
+    cpu = time.process_time() - start_cpu
+    wall = time.perf_counter() - start_wall
+    return {
+        "targets": n,
+        "mode": "lazy" if lazy else "integrate",
+        "ticks": ticks,
+        "reads": reads,
+        "cpu_s": round(cpu, 4),
+        "cpu_pct": round(100.0 * cpu / wall, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated swarm sizes")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per case")
+    parser.add_argument("--tick-rate", type=float, default=0.05, help="integrate-mode tick interval (s)")
+    parser.add_argument("--read-rate", type=float, default=0.0, help="snapshot reads per second (0 = idle swarm)")
+    parser.add_argument("--lifetime", type=float, default=300.0)
+    args = parser.parse_args()
+
+    results = []
+    for n in (int(s) for s in args.sizes.split(",") if s.strip()):
+        for lazy in (False, True):
+            res = run_case(n, lazy, args.duration, args.tick_rate, args.read_rate, args.lifetime)
+            print(f"{res['targets']:>7} {res['mode']:<9} cpu={res['cpu_s']:.3f}s ({res['cpu_pct']:.2f}%) "
+                  f"ticks={res['ticks']} reads={res['reads']}", file=sys.stderr)
+            results.append(res)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Throughput benchmark for the segmented local receiver (server_local.py).
+
+Starts the receiver in a subprocess on a scratch directory, hammers it from
+several client processes over keep-alive connections, then checks that the
+segment index holds exactly the POSTs that were acknowledged.
+
+    python RandomTarget/bench_receiver.py --clients 4 --duration 5 --body-bytes 600
+"""
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from server_local import INDEX_ENTRY  # noqa: E402
+
+
+def _client(port, body, duration, out):
+    # raw keep-alive socket with a pre-built request, one request in flight:
+    # keeps client-side CPU low so the receiver is what gets measured
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    request = (f"POST /upload HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+               f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body
+    ok = failed = 0
+    buf = b""
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        sock.sendall(request)
+        while True:
+            head_end = buf.find(b"\r\n\r\n")
+            if head_end >= 0:
+                head = buf[:head_end]
+                length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+                if len(buf) >= head_end + 4 + length:
+                    buf = buf[head_end + 4 + length:]
+                    break
+            buf += sock.recv(65536)
+        if head.startswith(b"HTTP/1.1 200"):
+            ok += 1
+        else:
+            failed += 1
+    sock.close()
+    out.put((ok, failed))
+
+
+def _wait_for_port(port, timeout=10.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("receiver did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--body-bytes", type=int, default=600, help="approximate JSON body size")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    record = {"id": "T-1", "timestamp": 0.0, "position": {"north": 1.0, "east": 2.0, "down": 3.0},
+              "velocity": {"vn": 1.0, "ve": 0.0, "vd": 0.0}}
+    n = max(1, args.body_bytes // len(json.dumps(record)))
+    body = json.dumps([record] * n, separators=(",", ":")).encode("utf-8")
+
+    out_dir = tempfile.mkdtemp(prefix="bench_receiver_")
+    server = subprocess.Popen([sys.executable, os.path.join(HERE, "server_local.py"), "--host", "127.0.0.1",
+                               "--port", str(args.port), "--out-dir", out_dir], stdout=subprocess.DEVNULL)
+    try:
+        _wait_for_port(args.port)
+        results = mp.Queue()
+        procs = [mp.Process(target=_client, args=(args.port, body, args.duration, results))
+                 for _ in range(args.clients)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        totals = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=5)
+
+    ok = sum(t[0] for t in totals)
+    failed = sum(t[1] for t in totals)
+    indexed = sum(os.path.getsize(p) // INDEX_ENTRY.size for p in glob.glob(os.path.join(out_dir, "*.idx")))
+    stored = sum(os.path.getsize(p) for p in glob.glob(os.path.join(out_dir, "*.seg")))
+    print(json.dumps({
+        "clients": args.clients,
+        "body_bytes": len(body),
+        "posts_ok": ok,
+        "posts_failed": failed,
+        "posts_per_s": round(ok / elapsed),
+        "indexed": indexed,
+        "stored_bytes": stored,
+        "index_matches": indexed == ok and stored == ok * len(body),
+        "out_dir": out_dir,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Throughput benchmark for the multi-process sharded swarm.
+
+Advances the same swarm with 1..N worker processes (coordinated-turn motion
+model) and reports target updates per second, so scaling with cores can be
+checked on the machine at hand.
+
+    python RandomTarget/bench_shards.py --targets 1000000 --workers 1,2,4,8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+if __package__ is None or __package__ == "":
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+
+from RandomTarget.shard import ShardedSwarm
+
+
+def run_case(workers, targets, ticks, turn_rate_std):
+    swarm = ShardedSwarm(workers=workers, capacity=targets, seed=1, turn_rate_std=turn_rate_std)
+    try:
+        t0 = time.time()
+        swarm.spawn([f"T-{i}" for i in range(targets)], now=t0, lifetime=1e9)
+        swarm.tick(t0 + 0.05)  # warm-up: workers attached and pages touched
+        start = time.perf_counter()
+        for k in range(ticks):
+            swarm.tick(t0 + 0.05 * (k + 2))
+        elapsed = time.perf_counter() - start
+        # parallel read of all shards without copying
+        start = time.perf_counter()
+        swarm.map_shards(lambda lo, hi, view: float(view[:, 0].sum()))
+        read_s = time.perf_counter() - start
+    finally:
+        swarm.close()
+    return {
+        "workers": workers,
+        "targets": targets,
+        "ticks": ticks,
+        "tick_ms": round(1000.0 * elapsed / ticks, 3),
+        "updates_per_s": round(targets * ticks / elapsed),
+        "shard_read_ms": round(1000.0 * read_s, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    default_workers = ",".join(str(w) for w in sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--targets", type=int, default=500000)
+    parser.add_argument("--workers", default=default_workers, help="comma separated worker counts")
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--turn-rate-std", type=float, default=0.05, help="rad/s")
+    args = parser.parse_args()
+
+    results = []
+    base = None
+    for w in (int(s) for s in args.workers.split(",") if s.strip()):
+        res = run_case(w, args.targets, args.ticks, args.turn_rate_std)
+        base = base or res["updates_per_s"]
+        res["speedup"] = round(res["updates_per_s"] / base, 2)
+        print(f"workers={w:<3} tick={res['tick_ms']:.2f} ms  {res['updates_per_s']:,} updates/s  "
+              f"x{res['speedup']}", file=sys.stderr)
+        results.append(res)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
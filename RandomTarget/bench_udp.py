@@ -0,0 +1,91 @@
+"""Throughput benchmark for the UDP telemetry transport.
+
+Runs the BMC webserver's UDP listener in this process (storing into the real
+webserver target dict) and a sender process that encodes swarm snapshots
+with udp_frames.FrameEncoder at a fixed target-update rate, then reports the
+achieved rate and the listener's loss / reorder counters.
+
+    python RandomTarget/bench_udp.py --targets 10000 --rate 100000 --duration 5
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import socket
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "BMC_Code"))
+
+
+def _sender(host, port, targets, rate, duration, max_datagram, out):
+    import numpy as np
+    from RandomTarget.swarm import Swarm
+    from RandomTarget.udp_frames import FrameEncoder
+
+    swarm = Swarm(capacity=max(1024, targets), seed=1)
+    swarm.spawn([f"T-{i}" for i in range(targets)], now=time.time(), lifetime=np.full(targets, 1e6))
+    enc = FrameEncoder(max_datagram)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+    period = targets / float(rate)      # seconds between full snapshots
+    sent = datagrams = 0
+    start = time.perf_counter()
+    k = 0
+    while time.perf_counter() - start < duration:
+        due = start + k * period
+        while time.perf_counter() < due:
+            time.sleep(min(0.001, max(0.0, due - time.perf_counter())))
+        snap = swarm.snapshot(time.time())
+        for datagram in enc.encode(snap, time.time()):
+            sock.sendto(datagram, (host, port))
+            datagrams += 1
+        sent += len(snap)
+        k += 1
+    out.put((sent, datagrams, time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", type=int, default=10000, help="targets per snapshot")
+    parser.add_argument("--rate", type=float, default=100000, help="target updates per second to send")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--max-datagram", type=int, default=60000)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    import webserver
+    from udp_listener import UdpTelemetryListener
+
+    listener = UdpTelemetryListener(webserver.apply_udp_targets, host="127.0.0.1", port=args.port).start()
+    out = mp.Queue()
+    proc = mp.Process(target=_sender, args=("127.0.0.1", args.port, args.targets, args.rate, args.duration,
+                                            args.max_datagram, out))
+    proc.start()
+    sent, datagrams, elapsed = out.get()
+    proc.join()
+    time.sleep(0.5)     # let the listener drain its socket buffer
+    listener.stop()
+
+    st = listener.stats()
+    print(json.dumps({
+        "targets": args.targets,
+        "rate_goal": args.rate,
+        "sent_updates": sent,
+        "sent_datagrams": datagrams,
+        "sent_per_s": round(sent / elapsed),
+        "received_updates": st["records"],
+        "received_per_s": round(st["records"] / elapsed),
+        "stored_targets": len(webserver.targets),
+        "lost": st["lost"],
+        "reordered": st["reordered"],
+        "duplicates": st["duplicates"],
+        "loss_ratio": st["loss_ratio"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
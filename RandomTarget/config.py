@@ -1,6 +1,8 @@
 import threading
 import os
 
+from .swarm import Swarm
+
 # --- Configuration ---
 JSON_FILENAME = "live_targets.json"
 # Secondary test output directory/filename (will be created when used)
@@ -8,7 +10,25 @@ RANDOM_TEST_DIR = "Random_test"
 TEST_JSON_FILENAME = os.path.join(RANDOM_TEST_DIR, "live_targets.json")
 TARGET_UPDATE_RATE = 0.05       # target internal update rate (s)
 JSON_WRITE_RATE = 0.1           # default JSON flush interval (s)
+
+# Telemetry log: "stream" appends every snapshot to rotating segment files and
+# refreshes the latest-snapshot JSON files every SNAPSHOT_INTERVAL seconds;
+# "rewrite" is the legacy full JSON rewrite of both files on every tick.
+LOG_MODE = "stream"
+LOG_DIR = "telemetry_log"
+LOG_FORMAT = "ndjson"           # "ndjson" or "binary" (length-prefixed frames)
+LOG_SEGMENT_BYTES = 64 * 1024 * 1024
+LOG_FSYNC_INTERVAL = 1.0        # seconds between fsyncs (0 = every append, None = never)
+SNAPSHOT_INTERVAL = 1.0         # latest-snapshot cadence (s); 0 disables the snapshot files
 TARGET_LIFETIME = 300.0         # seconds a target remains active (5 minutes)
+# "integrate": move every target each TARGET_UPDATE_RATE tick
+# "lazy": store (t0, position0, velocity) and evaluate positions only when read
+KINEMATICS_MODE = "lazy"
+# >0: simulate the swarm in that many worker processes over shared memory
+# (see shard.py); always integrates, with an optional coordinated-turn model
+SHARD_WORKERS = 0
+SHARD_CAPACITY = 262144         # fixed number of target slots when sharded
+SHARD_TURN_RATE_STD = 0.0       # std-dev of random turn rates (rad/s), 0 = straight lines
 
 # Endpoint / sending control (can be updated from UI)
 SEND_TO_ENDPOINT = False
@@ -16,9 +36,62 @@ ENDPOINT_URL = "http://172.20.10.3:5000/api/TARGET"   # default local test endpo
 
 # ENDPOINT_URL = "http://localhost:8000/upload"   # default local test endpoint
 ENDPOINT_API_KEY = ""
+# Sender stage: persistent keep-alive workers fed by a bounded latest-wins queue
+SEND_CONCURRENCY = 2            # worker threads / open connections
+SEND_QUEUE_SIZE = 4             # payloads waiting to be sent; oldest dropped when full
+SEND_GZIP = False               # gzip request bodies (Content-Encoding: gzip)
+SEND_TIMEOUT = 5.0              # per-request socket timeout (s)
+# Adaptive (AIMD) endpoint POST rate: back off multiplicatively when the p90
+# POST latency exceeds AIMD_TARGET_LATENCY, errors exceed AIMD_MAX_ERROR_RATIO
+# or payloads are dropped; otherwise add AIMD_INCREASE POSTs/s per period
+SEND_ADAPTIVE = False
+AIMD_TARGET_LATENCY = 0.25      # s
+AIMD_MIN_RATE = 0.5             # POSTs/s
+AIMD_MAX_RATE = 0.0             # POSTs/s, 0 = one POST per JSON_WRITE_RATE tick
+AIMD_INCREASE = 1.0             # POSTs/s added per healthy period
+AIMD_DECREASE = 0.5             # rate multiplier on congestion
+AIMD_MAX_ERROR_RATIO = 0.05
+AIMD_PERIOD = 1.0               # s between rate decisions
+# Shared-memory live snapshot for local readers (UI preview, server_local /upload)
+SHM_ENABLED = True
+SHM_NAME = "randomtarget_live"
+SHM_CAPACITY = 131072           # max targets in the shared snapshot
+
+# "all": POST every target on every tick
+# "dead_reckoning": POST a target only when it is new, when the receiver's
+# constant-velocity extrapolation is off by more than DR_THRESHOLD meters, or
+# when DR_MAX_STALENESS seconds have passed since it was last sent
+PUBLISH_MODE = "all"
+DR_THRESHOLD = 5.0              # meters
+DR_MAX_STALENESS = 2.0          # seconds (heartbeat)
+
+# Fan-out sinks: each runs on its own thread with its own cadence (seconds of
+# snapshot time between writes, 0 = every JSON_WRITE_RATE tick) and queue
+# depth (oldest snapshot dropped when full). A file interval of None follows
+# SNAPSHOT_INTERVAL in stream mode; the ndjson sink only runs in stream mode
+# and the http sink only while SEND_TO_ENDPOINT is on.
+SINKS = {
+    "file":   {"enabled": True,  "interval": None, "queue": 1},
+    "ndjson": {"enabled": True,  "interval": 0.0,  "queue": 64},
+    "http":   {"enabled": True,  "interval": 0.0,  "queue": 4},
+    "udp":    {"enabled": False, "interval": 0.1,  "queue": 4},
+    "stdout": {"enabled": False, "interval": 5.0,  "queue": 1},
+    "archive": {"enabled": False, "interval": 0.0, "queue": 64},
+}
+# UDP telemetry: a unicast host or a multicast group (e.g. "239.1.2.3");
+# "binary" frames (udp_frames.py) are what the BMC listener decodes
+UDP_HOST = "127.0.0.1"
+UDP_PORT = 5005
+UDP_FORMAT = "binary"           # "binary" | "ndjson"
+UDP_MAX_DATAGRAM = 60000        # bytes per datagram (records are never split)
+UDP_MULTICAST_TTL = 1
+# Columnar replay archive (archive.py / replay.py), one .rta file per run
+ARCHIVE_DIR = "archive"
+ARCHIVE_CHUNK_FRAMES = 256      # snapshots per compressed chunk
+# UI map: above this many targets draw clustered dots without labels or trails
+MAP_LOD_THRESHOLD = 200
 
 # --- Shared Resources (Protected by Lock) ---
-active_targets = []             # list of Target instances
+swarm = Swarm(lazy=KINEMATICS_MODE == "lazy")   # every live target, advanced by one engine thread
 targets_lock = threading.Lock()
-target_threads = []             # references to per-target threads
 stop_threads_event = threading.Event()
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""Dead-reckoning threshold publishing.
+
+The receiver is assumed to extrapolate each target with constant velocity from
+the last state it was sent. A target is re-sent only when it is new, when
+that extrapolation has drifted more than `threshold` meters from the truth,
+or when `max_staleness` seconds have passed since its last send (heartbeat).
+
+select() runs on the sending thread only. reset() and forget() may be called
+from any thread (UI, sender workers); they only leave a note that the next
+select() applies before it reads the published state.
+"""
+import collections
+
+import numpy as np
+
+
+class DeadReckoningFilter:
+    """Tracks the last published state per target id and selects what to send."""
+
+    def __init__(self, threshold=5.0, max_staleness=2.0):
+        self.threshold = threshold
+        self.max_staleness = max_staleness
+        self.sent = 0           # target updates published
+        self.suppressed = 0     # target updates skipped because the receiver can extrapolate
+        self.lost = 0           # published updates reported lost by the sender
+        self._reset_pending = False
+        self._forget = collections.deque()  # id lists whose update never reached the receiver
+        self._clear()
+
+    def reset(self):
+        """Forget every published state so the next select() sends everything."""
+        self._reset_pending = True
+
+    def forget(self, ids):
+        """Mark the update of `ids` as lost so the next select() resends them."""
+        self._forget.append(ids)
+
+    def _clear(self):
+        self._index = {}
+        self._t = np.zeros(0)
+        self._pos = np.zeros((0, 3))
+        self._vel = np.zeros((0, 3))
+
+    def _grow(self, need):
+        cap = len(self._t)
+        if need <= cap:
+            return
+        cap = max(need, cap * 2, 64)
+        for name in ("_t", "_pos", "_vel"):
+            old = getattr(self, name)
+            new = np.zeros((cap,) + old.shape[1:])
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def _prune(self, ids):
+        """Drop state for targets that are no longer in the swarm."""
+        live = set(ids)
+        keep = [(tid, slot) for tid, slot in self._index.items() if tid in live]
+        slots = np.array([slot for _, slot in keep], dtype=np.intp)
+        self._t = self._t[slots]
+        self._pos = self._pos[slots]
+        self._vel = self._vel[slots]
+        self._index = {tid: i for i, (tid, _) in enumerate(keep)}
+
+    def _apply_notes(self):
+        if self._reset_pending:
+            self._reset_pending = False
+            self._forget.clear()
+            self._clear()
+        while self._forget:
+            ids = self._forget.popleft()
+            slots = [self._index[tid] for tid in ids if tid in self._index]
+            self._t[slots] = -np.inf  # infinitely stale: sent again on the next select
+            self.lost += len(slots)
+
+    def select(self, snap):
+        """Return the row indices of `snap` that must be published now."""
+        self._apply_notes()
+        ids = snap.ids.tolist()
+        if len(self._index) > len(ids):
+            self._prune(ids)
+        n = len(ids)
+        slots = np.fromiter((self._index.get(tid, -1) for tid in ids), dtype=np.intp, count=n)
+
+        send = slots < 0
+        known = ~send
+        if known.any():
+            ks = slots[known]
+            age = snap.t - self._t[ks]
+            with np.errstate(invalid="ignore"):
+                # forgotten rows have an infinite age; their NaN error compares False
+                predicted = self._pos[ks] + self._vel[ks] * age[:, None]
+                err = np.linalg.norm(snap.pos[known] - predicted, axis=1)
+            send[known] = (err > self.threshold) | (age >= self.max_staleness)
+
+        new_rows = np.flatnonzero(slots < 0)
+        if len(new_rows):
+            base = len(self._index)
+            self._grow(base + len(new_rows))
+            for k, row in enumerate(new_rows.tolist()):
+                self._index[ids[row]] = base + k
+            slots[new_rows] = np.arange(base, base + len(new_rows))
+
+        rows = np.flatnonzero(send)
+        upd = slots[rows]
+        self._t[upd] = snap.t
+        self._pos[upd] = snap.pos[rows]
+        self._vel[upd] = snap.vel[rows]
+
+        self.sent += len(rows)
+        self.suppressed += n - len(rows)
+        return rows
+
+    def stats(self):
+        return {"sent": self.sent, "suppressed": self.suppressed, "lost": self.lost}
@@ -0,0 +1,218 @@
+"""Headless high-rate load generator for capacity-testing target endpoints.
+
+Spawns targets into a swarm engine without Tk, POSTs snapshots in batches
+through the pooled sender stage and prints a JSON report with achieved
+messages/s, targets/s, bytes/s and POST latency percentiles.
+
+    python RandomTarget/loadgen.py --targets 5000 --spawn-rate 1000 \\
+        --lifetime uniform:30,120 --send-rate 20 --batch-size 500 \\
+        --endpoint http://localhost:5000/api/TARGET --duration 30
+
+Works against BMC_Code/webserver.py (/api/TARGET) or server_local.py (/upload).
+With --format ndjson or binary, snapshots are posted to the BMC bulk ingest
+endpoint (/api/TARGET/bulk) as NDJSON lines or RTTF binary frames.
+With --scenario, targets come from a scenario file (see scenario.py) instead
+of the --targets/--spawn-rate goal, so runs are reproducible.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+if __package__ is None or __package__ == "":
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+
+import numpy as np
+
+from RandomTarget.swarm import Swarm
+from RandomTarget.scenario import Scenario, ScenarioRunner
+from RandomTarget.sender import AimdController, HttpSender
+from RandomTarget.telemetry_log import encode_ndjson
+from RandomTarget.udp_frames import FrameEncoder
+
+CONTENT_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson", "binary": "application/octet-stream"}
+
+
+def parse_lifetime(spec):
+    """Parse a lifetime distribution: fixed:S, uniform:A,B or exp:MEAN.
+
+    Returns a function rng, k -> array of k lifetimes (seconds).
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        vals = [float(v) for v in args.split(",")] if args else []
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad lifetime spec: {spec}")
+    if kind == "fixed" and len(vals) == 1:
+        return lambda rng, k: np.full(k, vals[0])
+    if kind == "uniform" and len(vals) == 2:
+        return lambda rng, k: rng.uniform(vals[0], vals[1], k)
+    if kind == "exp" and len(vals) == 1:
+        return lambda rng, k: rng.exponential(vals[0], k)
+    raise argparse.ArgumentTypeError(f"bad lifetime spec: {spec} (use fixed:S, uniform:A,B or exp:MEAN)")
+
+
+def run(args):
+    swarm = Swarm(capacity=max(1024, args.targets), seed=args.seed, lazy=True)
+    runner = ScenarioRunner(Scenario.load(args.scenario), swarm) if args.scenario else None
+    lifetimes = parse_lifetime(args.lifetime)
+    batches_per_send = 1 if args.batch_size <= 0 else -(-args.targets // args.batch_size)
+    sender = HttpSender(args.endpoint, api_key=args.api_key, concurrency=args.concurrency,
+                        queue_size=max(args.queue_size, batches_per_send + args.concurrency), gzip_body=args.gzip,
+                        timeout=args.timeout, content_type=CONTENT_TYPES[args.format]).start()
+    frames = FrameEncoder(max_datagram=1 << 24)
+
+    def encode(part):
+        if args.format == "ndjson":
+            return encode_ndjson(part)
+        if args.format == "binary":
+            return b"".join(frames.encode(part, time.time()))
+        return part.to_dicts()
+
+    controller = None
+    if args.adaptive:
+        controller = AimdController(initial_rate=args.send_rate, min_rate=args.aimd_min_rate,
+                                    max_rate=args.aimd_max_rate or max(args.send_rate, 1.0) * 10.0,
+                                    target_latency=args.aimd_target_ms / 1000.0)
+        sender.controller = controller
+
+    counter = 0
+    targets_submitted = 0
+    spawn_credit = 0.0
+    start = last = time.perf_counter()
+    next_send = start
+    next_report = start + args.report_interval if args.report_interval > 0 else None
+    try:
+        while True:
+            now_wall = time.perf_counter()
+            elapsed = now_wall - start
+            if elapsed >= args.duration:
+                break
+            now = time.time()
+
+            # spawn towards the live-target goal at the configured rate (0 = all at once)
+            swarm.expire(now)
+            room = args.targets - len(swarm)
+            if runner is not None:
+                counter += runner.poll(now)
+                k = 0
+            elif args.spawn_rate > 0:
+                spawn_credit = min(spawn_credit + (now_wall - last) * args.spawn_rate, float(args.targets))
+                k = min(room, int(spawn_credit))
+                spawn_credit -= k
+            else:
+                k = room
+            last = now_wall
+            if k > 0:
+                ids = [f"L-{i}" for i in range(counter + 1, counter + k + 1)]
+                counter += k
+                swarm.spawn(ids, now=now, lifetime=lifetimes(swarm.rng, k))
+
+            # send: paced by --send-rate (adjusted by AIMD with --adaptive),
+            # or as fast as the workers drain (0)
+            send_rate = controller.update(now_wall, sender.backlog) if controller is not None else args.send_rate
+            if send_rate > 0:
+                due = now_wall >= next_send
+            else:
+                due = sender.backlog < args.concurrency
+            if due and len(swarm):
+                snap = swarm.snapshot(now)
+                step = len(snap) if args.batch_size <= 0 else args.batch_size
+                for lo in range(0, len(snap), step):
+                    part = snap.take(slice(lo, lo + step))
+                    sender.submit(encode(part), items=len(part))
+                targets_submitted += len(snap)
+                next_send = max(next_send + 1.0 / send_rate, now_wall) if send_rate > 0 else now_wall
+
+            if next_report is not None and now_wall >= next_report:
+                st = sender.stats()
+                rate = f" rate={send_rate:.1f}/s" if controller is not None else ""
+                print(f"[{elapsed:6.1f}s] live={len(swarm)} sent={st['sent']} failed={st['failed']} "
+                      f"dropped={st['dropped']} p99={st['latency_p99_ms']} ms{rate}", file=sys.stderr)
+                next_report += args.report_interval
+
+            if send_rate > 0:
+                time.sleep(max(0.0, min(next_send, start + args.duration) - time.perf_counter()))
+            else:
+                time.sleep(0.0005)
+
+        # let in-flight requests finish so the report counts them
+        drain_until = time.perf_counter() + args.drain_timeout
+        while sender.backlog and time.perf_counter() < drain_until:
+            time.sleep(0.01)
+    finally:
+        sender.stop(timeout=args.timeout)
+    wall = time.perf_counter() - start
+
+    st = sender.stats()
+    return {
+        "endpoint": args.endpoint,
+        "duration_s": round(wall, 3),
+        "scenario": args.scenario,
+        "targets_goal": args.targets,
+        "targets_spawned": counter,
+        "targets_live_end": len(swarm),
+        "batch_size": args.batch_size,
+        "send_rate": args.send_rate,
+        "concurrency": args.concurrency,
+        "gzip": args.gzip,
+        "format": args.format,
+        "messages_submitted": st["submitted"],
+        "messages_sent": st["sent"],
+        "messages_failed": st["failed"],
+        "messages_dropped": st["dropped"],
+        "messages_per_s": round(st["sent"] / wall, 2),
+        "targets_submitted": targets_submitted,
+        "targets_sent": st["items_sent"],
+        # delivered targets only; payloads dropped by the latest-wins queue or failed don't count
+        "targets_per_s": round(st["items_sent"] / wall, 2),
+        "bytes_per_s": round(st["bytes_sent"] / wall, 1),
+        "latency_p50_ms": st["latency_p50_ms"],
+        "latency_p95_ms": st["latency_p95_ms"],
+        "latency_p99_ms": st["latency_p99_ms"],
+        "last_error": st["last_error"],
+        "aimd": st.get("aimd"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", type=int, default=1000, help="live targets to maintain")
+    parser.add_argument("--spawn-rate", type=float, default=0.0, help="targets spawned per second (0 = all at once)")
+    parser.add_argument("--lifetime", default="fixed:300", help="fixed:S | uniform:A,B | exp:MEAN (seconds)")
+    parser.add_argument("--send-rate", type=float, default=10.0, help="snapshots sent per second (0 = as fast as possible)")
+    parser.add_argument("--batch-size", type=int, default=0, help="targets per POST (0 = whole snapshot in one POST)")
+    parser.add_argument("--endpoint", default="http://localhost:5000/api/TARGET")
+    parser.add_argument("--api-key", default="")
+    parser.add_argument("--concurrency", type=int, default=4, help="sender workers / connections")
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--gzip", action="store_true", help="gzip request bodies")
+    parser.add_argument("--format", choices=sorted(CONTENT_TYPES), default="json",
+                        help="body format; ndjson/binary are for /api/TARGET/bulk")
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--drain-timeout", type=float, default=5.0)
+    parser.add_argument("--report-interval", type=float, default=1.0, help="progress lines on stderr (0 = off)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--adaptive", action="store_true",
+                        help="AIMD send rate starting at --send-rate, backing off on latency/errors")
+    parser.add_argument("--aimd-target-ms", type=float, default=250.0, help="p90 POST latency to stay under")
+    parser.add_argument("--aimd-min-rate", type=float, default=0.5)
+    parser.add_argument("--aimd-max-rate", type=float, default=0.0, help="0 = 10x --send-rate")
+    parser.add_argument("--scenario", default=None, help="scenario file (JSON/YAML) replacing --targets/--spawn-rate")
+    args = parser.parse_args(argv)
+    try:
+        parse_lifetime(args.lifetime)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if args.adaptive and args.send_rate <= 0:
+        parser.error("--adaptive needs a starting --send-rate > 0")
+
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
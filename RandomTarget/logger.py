@@ -1,81 +1,144 @@
-import json
-import os
 import time
 from . import config
+from .dead_reckoning import DeadReckoningFilter
+from .sender import AimdController, HttpSender
+from .shm_snapshot import SnapshotPublisher
+from .sinks import SinkPipeline, FileSink, NdjsonSink, HttpSink, UdpSink, StdoutSink, ArchiveSink
+
+# publish filter for PUBLISH_MODE == "dead_reckoning"; its counters are shown in the UI
+dr_filter = DeadReckoningFilter(config.DR_THRESHOLD, config.DR_MAX_STALENESS)
+
+# sender stage for the endpoint sink; rebuilt when the endpoint settings change
+sender = None
+
+# POST rate controller for SEND_ADAPTIVE; its rate is shown in the UI
+rate_controller = AimdController(initial_rate=1.0 / max(0.01, config.JSON_WRITE_RATE))
+
+
+def _get_sender():
+    """Return a running HttpSender matching the current endpoint settings."""
+    global sender
+    key = (config.ENDPOINT_URL, config.ENDPOINT_API_KEY, config.SEND_CONCURRENCY,
+           config.SEND_QUEUE_SIZE, config.SEND_GZIP, config.SEND_TIMEOUT)
+    if sender is None or getattr(sender, "settings", None) != key:
+        if sender is not None:
+            sender.stop(timeout=0.5)
+            sender = None
+        new_sender = HttpSender(config.ENDPOINT_URL, api_key=config.ENDPOINT_API_KEY,
+                                concurrency=config.SEND_CONCURRENCY, queue_size=config.SEND_QUEUE_SIZE,
+                                gzip_body=config.SEND_GZIP, timeout=config.SEND_TIMEOUT)
+        new_sender.settings = key
+        new_sender.controller = rate_controller
+        sender = new_sender.start()
+    return sender
+
+
+# fan-out sinks fed by json_logger_task; their stats are shown in the UI
+pipeline = None
+
+
+def _build_pipeline():
+    def opts(name):
+        cfg = config.SINKS.get(name, {})
+        return {"queue_size": cfg.get("queue", 4), "enabled": False}
+
+    return SinkPipeline([
+        FileSink([config.JSON_FILENAME, config.TEST_JSON_FILENAME], **opts("file")),
+        NdjsonSink(config.LOG_DIR, fmt=config.LOG_FORMAT, segment_bytes=config.LOG_SEGMENT_BYTES,
+                   fsync_interval=config.LOG_FSYNC_INTERVAL, **opts("ndjson")),
+        HttpSink(_get_sender, **opts("http")),
+        UdpSink(config.UDP_HOST, config.UDP_PORT, max_datagram=config.UDP_MAX_DATAGRAM, fmt=config.UDP_FORMAT,
+                multicast_ttl=config.UDP_MULTICAST_TTL, **opts("udp")),
+        StdoutSink(**opts("stdout")),
+        ArchiveSink(config.ARCHIVE_DIR, chunk_frames=config.ARCHIVE_CHUNK_FRAMES, **opts("archive")),
+    ])
+
+
+def _apply_sink_settings(pipe):
+    """Copy the (mutable) config values onto the sinks before each tick."""
+    stream = config.LOG_MODE == "stream"
+    for name, sink in pipe.sinks.items():
+        cfg = config.SINKS.get(name, {})
+        sink.enabled = bool(cfg.get("enabled", False))
+        sink.interval = cfg.get("interval") or 0.0
+
+    file_sink = pipe["file"]
+    file_sink.rewrite = not stream
+    if stream and config.SINKS["file"].get("interval") is None:
+        file_sink.interval = config.SNAPSHOT_INTERVAL
+        file_sink.enabled = file_sink.enabled and bool(config.SNAPSHOT_INTERVAL)
+
+    log_sink = pipe["ndjson"]
+    log_sink.enabled = log_sink.enabled and stream
+    log_sink.fmt = config.LOG_FORMAT
+    log_sink.fsync_interval = config.LOG_FSYNC_INTERVAL
+
+    udp_sink = pipe["udp"]
+    udp_sink.fmt = config.UDP_FORMAT
+    udp_sink.max_datagram = config.UDP_MAX_DATAGRAM
+
+    http_sink = pipe["http"]
+    http_sink.enabled = http_sink.enabled and bool(config.SEND_TO_ENDPOINT and config.ENDPOINT_URL)
+    if config.PUBLISH_MODE == "dead_reckoning":
+        dr_filter.threshold = config.DR_THRESHOLD
+        dr_filter.max_staleness = config.DR_MAX_STALENESS
+        http_sink.dr_filter = dr_filter
+    else:
+        http_sink.dr_filter = None
+    if config.SEND_ADAPTIVE and http_sink.enabled:
+        http_sink.interval = _adaptive_interval()
+
+
+def _adaptive_interval():
+    """Advance the AIMD controller and turn its rate into an http sink interval."""
+    rc = rate_controller
+    tick_rate = 1.0 / max(0.01, config.JSON_WRITE_RATE)
+    rc.target_latency = config.AIMD_TARGET_LATENCY
+    rc.min_rate = config.AIMD_MIN_RATE
+    rc.max_rate = config.AIMD_MAX_RATE or tick_rate
+    rc.increase = config.AIMD_INCREASE
+    rc.decrease = config.AIMD_DECREASE
+    rc.max_error_ratio = config.AIMD_MAX_ERROR_RATIO
+    rc.period = config.AIMD_PERIOD
+    rate = rc.update(time.monotonic(), sender.backlog if sender is not None else 0)
+    # the logger can't post faster than it ticks; 0 keeps tick jitter from skipping ticks
+    return 0.0 if rate >= tick_rate * 0.999 else 1.0 / rate
 
-# try to use requests if installed, otherwise fallback to urllib
-try:
-    import requests  # type: ignore
-    HAS_REQUESTS = True
-except Exception:
-    import urllib.request as _urllib_request  # type: ignore
-    import urllib.error as _urllib_error  # type: ignore
-    HAS_REQUESTS = False
 
 def json_logger_task():
-    """Collect snapshots of all targets and write JSON periodically (no TMP files)."""
+    """Take one snapshot per JSON_WRITE_RATE tick and fan it out to the sinks.
+
+    The snapshot is published to shared memory inline, then offered to every
+    sink; each sink writes on its own thread at its own cadence (see
+    config.SINKS), so a slow sink never delays the others.
+    """
+    global pipeline
     print("JSON Logger thread started.")
+    publisher = None
+    pipeline = _build_pipeline()
     while not config.stop_threads_event.is_set():
-        current_data_snapshot = []
-
+        # copy the swarm arrays under the lock; sinks build dicts on their own threads
         with config.targets_lock:
-            for target in config.active_targets:
-                current_data_snapshot.append({
-                    "id": target.target_id,
-                    "timestamp": time.time(),
-                    "position": {"north": target.north, "east": target.east, "down": target.down},
-                    "velocity": {"vn": target.vn, "ve": target.ve, "vd": target.vd}
-                })
-
-        # write directly (no temp file). flush+fsync to reduce partial-write window.
-        try:
-            with open(config.JSON_FILENAME, "w", encoding="utf-8") as f:
-                json.dump(current_data_snapshot, f, indent=2, ensure_ascii=False)
-                f.flush()
-                try:
-                    os.fsync(f.fileno())
-                except Exception:
-                    pass
-        except Exception as e:
-            print(f"Error writing JSON: {e}")
-
-        # Also write a secondary copy into the Random_test folder for test harnesses
-        try:
-            test_path = config.TEST_JSON_FILENAME
-            test_dir = os.path.dirname(test_path)
-            if test_dir and not os.path.exists(test_dir):
-                os.makedirs(test_dir, exist_ok=True)
-            with open(test_path, "w", encoding="utf-8") as tf:
-                json.dump(current_data_snapshot, tf, indent=2, ensure_ascii=False)
-                tf.flush()
-                try:
-                    os.fsync(tf.fileno())
-                except Exception:
-                    pass
-        except Exception as e:
-            # non-fatal
-            print(f"Error writing test JSON: {e}")
-
-        # optionally POST the JSON to the configured endpoint (REST API)
-        if config.SEND_TO_ENDPOINT and config.ENDPOINT_URL:
+            snap = config.swarm.snapshot()
+
+        # publish to shared memory first: local readers see it without any file I/O
+        if config.SHM_ENABLED:
             try:
-                headers = {"Content-Type": "application/json"}
-                if config.ENDPOINT_API_KEY:
-                    headers["Authorization"] = f"Bearer {config.ENDPOINT_API_KEY}"
-
-                if HAS_REQUESTS:
-                    resp = requests.post(config.ENDPOINT_URL, json=current_data_snapshot, headers=headers, timeout=5.0)
-                    if resp.status_code >= 400:
-                        print(f"Endpoint POST failed: {resp.status_code} {resp.text}")
-                else:
-                    data_bytes = json.dumps(current_data_snapshot).encode("utf-8")
-                    req = _urllib_request.Request(config.ENDPOINT_URL, data=data_bytes, headers=headers, method="POST")
-                    with _urllib_request.urlopen(req, timeout=5.0) as resp:
-                        _ = resp.read()
+                if publisher is None:
+                    publisher = SnapshotPublisher(config.SHM_NAME, config.SHM_CAPACITY)
+                publisher.publish(snap)
             except Exception as e:
-                print(f"Error POSTing to endpoint: {e}")
+                print(f"Error publishing shared-memory snapshot: {e}")
+
+        _apply_sink_settings(pipeline)
+        pipeline.offer(snap)
 
         # sleep using the (mutable) config value
         sleep_time = max(0.01, config.JSON_WRITE_RATE)
         time.sleep(sleep_time)
-    print("JSON Logger thread stopped.")
\ No newline at end of file
+    pipeline.stop()
+    if sender is not None:
+        sender.stop()
+    if publisher is not None:
+        publisher.close()
+    print("JSON Logger thread stopped.")
@@ -0,0 +1,261 @@
+"""Retained-mode map renderer for the UI canvas (East right, North up).
+
+Canvas items are created once per target and afterwards only moved or
+restyled; the grid is rebuilt only when the step-quantized view bounds or
+the canvas size change. Above `lod_threshold` targets the map switches to a
+level-of-detail view: targets are binned into screen cells and drawn as one
+dot per occupied cell, without labels, velocity lines or trails.
+"""
+import math
+import tkinter as tk
+
+import numpy as np
+
+# blue (shallow) to red (deep) ramp, same colors as the old per-target formula
+_LEVELS = 32
+_PALETTE = [
+    f"#{int(50 + k / (_LEVELS - 1) * 200):02x}{int(80 - k / (_LEVELS - 1) * 60):02x}{int(200 - k / (_LEVELS - 1) * 200):02x}"
+    for k in range(_LEVELS)
+]
+
+
+def _depth_color(norm_d):
+    return _PALETTE[int(norm_d * (_LEVELS - 1) + 0.5)]
+
+
+def _nice_step(span, divisions=5):
+    """Smallest 1/2/5 x 10^k step giving at most `divisions` grid cells."""
+    raw = max(span / divisions, 1e-9)
+    mag = 10.0 ** math.floor(math.log10(raw))
+    for m in (1.0, 2.0, 5.0, 10.0):
+        if m * mag >= raw:
+            return m * mag
+    return 10.0 * mag
+
+
+class _Trail:
+    """Fixed-size ring buffer of (east, north) world positions."""
+
+    __slots__ = ("buf", "head", "count", "last_t")
+
+    def __init__(self, size):
+        self.buf = np.empty((size, 2))
+        self.head = 0
+        self.count = 0
+        self.last_t = None
+
+    def push(self, east, north, t):
+        self.buf[self.head] = (east, north)
+        self.head = (self.head + 1) % len(self.buf)
+        self.count = min(self.count + 1, len(self.buf))
+        self.last_t = t
+
+    def points(self):
+        """Positions oldest first."""
+        if self.count < len(self.buf):
+            return self.buf[:self.count]
+        return np.concatenate((self.buf[self.head:], self.buf[:self.head]))
+
+
+class MapRenderer:
+    """Draws swarm Snapshots onto a tk.Canvas, reusing items between frames."""
+
+    def __init__(self, canvas, padding=20, trail_max=30, trail_interval=0.25, lod_threshold=200, cell_px=8):
+        self.canvas = canvas
+        self.padding = padding
+        self.trail_max = trail_max
+        self.trail_interval = trail_interval     # seconds between trail samples
+        self.lod_threshold = lod_threshold
+        self.cell_px = cell_px
+        self.items = {}         # target id -> [circle, hline, vline, text, trail, color, label]
+        self.trails = {}        # target id -> _Trail
+        self.dots = []          # LOD dot items, reused in order
+        self.dot_state = []     # last (x, y, r, color) per dot, None when hidden
+        self.lod_text = None
+        self.lod = False
+        self._view = None       # (bounds, w, h) the grid was drawn for
+
+    # ---------- view / grid ----------
+    def _bounds(self, pos):
+        if len(pos):
+            min_n, min_e = pos[:, 0].min(), pos[:, 1].min()
+            max_n, max_e = pos[:, 0].max(), pos[:, 1].max()
+            # if single or near-single, expand view to show motion
+            if max_n - min_n < 50.0:
+                min_n, max_n = min_n - 25.0, max_n + 25.0
+            if max_e - min_e < 50.0:
+                min_e, max_e = min_e - 25.0, max_e + 25.0
+        else:
+            min_n, max_n, min_e, max_e = -500.0, 500.0, -500.0, 500.0
+        # snap outwards to whole grid steps so the view only changes when a
+        # target crosses a grid line, not on every frame
+        step_e = _nice_step(max_e - min_e)
+        step_n = _nice_step(max_n - min_n)
+        return (math.floor(min_e / step_e) * step_e, math.ceil(max_e / step_e) * step_e, step_e,
+                math.floor(min_n / step_n) * step_n, math.ceil(max_n / step_n) * step_n, step_n)
+
+    def _draw_grid(self, bounds, w, h):
+        c, pad = self.canvas, self.padding
+        min_e, max_e, step_e, min_n, max_n, step_n = bounds
+        c.delete("grid")
+        c.create_rectangle(pad, pad, w - pad, h - pad, outline="#cccccc", width=1, tags="grid")
+        k = 0
+        while min_e + k * step_e <= max_e + 1e-9:
+            x = pad + (k * step_e / (max_e - min_e)) * (w - 2 * pad)
+            c.create_line(x, pad, x, h - pad, fill="#e0e0e0", dash=(2, 2), tags="grid")
+            k += 1
+        k = 0
+        while min_n + k * step_n <= max_n + 1e-9:
+            y = pad + (k * step_n / (max_n - min_n)) * (h - 2 * pad)
+            c.create_line(pad, y, w - pad, y, fill="#e0e0e0", dash=(2, 2), tags="grid")
+            k += 1
+        # axis labels (cardinal directions)
+        c.create_text(w - pad - 5, h - pad - 2, text="E", anchor=tk.SE, font=("Arial", 7, "bold"), fill="#333333", tags="grid")
+        c.create_text(pad + 5, pad + 3, text="N", anchor=tk.NW, font=("Arial", 7, "bold"), fill="#333333", tags="grid")
+        # origin reference cross (if visible)
+        if min_e <= 0 <= max_e:
+            x = pad + (-min_e / (max_e - min_e)) * (w - 2 * pad)
+            c.create_line(x, pad, x, h - pad, fill="#ffcccc", width=1, dash=(1, 2), tags="grid")
+        if min_n <= 0 <= max_n:
+            y = pad + (max_n / (max_n - min_n)) * (h - 2 * pad)
+            c.create_line(pad, y, w - pad, y, fill="#ffcccc", width=1, dash=(1, 2), tags="grid")
+        c.tag_lower("grid")
+
+    # ---------- frame ----------
+    def render(self, snap):
+        c, pad = self.canvas, self.padding
+        w = max(200, c.winfo_width() or 200)
+        h = max(200, c.winfo_height() or 200)
+        pos = snap.pos
+        bounds = self._bounds(pos)
+        if (bounds, w, h) != self._view:
+            self._draw_grid(bounds, w, h)
+            self._view = (bounds, w, h)
+
+        min_e, max_e, _, min_n, max_n, _ = bounds
+        sx = (w - 2 * pad) / (max_e - min_e)
+        sy = (h - 2 * pad) / (max_n - min_n)
+        xs = pad + (pos[:, 1] - min_e) * sx
+        ys = pad + (max_n - pos[:, 0]) * sy
+
+        # depth bounds once per frame; normalized 0 (shallow) .. 1 (deep)
+        if len(pos):
+            min_d, max_d = pos[:, 2].min(), pos[:, 2].max()
+            norm = np.clip((pos[:, 2] - min_d) / max(1.0, (max_d - min_d) or 1.0), 0.0, 1.0)
+        else:
+            norm = np.zeros(0)
+
+        if len(snap) > self.lod_threshold:
+            if not self.lod:
+                self._clear_detail()
+                self.lod = True
+            self._render_lod(len(snap), xs, ys, norm, w, h)
+        else:
+            if self.lod:
+                self._clear_lod()
+                self.lod = False
+            self._render_detail(snap, xs, ys, norm, (min_e, max_n, sx, sy, max_e - min_e, max_n - min_n))
+
+    def _render_detail(self, snap, xs, ys, norm, transform):
+        c, pad = self.canvas, self.padding
+        min_e, max_n, sx, sy, rng_e, rng_n = transform
+        ids = snap.ids.tolist()
+        live = set(ids)
+        for tid in [tid for tid in self.items if tid not in live]:
+            c.delete(*self.items.pop(tid)[:5])
+            self.trails.pop(tid, None)
+
+        for tid, x, y, nd, (n, e, d), (vn, ve, vd) in zip(
+                ids, xs.tolist(), ys.tolist(), norm.tolist(), snap.pos.tolist(), snap.vel.tolist()):
+            r = 4 + int(nd * 10)
+            color = _depth_color(nd)
+            # horizontal velocity line and clamped vertical velocity indicator
+            x2 = x + (ve / rng_e) * 60.0
+            y2 = y - (vn / rng_n) * 60.0
+            vy1 = y - r - 4
+            vy2 = vy1 + max(-20.0, min(20.0, vd * 6.0))
+
+            # trail: world positions sampled every trail_interval, plus the current point
+            trail = self.trails.get(tid)
+            if trail is None:
+                trail = self.trails[tid] = _Trail(self.trail_max)
+            if trail.last_t is None or snap.t - trail.last_t >= self.trail_interval:
+                trail.push(e, n, snap.t)
+            pts = trail.points()
+            tpts = np.column_stack((pad + (pts[:, 0] - min_e) * sx, pad + (max_n - pts[:, 1]) * sy)).ravel().tolist()
+            tpts += (x, y)
+
+            speed = math.sqrt(vn * vn + ve * ve + vd * vd)
+            label = f"{tid} {speed:.1f}m/s D={d:.1f}m"
+            entry = self.items.get(tid)
+            if entry is None:
+                trail_item = c.create_line(*tpts, fill=color, width=1)
+                circ = c.create_oval(x - r, y - r, x + r, y + r, fill=color, outline="#1a1a1a", width=1)
+                hline = c.create_line(x, y, x2, y2, fill="#666666", width=1)
+                vline = c.create_line(x, vy1, x, vy2, fill="#000000", width=1)
+                text = c.create_text(x + r + 2, y - r - 2, text=label, anchor=tk.NW, font=("Arial", 8, "bold"), fill="#000000")
+                self.items[tid] = [circ, hline, vline, text, trail_item, color, label]
+                continue
+            circ, hline, vline, text, trail_item, old_color, old_label = entry
+            c.coords(circ, x - r, y - r, x + r, y + r)
+            c.coords(hline, x, y, x2, y2)
+            c.coords(vline, x, vy1, x, vy2)
+            c.coords(text, x + r + 2, y - r - 2)
+            c.coords(trail_item, *tpts)
+            if color != old_color:
+                c.itemconfigure(circ, fill=color)
+                c.itemconfigure(trail_item, fill=color)
+                entry[5] = color
+            if label != old_label:
+                c.itemconfigure(text, text=label)
+                entry[6] = label
+
+    def _render_lod(self, count, xs, ys, norm, w, h):
+        c, cell = self.canvas, self.cell_px
+        ncols = w // cell + 1
+        key = (ys // cell).astype(np.int64) * ncols + (xs // cell).astype(np.int64)
+        cells, inv, counts = np.unique(key, return_inverse=True, return_counts=True)
+        depth = np.bincount(inv, weights=norm) / counts
+        cx = ((cells % ncols) + 0.5) * cell
+        cy = ((cells // ncols) + 0.5) * cell
+        radius = np.minimum(cell / 2.0, 1.5 + 0.75 * np.log2(counts))
+
+        m = len(cells)
+        while len(self.dots) < m:
+            self.dots.append(c.create_oval(0, 0, 0, 0, outline="", state=tk.HIDDEN, tags="lod"))
+            self.dot_state.append(None)
+        for i, (x, y, r, d) in enumerate(zip(cx.tolist(), cy.tolist(), radius.tolist(), depth.tolist())):
+            state = (x, y, r, _depth_color(d))
+            old = self.dot_state[i]
+            if state == old:
+                continue
+            item = self.dots[i]
+            if old is None or old[:3] != state[:3]:
+                c.coords(item, x - r, y - r, x + r, y + r)
+            if old is None or old[3] != state[3]:
+                c.itemconfigure(item, fill=state[3])
+            if old is None:
+                c.itemconfigure(item, state=tk.NORMAL)
+            self.dot_state[i] = state
+        for i in range(m, len(self.dots)):
+            if self.dot_state[i] is not None:
+                c.itemconfigure(self.dots[i], state=tk.HIDDEN)
+                self.dot_state[i] = None
+
+        text = f"{count} targets (clustered, {m} cells)"
+        if self.lod_text is None:
+            self.lod_text = c.create_text(w - self.padding - 4, self.padding + 3, text=text, anchor=tk.NE,
+                                          font=("Arial", 7), fill="#333333", tags="lod")
+        else:
+            c.coords(self.lod_text, w - self.padding - 4, self.padding + 3)
+            c.itemconfigure(self.lod_text, text=text)
+
+    def _clear_detail(self):
+        for entry in self.items.values():
+            self.canvas.delete(*entry[:5])
+        self.items.clear()
+        self.trails.clear()
+
+    def _clear_lod(self):
+        self.canvas.delete("lod")
+        self.dots, self.dot_state, self.lod_text = [], [], None
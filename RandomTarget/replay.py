@@ -0,0 +1,220 @@
+"""Replay a recorded target archive (archive.py) into a receiver at N x speed.
+
+Frames are sent on an absolute schedule (archive start + offset / speed,
+measured with perf_counter), so pacing errors never accumulate over a long
+replay; the report includes how late frames were handed to the sender.
+Nothing is dropped: when the sender falls behind, replay waits for it and
+the lateness shows up in the report instead.
+
+    python RandomTarget/replay.py recording.rta --speed 10 \\
+        --target bmc --endpoint http://localhost:5000/api/TARGET
+    python RandomTarget/replay.py recording.rta --speed 0 \\
+        --target mmc --endpoint http://127.0.0.1:4000/bmc/target
+
+--target bmc posts the BMC batch format (list of {"id", "timestamp",
+"position", "velocity"}) and also works against server_local.py; --target
+mmc posts one MMC TargetMessage (integer target_id, flat NED fields) per
+record. --speed 0 replays as fast as the receiver accepts.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+if __package__ is None or __package__ == "":
+    parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+
+from RandomTarget.archive import ArchiveReader
+from RandomTarget.sender import HttpSender, percentile
+
+DEFAULT_ENDPOINTS = {
+    "bmc": "http://localhost:5000/api/TARGET",
+    "mmc": os.environ.get("MMC_BASE_URL", "http://127.0.0.1:4000").rstrip("/") + "/bmc/target",
+}
+
+
+class MmcIds:
+    """Stable mapping from recorded string ids to MMC integer target ids.
+
+    Uses the trailing number of the id when it is free ("T-17" -> 17), else
+    the next unused integer.
+    """
+
+    _DIGITS = re.compile(r"(\d+)$")
+
+    def __init__(self):
+        self.ids = {}
+        self.used = set()
+        self.next_id = 1
+
+    def __call__(self, tid):
+        out = self.ids.get(tid)
+        if out is None:
+            m = self._DIGITS.search(tid)
+            out = int(m.group(1)) if m else None
+            if out is None or out in self.used:
+                while self.next_id in self.used:
+                    self.next_id += 1
+                out = self.next_id
+            self.ids[tid] = out
+            self.used.add(out)
+        return out
+
+
+def bmc_records(ids, pos, vel, ts):
+    return [
+        {"id": tid, "timestamp": ts,
+         "position": {"north": n, "east": e, "down": d},
+         "velocity": {"vn": vn, "ve": ve, "vd": vd}}
+        for tid, (n, e, d), (vn, ve, vd) in zip(ids, pos.tolist(), vel.tolist())
+    ]
+
+
+def mmc_messages(ids, pos, vel, map_id):
+    return [
+        {"target_id": map_id(tid),
+         "position_north": n, "position_east": e, "position_down": d,
+         "velocity_north": vn, "velocity_east": ve, "velocity_down": vd}
+        for tid, (n, e, d), (vn, ve, vd) in zip(ids, pos.tolist(), vel.tolist())
+    ]
+
+
+def _wait_until(deadline, spin=0.002):
+    """Sleep to within `spin` seconds of a perf_counter deadline, then spin."""
+    while True:
+        left = deadline - time.perf_counter()
+        if left <= 0:
+            return
+        if left > spin:
+            time.sleep(left - spin)
+
+
+def run(args):
+    reader = ArchiveReader(args.archive)
+    if reader.t_start is None:
+        raise SystemExit(f"{args.archive} holds no frames")
+    t0 = reader.t_start + args.start
+    t1 = None if args.end is None else reader.t_start + args.end
+    endpoint = args.endpoint or DEFAULT_ENDPOINTS[args.target]
+    sender = HttpSender(endpoint, api_key=args.api_key, concurrency=args.concurrency,
+                        queue_size=args.queue_size, gzip_body=args.gzip, timeout=args.timeout).start()
+    map_id = MmcIds()
+
+    frames = records = 0
+    late = []
+    start = time.perf_counter()
+    wall0 = time.time()
+    next_report = start + args.report_interval if args.report_interval > 0 else None
+    try:
+        for loop in range(args.loop):
+            base = start if loop == 0 else time.perf_counter()
+            wall_base = wall0 + (base - start)
+            for t, ids, pos, vel in reader.frames(t0, t1):
+                offset = t - t0
+                if args.speed > 0:
+                    due = base + offset / args.speed
+                    _wait_until(due)
+                    ts = wall_base + offset / args.speed
+                else:
+                    due = None
+                    ts = time.time()
+                if args.keep_timestamps:
+                    ts = t
+
+                if args.target == "mmc":
+                    payloads = mmc_messages(ids, pos, vel, map_id)
+                else:
+                    recs = bmc_records(ids, pos, vel, ts)
+                    step = len(recs) if args.batch_size <= 0 else args.batch_size
+                    payloads = [recs[lo:lo + step] for lo in range(0, len(recs), step)]
+                for payload in payloads:
+                    # backpressure instead of the sender's latest-wins dropping
+                    while sender.backlog >= args.queue_size - 1:
+                        time.sleep(0.0002)
+                    sender.submit(payload)
+                if due is not None:
+                    late.append(time.perf_counter() - due)
+                frames += 1
+                records += len(ids)
+
+                now = time.perf_counter()
+                if next_report is not None and now >= next_report:
+                    st = sender.stats()
+                    print(f"[{now - start:6.1f}s] frames={frames} replay_t={offset:.1f}s sent={st['sent']} "
+                          f"failed={st['failed']} p99={st['latency_p99_ms']} ms", file=sys.stderr)
+                    next_report += args.report_interval
+
+        drain_until = time.perf_counter() + args.drain_timeout
+        while sender.backlog and time.perf_counter() < drain_until:
+            time.sleep(0.01)
+    finally:
+        sender.stop(timeout=args.timeout)
+        reader.close()
+    wall = time.perf_counter() - start
+
+    st = sender.stats()
+    late.sort()
+    span = (reader.t_end if t1 is None else min(t1, reader.t_end)) - t0
+
+    def ms(v):
+        return None if v is None else round(v * 1000.0, 3)
+
+    return {
+        "archive": args.archive,
+        "endpoint": endpoint,
+        "target": args.target,
+        "speed": args.speed or "max",
+        "loops": args.loop,
+        "recorded_span_s": round(span, 3),
+        "duration_s": round(wall, 3),
+        "effective_speed": round(span * args.loop / wall, 2) if wall > 0 else None,
+        "frames": frames,
+        "records": records,
+        "messages_sent": st["sent"],
+        "messages_failed": st["failed"],
+        "messages_per_s": round(st["sent"] / wall, 2),
+        "records_per_s": round(records / wall, 2),
+        "bytes_per_s": round(st["bytes_sent"] / wall, 1),
+        "pacing_late_p50_ms": ms(percentile(late, 50)),
+        "pacing_late_p99_ms": ms(percentile(late, 99)),
+        "pacing_late_max_ms": ms(late[-1] if late else None),
+        "latency_p50_ms": st["latency_p50_ms"],
+        "latency_p99_ms": st["latency_p99_ms"],
+        "last_error": st["last_error"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archive", help=".rta archive (archive.py import, or the archive sink)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor (0 = as fast as possible)")
+    parser.add_argument("--target", choices=("bmc", "mmc"), default="bmc", help="payload format")
+    parser.add_argument("--endpoint", default=None, help="URL (default depends on --target)")
+    parser.add_argument("--start", type=float, default=0.0, help="seconds into the recording to start at")
+    parser.add_argument("--end", type=float, default=None, help="seconds into the recording to stop at")
+    parser.add_argument("--loop", type=int, default=1, help="replay the range this many times")
+    parser.add_argument("--keep-timestamps", action="store_true",
+                        help="send recorded timestamps instead of replay wall-clock times (bmc)")
+    parser.add_argument("--batch-size", type=int, default=0, help="records per BMC POST (0 = whole frame)")
+    parser.add_argument("--api-key", default="")
+    parser.add_argument("--concurrency", type=int, default=4, help="sender workers / connections")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--gzip", action="store_true", help="gzip request bodies")
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--drain-timeout", type=float, default=5.0)
+    parser.add_argument("--report-interval", type=float, default=1.0, help="progress lines on stderr (0 = off)")
+    args = parser.parse_args(argv)
+    if args.speed < 0:
+        parser.error("--speed must be >= 0")
+    if args.queue_size < 2:
+        parser.error("--queue-size must be >= 2")
+
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Scenario files: reproducible bulk spawning of target waves.
+
+A scenario (JSON, or YAML when PyYAML is installed) lists waves. Each wave is
+materialized in one vectorized allocation from a seeded RNG and spawned into
+the swarm when its time comes:
+
+    {
+      "seed": 42,
+      "waves": [
+        {"name": "raid", "at": 0, "count": 10000, "lifetime": 120,
+         "formation": {"type": "box", "center": [3000, 0, 300], "size": [400, 400, 50]},
+         "velocity": {"toward": [0, 0, 0], "speed": {"uniform": [40, 60]}}},
+        {"name": "probe", "at": 20, "repeat": 3, "interval": 10,
+         "count": {"poisson": 50},
+         "formation": {"type": "wedge", "center": [0, -2000, 100], "spacing": 30, "heading_deg": 90},
+         "velocity": {"heading_deg": 90, "speed": 35}}
+      ]
+    }
+
+Numbers anywhere a distribution is accepted may also be given as
+{"uniform": [lo, hi]}, {"normal": [mean, std]} or {"exp": mean}; counts also
+accept {"poisson": mean}. Formations: random, box, line, circle, wedge.
+Velocity: {"heading_deg", "speed", "vd"} or {"toward": [n, e, d], "speed"};
+omitted velocity uses the same uniform ranges as interactive targets.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+try:
+    import yaml  # type: ignore
+    HAS_YAML = True
+except Exception:
+    HAS_YAML = False
+
+FORMATIONS = ("random", "box", "line", "circle", "wedge")
+
+
+def _draw(spec, rng, k, what):
+    """Draw k floats from a number or a distribution spec."""
+    if isinstance(spec, (int, float)):
+        return np.full(k, float(spec))
+    if isinstance(spec, dict) and len(spec) == 1:
+        (kind, args), = spec.items()
+        if kind == "uniform":
+            return rng.uniform(args[0], args[1], k)
+        if kind == "normal":
+            return rng.normal(args[0], args[1], k)
+        if kind == "exp":
+            return rng.exponential(args, k)
+    raise ValueError(f"Invalid {what}: {spec!r}")
+
+
+def _draw_count(spec, rng):
+    if isinstance(spec, int):
+        return spec
+    if isinstance(spec, dict) and len(spec) == 1:
+        (kind, args), = spec.items()
+        if kind == "poisson":
+            return int(rng.poisson(args))
+        if kind == "uniform":
+            return int(rng.integers(args[0], args[1], endpoint=True))
+        if kind == "normal":
+            return max(0, int(round(rng.normal(args[0], args[1]))))
+    raise ValueError(f"Invalid count: {spec!r}")
+
+
+def _formation(spec, rng, k):
+    """Return (k, 3) NED positions for a formation spec."""
+    kind = spec.get("type", "random")
+    center = np.asarray(spec.get("center", [0.0, 0.0, 0.0]), dtype=float)
+    if kind == "random":
+        pos = np.column_stack((
+            rng.uniform(-500, 500, k),
+            rng.uniform(-500, 500, k),
+            rng.uniform(0, 500, k),
+        ))
+        return pos + center
+    if kind == "box":
+        half = np.asarray(spec.get("size", [100.0, 100.0, 0.0]), dtype=float) / 2.0
+        return center + rng.uniform(-half, half, (k, 3))
+    if kind == "circle":
+        radius = float(spec.get("radius", 100.0))
+        ang = np.linspace(0.0, 2.0 * np.pi, k, endpoint=False)
+        off = np.column_stack((radius * np.cos(ang), radius * np.sin(ang), np.zeros(k)))
+    elif kind == "line":
+        length = float(spec.get("length", 100.0))
+        b = np.radians(float(spec.get("bearing_deg", 90.0)))
+        s = np.linspace(-length / 2.0, length / 2.0, k) if k > 1 else np.zeros(k)
+        off = np.column_stack((s * np.cos(b), s * np.sin(b), np.zeros(k)))
+    elif kind == "wedge":
+        spacing = float(spec.get("spacing", 20.0))
+        h = np.radians(float(spec.get("heading_deg", 0.0)))
+        i = np.arange(k)
+        rank = (i + 1) // 2
+        side = np.where(i % 2 == 1, 1.0, -1.0)
+        back, lateral = -rank * spacing, side * rank * spacing
+        # rotate (forward, right) into (north, east)
+        off = np.column_stack((back * np.cos(h) - lateral * np.sin(h),
+                               back * np.sin(h) + lateral * np.cos(h),
+                               np.zeros(k)))
+    else:
+        raise ValueError(f"Unknown formation type: {kind!r} (expected one of {', '.join(FORMATIONS)})")
+    pos = center + off
+    jitter = float(spec.get("jitter", 0.0))
+    if jitter:
+        pos += rng.normal(0.0, jitter, (k, 3))
+    return pos
+
+
+def _velocity(spec, rng, pos):
+    k = len(pos)
+    if spec is None:
+        return np.column_stack((
+            rng.uniform(-20, 20, k),
+            rng.uniform(-20, 20, k),
+            rng.uniform(-5, 5, k),
+        ))
+    speed = _draw(spec.get("speed", 0.0), rng, k, "speed")
+    vd = _draw(spec.get("vd", 0.0), rng, k, "vd")
+    if "toward" in spec:
+        delta = np.asarray(spec["toward"], dtype=float)[:2] - pos[:, :2]
+        dist = np.linalg.norm(delta, axis=1)
+        dist[dist == 0] = 1.0
+        horiz = delta / dist[:, None] * speed[:, None]
+        return np.column_stack((horiz, vd))
+    h = np.radians(_draw(spec.get("heading_deg", 0.0), rng, k, "heading_deg"))
+    return np.column_stack((speed * np.cos(h), speed * np.sin(h), vd))
+
+
+class Wave:
+    """One scheduled spawn: `count` targets at `at` seconds into the scenario."""
+
+    def __init__(self, spec, index):
+        if not isinstance(spec, dict):
+            raise ValueError(f"Wave {index} must be an object")
+        self.name = str(spec.get("name", f"W{index}"))
+        self.at = float(spec.get("at", 0.0))
+        self.count = spec.get("count", 1)
+        self.repeat = int(spec.get("repeat", 1))
+        self.interval = float(spec.get("interval", 0.0))
+        self.formation = spec.get("formation", {"type": "random"})
+        self.velocity = spec.get("velocity")
+        self.lifetime = spec.get("lifetime")
+        if self.formation.get("type", "random") not in FORMATIONS:
+            raise ValueError(f"Wave {self.name}: unknown formation {self.formation.get('type')!r}")
+
+    def materialize(self, rng):
+        """Draw (count, pos, vel, lifetime) for one occurrence of this wave."""
+        k = _draw_count(self.count, rng)
+        pos = _formation(self.formation, rng, k)
+        vel = _velocity(self.velocity, rng, pos)
+        lifetime = None if self.lifetime is None else _draw(self.lifetime, rng, k, "lifetime")
+        return k, pos, vel, lifetime
+
+
+class Scenario:
+    """Parsed scenario: a seed plus a time-ordered spawn schedule."""
+
+    def __init__(self, spec, name="scenario"):
+        if not isinstance(spec, dict) or not isinstance(spec.get("waves"), list):
+            raise ValueError("Scenario must be an object with a 'waves' list")
+        self.name = name
+        self.seed = spec.get("seed")
+        self.waves = [Wave(w, i) for i, w in enumerate(spec["waves"])]
+        # (time offset, wave, repetition) for every occurrence, in spawn order
+        self.schedule = sorted(
+            ((w.at + r * w.interval, w, r) for w in self.waves for r in range(w.repeat)),
+            key=lambda item: item[0],
+        )
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        if path.lower().endswith((".yaml", ".yml")):
+            if not HAS_YAML:
+                raise RuntimeError("PyYAML is required for YAML scenarios (pip install pyyaml)")
+            spec = yaml.safe_load(text)
+        else:
+            spec = json.loads(text)
+        return cls(spec, name=os.path.splitext(os.path.basename(path))[0])
+
+
+class ScenarioRunner:
+    """Spawns scenario waves into a swarm as their times come due.
+
+    `lock` guards the swarm (config.targets_lock for the UI swarm) and
+    `id_prefix` keeps ids unique when the same scenario is run more than once.
+    """
+
+    def __init__(self, scenario, swarm, lock=None, start_time=None, id_prefix=""):
+        self.scenario = scenario
+        self.id_prefix = id_prefix
+        self.swarm = swarm
+        self.lock = lock
+        self.start_time = time.time() if start_time is None else start_time
+        self.rng = np.random.default_rng(scenario.seed)
+        self._next = 0
+        self.spawned = 0
+
+    @property
+    def done(self):
+        return self._next >= len(self.scenario.schedule)
+
+    def poll(self, now=None):
+        """Spawn every wave due by `now`. Returns the number of targets spawned."""
+        now = time.time() if now is None else now
+        total = 0
+        schedule = self.scenario.schedule
+        while self._next < len(schedule) and self.start_time + schedule[self._next][0] <= now:
+            offset, wave, rep = schedule[self._next]
+            self._next += 1
+            k, pos, vel, lifetime = wave.materialize(self.rng)
+            if k == 0:
+                continue
+            prefix = f"{self.id_prefix}{wave.name}.{rep}-" if wave.repeat > 1 else f"{self.id_prefix}{wave.name}-"
+            ids = [f"{prefix}{i}" for i in range(k)]
+            spawn_time = self.start_time + offset
+            if self.lock is not None:
+                with self.lock:
+                    self.swarm.spawn(ids, pos=pos, vel=vel, now=spawn_time, lifetime=lifetime)
+            else:
+                self.swarm.spawn(ids, pos=pos, vel=vel, now=spawn_time, lifetime=lifetime)
+            total += k
+        self.spawned += total
+        return total
@@ -0,0 +1,307 @@
+"""Dedicated HTTP sender stage for the endpoint sink.
+
+The logger hands payloads to `HttpSender.submit` and never blocks on the
+network. Worker threads each keep one persistent keep-alive connection, pull
+from a small bounded queue (oldest payload is dropped when full, so the
+newest state always wins) and optionally gzip request bodies.
+"""
+import collections
+import gzip
+import http.client
+import json
+import math
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class AimdController:
+    """Additive-increase / multiplicative-decrease POST rate (POSTs per second).
+
+    Sender workers report every response through observe(); the producer calls
+    update() once per tick. Once per `period` the window is judged: if the
+    error ratio exceeds `max_error_ratio`, the p90 latency exceeds
+    `target_latency`, payloads were dropped, or nothing completed while work
+    was queued, the rate is multiplied by `decrease`; otherwise it grows by
+    `increase`. The rate stays within [min_rate, max_rate].
+    """
+
+    def __init__(self, initial_rate=5.0, min_rate=0.5, max_rate=50.0, target_latency=0.25,
+                 increase=1.0, decrease=0.5, max_error_ratio=0.05, period=1.0):
+        self.rate = float(initial_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.max_error_ratio = max_error_ratio
+        self.period = period
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._errors = 0
+        self._drops = 0
+        self._last_update = None
+        self.increases = 0
+        self.decreases = 0
+        self.last_reason = None
+        self.last_p90 = None
+
+    def observe(self, latency, ok):
+        with self._lock:
+            if ok:
+                self._latencies.append(latency)
+            else:
+                self._errors += 1
+
+    def observe_drop(self):
+        with self._lock:
+            self._drops += 1
+
+    def update(self, now, backlog=0):
+        """Judge the last window if a period has passed. Returns the current rate."""
+        if self._last_update is None:
+            self._last_update = now
+        if now - self._last_update < self.period:
+            return self.rate
+        self._last_update = now
+        with self._lock:
+            lat, errors, drops = sorted(self._latencies), self._errors, self._drops
+            self._latencies, self._errors, self._drops = [], 0, 0
+        total = len(lat) + errors
+        self.last_p90 = percentile(lat, 90)
+        if total and errors / total > self.max_error_ratio:
+            reason = "errors"
+        elif self.last_p90 is not None and self.last_p90 > self.target_latency:
+            reason = "latency"
+        elif drops:
+            reason = "dropped"
+        elif not total and backlog:
+            reason = "stalled"
+        else:
+            reason = None
+        if reason is not None:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.decreases += 1
+        elif total:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self.increases += 1
+        self.rate = max(self.min_rate, min(self.max_rate, self.rate))
+        self.last_reason = reason
+        return self.rate
+
+    def stats(self):
+        return {
+            "rate": round(self.rate, 3),
+            "min_rate": self.min_rate,
+            "max_rate": self.max_rate,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "backoff_reason": self.last_reason,
+            "latency_p90_ms": None if self.last_p90 is None else round(self.last_p90 * 1000.0, 3),
+        }
+
+
+class HttpSender:
+    """Pooled, pipelined POST sender with latest-wins dropping.
+
+    When `controller` (an AimdController) is set, every response and dropped
+    payload is reported to it.
+    """
+
+    def __init__(self, url, api_key="", concurrency=2, queue_size=4, gzip_body=False, timeout=5.0,
+                 content_type="application/json"):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported endpoint URL: {url}")
+        self.url = url
+        self.api_key = api_key
+        self.concurrency = max(1, int(concurrency))
+        self.gzip_body = gzip_body
+        self.timeout = timeout
+        self.content_type = content_type
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        self._queue = collections.deque(maxlen=max(1, int(queue_size)))
+        self._cond = threading.Condition()
+        self._stop = False
+        self._workers = []
+
+        self._stats_lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=4096)
+        self.submitted = 0
+        self.sent = 0
+        self.items_sent = 0     # `items` of the payloads delivered (see submit)
+        self.failed = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.last_error = None
+        self._last_print = 0.0
+        self.controller = None
+
+    # ---------- lifecycle ----------
+    def start(self):
+        for i in range(self.concurrency):
+            t = threading.Thread(target=self._worker, name=f"http-sender-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+        return self
+
+    def stop(self, timeout=2.0):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        for t in self._workers:
+            t.join(timeout=timeout)
+        self._workers = []
+
+    # ---------- producer side ----------
+    def submit(self, payload, on_lost=None, items=0):
+        """Queue a payload (list of records or pre-encoded JSON bytes).
+
+        Never blocks. Returns False if an older queued payload was dropped.
+        `on_lost()` is called (from any thread) if this payload is dropped
+        from the queue or its POST fails; `items` (e.g. its target count) is
+        added to `items_sent` once it is delivered.
+        """
+        with self._cond:
+            full = len(self._queue) == self._queue.maxlen
+            lost = self._queue[0][1] if full else None
+            self._queue.append((payload, on_lost, items))
+            self._cond.notify()
+        if lost is not None:
+            lost()
+        with self._stats_lock:
+            self.submitted += 1
+            if full:
+                self.dropped += 1
+        if full and self.controller is not None:
+            self.controller.observe_drop()
+        return not full
+
+    @property
+    def backlog(self):
+        """Payloads queued and not yet picked up by a worker."""
+        return len(self._queue)
+
+    # ---------- worker side ----------
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+        conn = cls(self._host, self._port, timeout=self.timeout)
+        conn.connect()
+        # small JSON bodies: don't let Nagle hold them back
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    def _encode(self, payload):
+        body = payload if isinstance(payload, (bytes, bytearray)) else \
+            json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        headers = {"Content-Type": self.content_type, "Connection": "keep-alive"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        if self.gzip_body:
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
+    def _worker(self):
+        conn = None
+        while True:
+            with self._cond:
+                while not self._queue and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    break
+                payload, on_lost, items = self._queue.popleft()
+            ok = False
+            try:
+                body, headers = self._encode(payload)
+                attempts = (0, 1)
+            except (TypeError, ValueError) as e:
+                # not JSON-serializable: nothing to send, but the worker keeps going
+                self._record(None, 0.0, 0, e)
+                attempts = ()
+            for attempt in attempts:
+                start = time.perf_counter()
+                reused = conn is not None
+                written = False
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    conn.request("POST", self._path, body=body, headers=headers)
+                    written = True
+                    resp = conn.getresponse()
+                    resp.read()
+                    latency = time.perf_counter() - start
+                    if resp.will_close:
+                        conn.close()
+                        conn = None
+                    self._record(resp.status, latency, len(body), items=items)
+                    ok = resp.status < 400
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    if conn is not None:
+                        conn.close()
+                    conn = None
+                    # a stale keep-alive socket fails on first use: reconnect and resend once,
+                    # but only if the body never went out or the peer closed without answering
+                    # (after a timeout the receiver may already have it)
+                    if not attempt and reused and (not written or isinstance(e, http.client.RemoteDisconnected)):
+                        continue
+                    self._record(None, time.perf_counter() - start, 0, e)
+                    break
+            if not ok and on_lost is not None:
+                on_lost()
+        if conn is not None:
+            conn.close()
+
+    def _record(self, status, latency, nbytes, error=None, items=0):
+        if self.controller is not None:
+            self.controller.observe(latency, error is None and status is not None and status < 400)
+        with self._stats_lock:
+            if error is None and status is not None and status < 400:
+                self.sent += 1
+                self.items_sent += items
+                self.bytes_sent += nbytes
+                self._latencies.append(latency)
+            else:
+                self.failed += 1
+                self.last_error = str(error) if error is not None else f"HTTP {status}"
+        if error is not None or (status is not None and status >= 400):
+            # at most one line per second so a dead endpoint doesn't flood the console
+            now = time.monotonic()
+            if now - self._last_print >= 1.0:
+                self._last_print = now
+                print(f"Endpoint POST failed: {self.last_error} (failed so far: {self.failed})")
+
+    def stats(self):
+        """Counters plus send latency percentiles (milliseconds)."""
+        with self._stats_lock:
+            lat = sorted(self._latencies)
+            out = {
+                "submitted": self.submitted,
+                "sent": self.sent,
+                "items_sent": self.items_sent,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "bytes_sent": self.bytes_sent,
+                "queued": len(self._queue),
+                "last_error": self.last_error,
+            }
+        for q in (50, 95, 99):
+            v = percentile(lat, q)
+            out[f"latency_p{q}_ms"] = None if v is None else round(v * 1000.0, 3)
+        if self.controller is not None:
+            out["aimd"] = self.controller.stats()
+        return out
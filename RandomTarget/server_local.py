@@ -1,130 +1,362 @@
-import http.server
-import socketserver
-import time
+"""Local test receiver for the generator's endpoint sink.
+
+An asyncio HTTP/1.1 server (keep-alive) that appends every POST body, exactly
+as received, to rotating segment files in received_json/. Each segment
+`recv_<ms>_<seq>.seg` has an `.idx` companion of fixed-size entries
+(offset, length, receive time, flags), so any body can be located without
+scanning. Bodies are never parsed or re-encoded; gzip bodies are stored
+compressed and flagged in the index. The status page is served from an
+in-memory index of recent POSTs instead of listing the directory.
+
+    python RandomTarget/server_local.py [--port 8000] [--segment-mb 64]
+    python RandomTarget/server_local.py --dump received_json/recv_..._000001.seg
+"""
+import argparse
+import asyncio
+import collections
+import gzip
+import itertools
 import json
 import os
+import signal
+import struct
+import time
+
+# live snapshot published in shared memory by the generator (needs numpy)
+try:
+    import shm_snapshot  # type: ignore
+    HAS_SHM = True
+except Exception:
+    HAS_SHM = False
 
 PORT = 8000
+SHM_PREVIEW_LIMIT = 500
+SEGMENT_BYTES = 64 * 1024 * 1024
+FLUSH_INTERVAL = 0.5            # seconds between flushes of the open segment
+RECENT_LIMIT = 50               # POSTs listed on the status page
+MAX_BODY = 64 * 1024 * 1024
 # store received files inside the RandomTarget package folder for easier testing
 BASE_DIR = os.path.dirname(__file__)
 OUT_DIR = os.path.join(BASE_DIR, "received_json")
-os.makedirs(OUT_DIR, exist_ok=True)
-
-class Handler(http.server.BaseHTTPRequestHandler):
-    def do_POST(self):
-        length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(length) if length > 0 else b""
-        ts = int(time.time() * 1000)
-        fname = os.path.join(OUT_DIR, f"recv_{ts}.json")
-        try:
-            parsed = json.loads(body.decode('utf-8'))
-            with open(fname, "w", encoding="utf-8") as f:
-                json.dump(parsed, f, indent=2, ensure_ascii=False)
-            print(f"Saved POST to {fname} (len={len(body)})")
-            self.send_response(200)
-            self.end_headers()
-            self.wfile.write(b"OK")
-        except Exception as e:
-            rawname = fname + ".raw"
-            with open(rawname, "wb") as f:
-                f.write(body)
-            print(f"Failed to parse JSON, saved raw to {rawname}: {e}")
-            self.send_response(400)
-            self.end_headers()
-            self.wfile.write(b"BAD REQUEST")
-
-    def do_GET(self):
-        """Provide a tiny status page so opening the endpoint in a browser works."""
-        try:
-            # show recent received files and, if path is '/upload', include the live targets snapshot
-            files = []
-            if os.path.exists(OUT_DIR):
-                files = sorted(os.listdir(OUT_DIR))[-50:]
-
-            body = ["<html><head><title>Test Server</title></head><body>"]
-            body.append(f"<h2>Test server running on port {PORT}</h2>")
-            body.append(f"<p>Saved files in: {OUT_DIR}</p>")
-
-            # If the request is to /upload, attempt to read the current JSON snapshot from likely locations
-            if self.path.startswith("/upload"):
-                cur_json = None
-                # candidate locations (relative to package and parent folder)
-                candidates = []
-                # repo-root Random_test/live_targets.json (one level up)
-                parent = os.path.dirname(BASE_DIR)
-                candidates.append(os.path.join(parent, "Random_test", "live_targets.json"))
-                # repo-root live_targets.json
-                candidates.append(os.path.join(parent, "live_targets.json"))
-                # working directory live_targets.json
-                candidates.append(os.path.join(os.getcwd(), "live_targets.json"))
-
-                for c in candidates:
-                    try:
-                        if c and os.path.exists(c):
-                            with open(c, "r", encoding="utf-8") as f:
-                                cur_json = f.read()
-                            cand_used = c
-                            break
-                    except Exception:
-                        continue
-
-                if cur_json is not None:
-                    body.append("<h3>Live targets (from snapshot)</h3>")
-                    # try pretty print JSON
-                    try:
-                        parsed = json.loads(cur_json)
-                        pretty = json.dumps(parsed, indent=2, ensure_ascii=False)
-                        body.append("<pre style='white-space:pre-wrap; background:#f6f6f6; padding:8px;'>")
-                        body.append(pretty)
-                        body.append("</pre>")
-                        body.append(f"<p>Source: {cand_used}</p>")
-                    except Exception:
-                        body.append("<p>Unable to parse JSON snapshot, raw content below:</p>")
-                        body.append("<pre>")
-                        body.append(cur_json)
-                        body.append("</pre>")
-                else:
-                    body.append("<p>No live snapshot found in expected locations.</p>")
-
-            body.append("<h3>Recent received files</h3>")
-            body.append("<ul>")
-            for fn in files:
-                body.append(f"<li>{fn}</li>")
-            body.append("</ul>")
-            body.append("</body></html>")
-            html = "\n".join(body).encode("utf-8")
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.send_header('Content-Length', str(len(html)))
-            self.end_headers()
-            self.wfile.write(html)
-        except Exception as e:
-            self.send_response(500)
-            self.end_headers()
-            self.wfile.write(b"ERROR")
-
-    def do_HEAD(self):
-        # respond to HEAD like GET but without body
+
+# index entry: body offset, body length, receive time (epoch s), flags
+INDEX_ENTRY = struct.Struct("<QIdB3x")
+FLAG_GZIP = 1
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+           500: "Internal Server Error"}
+
+
+class SegmentStore:
+    """Append-only segment files with a fixed-size offset index per segment."""
+
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._seq = itertools.count(1)
+        self._data = None
+        self._index = None
+        self.segment = None
+        self._offset = 0
+        # in-memory views for the status page (no directory listing per request)
+        self.segments = collections.deque(
+            sorted(f for f in os.listdir(directory) if f.endswith(".seg")), maxlen=RECENT_LIMIT)
+        self.recent = collections.deque(maxlen=RECENT_LIMIT)
+        self.count = 0
+        self.bytes = 0
+
+    def _open_segment(self):
+        self.close()
+        self.segment = f"recv_{int(time.time() * 1000)}_{next(self._seq):06d}.seg"
+        path = os.path.join(self.directory, self.segment)
+        self._data = open(path, "ab", buffering=1024 * 1024)
+        self._index = open(path[:-4] + ".idx", "ab", buffering=64 * 1024)
+        self._offset = 0
+        self.segments.append(self.segment)
+
+    def append(self, body, flags=0):
+        """Append one raw body. Returns (segment name, offset)."""
+        if self._data is None or self._offset + len(body) > self.segment_bytes and self._offset:
+            self._open_segment()
+        offset = self._offset
+        now = time.time()
+        self._data.write(body)
+        self._index.write(INDEX_ENTRY.pack(offset, len(body), now, flags))
+        self._offset += len(body)
+        self.count += 1
+        self.bytes += len(body)
+        self.recent.append((self.segment, offset, len(body), now, flags))
+        return self.segment, offset
+
+    def flush(self):
+        if self._data is not None:
+            self._data.flush()
+            self._index.flush()
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._index.close()
+            self._data = self._index = None
+
+
+def read_segment(seg_path, decode=True):
+    """Yield (receive time, flags, body) for every indexed body in a segment.
+
+    With `decode`, gzip bodies are decompressed.
+    """
+    with open(seg_path[:-4] + ".idx", "rb") as f:
+        index = f.read()
+    with open(seg_path, "rb") as data:
+        for off in range(0, len(index) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size):
+            offset, length, t, flags = INDEX_ENTRY.unpack_from(index, off)
+            data.seek(offset)
+            body = data.read(length)
+            if len(body) < length:
+                return  # torn tail from a crash
+            if decode and flags & FLAG_GZIP:
+                body = gzip.decompress(body)
+            yield t, flags, body
+
+
+def render_status_page(path, store):
+    """Provide a tiny status page so opening the endpoint in a browser works."""
+    # show recent received bodies and, if path is '/upload', include the live targets snapshot
+    body = ["<html><head><title>Test Server</title></head><body>"]
+    body.append(f"<h2>Test server running on port {PORT}</h2>")
+    body.append(f"<p>Saved segments in: {OUT_DIR} ({store.count} POSTs, {store.bytes} bytes this run)</p>")
+
+    # If the request is to /upload, attempt to read the current JSON snapshot from likely locations
+    shm_records = None
+    if path.startswith("/upload") and HAS_SHM:
         try:
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.end_headers()
+            reader = shm_snapshot.SnapshotReader()
+            try:
+                _, shm_t, shm_total, rec = reader.read()
+            finally:
+                reader.close()
+            shm_records = shm_snapshot.records_to_dicts(shm_t, rec[:SHM_PREVIEW_LIMIT])
         except Exception:
-            self.send_response(500)
-            self.end_headers()
+            shm_records = None
+
+    if shm_records is not None:
+        body.append("<h3>Live targets (from shared memory)</h3>")
+        body.append("<pre style='white-space:pre-wrap; background:#f6f6f6; padding:8px;'>")
+        body.append(json.dumps(shm_records, indent=2, ensure_ascii=False))
+        body.append("</pre>")
+        body.append(f"<p>Showing {len(shm_records)} of {shm_total} targets at {shm_t:.3f}</p>")
+    elif path.startswith("/upload"):
+        cur_json = None
+        # candidate locations (relative to package and parent folder)
+        candidates = []
+        # repo-root Random_test/live_targets.json (one level up)
+        parent = os.path.dirname(BASE_DIR)
+        candidates.append(os.path.join(parent, "Random_test", "live_targets.json"))
+        # repo-root live_targets.json
+        candidates.append(os.path.join(parent, "live_targets.json"))
+        # working directory live_targets.json
+        candidates.append(os.path.join(os.getcwd(), "live_targets.json"))
+
+        for c in candidates:
+            try:
+                if c and os.path.exists(c):
+                    with open(c, "r", encoding="utf-8") as f:
+                        cur_json = f.read()
+                    cand_used = c
+                    break
+            except Exception:
+                continue
+
+        if cur_json is not None:
+            body.append("<h3>Live targets (from snapshot)</h3>")
+            # try pretty print JSON
+            try:
+                parsed = json.loads(cur_json)
+                pretty = json.dumps(parsed, indent=2, ensure_ascii=False)
+                body.append("<pre style='white-space:pre-wrap; background:#f6f6f6; padding:8px;'>")
+                body.append(pretty)
+                body.append("</pre>")
+                body.append(f"<p>Source: {cand_used}</p>")
+            except Exception:
+                body.append("<p>Unable to parse JSON snapshot, raw content below:</p>")
+                body.append("<pre>")
+                body.append(cur_json)
+                body.append("</pre>")
+        else:
+            body.append("<p>No live snapshot found in expected locations.</p>")
+
+    body.append("<h3>Recent POSTs</h3>")
+    body.append("<ul>")
+    for seg, offset, length, t, flags in reversed(store.recent):
+        enc = " gzip" if flags & FLAG_GZIP else ""
+        body.append(f"<li>{time.strftime('%H:%M:%S', time.localtime(t))} {seg} @{offset} ({length} bytes{enc})</li>")
+    body.append("</ul>")
+    body.append("<h3>Recent segments</h3>")
+    body.append("<ul>")
+    for seg in reversed(store.segments):
+        body.append(f"<li>{seg}</li>")
+    body.append("</ul>")
+    body.append("</body></html>")
+    return "\n".join(body).encode("utf-8")
+
 
-    def log_message(self, format, *args):
-        # suppress default HTTP request logging to keep console clean
+def _response(status, body=b"", content_type="text/plain", keep_alive=True, head=False):
+    lines = [
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        "Connection: keep-alive" if keep_alive else "Connection: close",
+        "", "",
+    ]
+    out = "\r\n".join(lines).encode("latin-1")
+    return out if head else out + body
+
+
+_OK_KEEP_ALIVE = _response(200, b"OK")
+
+
+class ReceiverProtocol(asyncio.Protocol):
+    """Keep-alive HTTP/1.1 connection feeding a SegmentStore.
+
+    Requests are parsed straight out of the receive buffer, so pipelined
+    requests are handled in one pass without per-request coroutines.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.buf = bytearray()
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buf += data
+        while self.transport is not None:
+            end = self.buf.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self.buf) > 65536:
+                    self._fail(431, b"HEADERS TOO LARGE")
+                return
+            lines = bytes(self.buf[:end]).decode("latin-1").split("\r\n")
+            try:
+                method, path, version = lines[0].split(" ", 2)
+            except ValueError:
+                return self._fail(400, b"BAD REQUEST")
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                return self._fail(411, b"LENGTH REQUIRED")
+            try:
+                length = int(headers.get("content-length", 0) or 0)
+            except ValueError:
+                return self._fail(400, b"BAD REQUEST")
+            if length > MAX_BODY:
+                return self._fail(413, b"TOO LARGE")
+            start = end + 4
+            if len(self.buf) < start + length:
+                return  # wait for the rest of the body
+            body = bytes(self.buf[start:start + length])
+            del self.buf[:start + length]
+
+            conn_hdr = headers.get("connection", "").lower()
+            keep_alive = conn_hdr != "close" if version == "HTTP/1.1" else conn_hdr == "keep-alive"
+            self.transport.write(self._handle(method, path, headers, body, keep_alive))
+            if not keep_alive:
+                self.transport.close()
+                self.transport = None
+
+    def _handle(self, method, path, headers, body, keep_alive):
+        if method == "POST":
+            flags = FLAG_GZIP if headers.get("content-encoding", "").lower() == "gzip" else 0
+            try:
+                self.store.append(body, flags)
+            except Exception as e:
+                print(f"Failed to store POST: {e}")
+                return _response(500, b"ERROR", keep_alive=keep_alive)
+            return _OK_KEEP_ALIVE if keep_alive else _response(200, b"OK", keep_alive=False)
+        if method in ("GET", "HEAD"):
+            try:
+                html = render_status_page(path, self.store)
+                return _response(200, html, "text/html; charset=utf-8", keep_alive, head=method == "HEAD")
+            except Exception:
+                return _response(500, b"ERROR", keep_alive=keep_alive)
+        return _response(405, b"METHOD NOT ALLOWED", keep_alive=keep_alive)
+
+    def _fail(self, status, message):
+        self.transport.write(_response(status, message, keep_alive=False))
+        self.transport.close()
+        self.transport = None
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+
+async def housekeeping(store, report_interval=5.0):
+    """Flush the open segment regularly and print a throughput line."""
+    last_report, last_count = time.monotonic(), 0
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        store.flush()
+        now = time.monotonic()
+        if now - last_report >= report_interval:
+            n = store.count - last_count
+            if n:
+                print(f"Received {n} POSTs ({n / (now - last_report):.0f}/s), total {store.count} -> {store.segment}")
+            last_report, last_count = now, store.count
+
+
+async def serve(host, port, store):
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(lambda: ReceiverProtocol(store), host, port, backlog=1024)
+    flusher = asyncio.ensure_future(housekeeping(store))
+    # the UI stops the server with terminate(): close the segment cleanly on SIGTERM
+    stop = loop.create_future()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: rely on the periodic flush
+    try:
+        async with server:
+            await stop
+    finally:
+        flusher.cancel()
+        store.close()
+
+
+def main():
+    global PORT, OUT_DIR
+    parser = argparse.ArgumentParser(description="Local segmented receiver for RandomTarget POSTs")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--out-dir", default=OUT_DIR)
+    parser.add_argument("--segment-mb", type=float, default=SEGMENT_BYTES / (1024 * 1024))
+    parser.add_argument("--dump", metavar="SEGMENT", help="print the bodies stored in a segment and exit")
+    args = parser.parse_args()
+    PORT, OUT_DIR = args.port, args.out_dir
+
+    if args.dump:
+        for t, flags, body in read_segment(args.dump):
+            print(f"{t:.3f} {len(body)} bytes: {body[:200].decode('utf-8', 'replace')}")
         return
 
-if __name__ == "__main__":
-    print(f"Starting test server at http://localhost:{PORT}/upload")
-    print(f"Saving received files to: {OUT_DIR}")
+    store = SegmentStore(args.out_dir, int(args.segment_mb * 1024 * 1024))
+    print(f"Starting test server at http://{args.host}:{args.port}/upload")
+    print(f"Saving received bodies to segments in: {args.out_dir}")
     try:
-        with socketserver.TCPServer(("localhost", PORT), Handler) as httpd:
-            try:
-                httpd.serve_forever()
-            except KeyboardInterrupt:
-                print("Server stopped by KeyboardInterrupt.")
+        asyncio.run(serve(args.host, args.port, store))
+        print("Server stopped.")
+    except KeyboardInterrupt:
+        print("Server stopped by KeyboardInterrupt.")
     except Exception as e:
         print(f"Server failed to start: {e}")
+
+
+if __name__ == "__main__":
+    main()
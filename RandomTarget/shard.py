@@ -0,0 +1,298 @@
+"""Multi-process sharded swarm simulation over a shared-memory state array.
+
+The whole swarm lives in one float64 array inside a
+`multiprocessing.shared_memory` block, one row per target slot. Each worker
+process owns a contiguous slice of rows and advances it with a coordinated
+turn motion model; the coordinator (the process that created the swarm)
+allocates slots, keeps the id index and reads the state without copying.
+
+Steps are bulk-synchronous: `tick()` sends one command to every worker and
+waits for all replies, so between ticks the coordinator owns the memory.
+ShardedSwarm offers the same interface as swarm.Swarm, so it can be dropped
+into config.swarm.
+"""
+import bisect
+import concurrent.futures
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .swarm import ChangeLog, Snapshot
+
+# state columns
+N, E, D, VN, VE, VD, CREATED, T_REF, LIFETIME, TURN, ALIVE = range(11)
+NCOLS = 11
+
+
+def _advance(rows, now, lifetime, integrate=True):
+    """Advance one shard in place and expire old rows.
+
+    Horizontal motion follows a coordinated turn at TURN rad/s (straight line
+    when TURN is 0); vertical motion is constant velocity. Returns the local
+    indices of rows that expired.
+    """
+    alive = rows[:, ALIVE] != 0.0
+    if not alive.any():
+        return np.zeros(0, dtype=np.intp)
+
+    if integrate:
+        dt = np.where(alive, now - rows[:, T_REF], 0.0)
+        w = rows[:, TURN]
+        a = w * dt
+        straight = np.abs(w) < 1e-9
+        safe_w = np.where(straight, 1.0, w)
+        sin_a, cos_a = np.sin(a), np.cos(a)
+        f1 = np.where(straight, dt, sin_a / safe_w)            # integral of cos(w t)
+        f2 = np.where(straight, 0.0, (1.0 - cos_a) / safe_w)   # integral of sin(w t)
+        vn, ve = rows[:, VN].copy(), rows[:, VE].copy()
+        rows[:, N] += vn * f1 - ve * f2
+        rows[:, E] += vn * f2 + ve * f1
+        rows[:, D] += rows[:, VD] * dt
+        rows[:, VN] = vn * cos_a - ve * sin_a
+        rows[:, VE] = vn * sin_a + ve * cos_a
+        rows[alive, T_REF] = now
+
+    lt = rows[:, LIFETIME]
+    lt = np.where(np.isnan(lt), np.inf if lifetime is None else lifetime, lt)
+    expired = alive & ((now - rows[:, CREATED]) >= lt)
+    idx = np.flatnonzero(expired)
+    rows[idx, ALIVE] = 0.0
+    return idx
+
+
+def _worker_main(shm_name, capacity, lo, hi, conn):
+    """Worker process: owns rows [lo, hi) and serves step commands."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        state = np.ndarray((capacity, NCOLS), dtype=np.float64, buffer=shm.buf)
+        rows = state[lo:hi]
+        while True:
+            cmd = conn.recv()
+            if cmd[0] == "step":
+                _, now, lifetime, integrate = cmd
+                conn.send((lo + _advance(rows, now, lifetime, integrate)).tolist())
+            elif cmd[0] == "stop":
+                break
+        del rows, state
+    finally:
+        conn.close()
+        shm.close()
+
+
+class ShardedSwarm:
+    """Swarm sharded across worker processes (same interface as swarm.Swarm).
+
+    Capacity is fixed at creation. Positions are integrated by the workers on
+    every tick(), so this swarm has no lazy mode.
+    """
+
+    def __init__(self, workers=None, capacity=262144, seed=None, turn_rate_std=0.0):
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.capacity = int(capacity)
+        self.turn_rate_std = turn_rate_std
+        self.rng = np.random.default_rng(seed)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.capacity * NCOLS * 8)
+        self.state = np.ndarray((self.capacity, NCOLS), dtype=np.float64, buffer=self.shm.buf)
+        self.state[:] = 0.0
+        self.ids = np.empty(self.capacity, dtype=object)
+        self._index = {}
+        self.changes = ChangeLog()
+        self.bounds = [(k * self.capacity // self.workers, (k + 1) * self.capacity // self.workers)
+                       for k in range(self.workers)]
+        self._shard_starts = [lo for lo, _ in self.bounds]
+        # free slots per shard, popped from the end (lowest slot first)
+        self._free = [list(range(hi - 1, lo - 1, -1)) for lo, hi in self.bounds]
+        self._procs = []
+        self._conns = []
+        self._pool = None
+        for lo, hi in self.bounds:
+            parent, child = mp.Pipe()
+            p = mp.Process(target=_worker_main, args=(self.shm.name, self.capacity, lo, hi, child), daemon=True)
+            p.start()
+            child.close()
+            self._procs.append(p)
+            self._conns.append(parent)
+
+    # --- Swarm-compatible interface ---
+    @property
+    def lazy(self):
+        return False
+
+    @lazy.setter
+    def lazy(self, value):
+        pass  # workers always integrate
+
+    def __len__(self):
+        return len(self._index)
+
+    def _alloc(self, k):
+        """Take k free slots, spread as evenly as possible over the shards."""
+        if k > sum(len(f) for f in self._free):
+            raise ValueError(f"ShardedSwarm capacity {self.capacity} exceeded")
+        slots = []
+        while len(slots) < k:
+            open_shards = [f for f in self._free if f]
+            per = max(1, (k - len(slots)) // len(open_shards))
+            for f in sorted(open_shards, key=len, reverse=True):
+                take = min(per, len(f), k - len(slots))
+                slots.extend(f[-take:])
+                del f[-take:]
+                if len(slots) == k:
+                    break
+        return np.array(slots, dtype=np.intp)
+
+    def spawn(self, ids, pos=None, vel=None, now=None, lifetime=None, turn=None):
+        """Write new targets into free slots. Returns the number added."""
+        k = len(ids)
+        if k == 0:
+            return 0
+        now = time.time() if now is None else now
+        if pos is None:
+            pos = np.column_stack((
+                self.rng.uniform(-500, 500, k),
+                self.rng.uniform(-500, 500, k),
+                self.rng.uniform(0, 500, k),
+            ))
+        if vel is None:
+            vel = np.column_stack((
+                self.rng.uniform(-20, 20, k),
+                self.rng.uniform(-20, 20, k),
+                self.rng.uniform(-5, 5, k),
+            ))
+        if turn is None:
+            turn = self.rng.normal(0.0, self.turn_rate_std, k) if self.turn_rate_std else 0.0
+        slots = self._alloc(k)
+        st = self.state
+        st[slots, N:D + 1] = pos
+        st[slots, VN:VD + 1] = vel
+        st[slots, CREATED] = now
+        st[slots, T_REF] = now
+        st[slots, LIFETIME] = np.nan if lifetime is None else lifetime
+        st[slots, TURN] = turn
+        st[slots, ALIVE] = 1.0
+        ids = list(ids)
+        self.ids[slots] = ids
+        self._index.update(zip(ids, slots.tolist()))
+        self.changes.append("add", ids)
+        return k
+
+    def _release(self, slots):
+        for slot in slots:
+            tid = self.ids[slot]
+            self.ids[slot] = None
+            self._index.pop(tid, None)
+            self._free[self._shard_of(slot)].append(slot)
+
+    def _shard_of(self, slot):
+        return bisect.bisect_right(self._shard_starts, slot) - 1
+
+    def _broadcast(self, now, lifetime, integrate):
+        now = time.time() if now is None else now
+        for conn in self._conns:
+            conn.send(("step", now, lifetime, integrate))
+        expired_slots = []
+        for conn in self._conns:
+            expired_slots.extend(conn.recv())
+        expired = [self.ids[s] for s in expired_slots]
+        self._release(expired_slots)
+        if expired:
+            self.changes.append("remove", expired)
+        return expired
+
+    def tick(self, now=None, lifetime=None):
+        """Advance every shard in parallel, then expire. Returns expired ids."""
+        return self._broadcast(now, lifetime, True)
+
+    def expire(self, now=None, lifetime=None):
+        return self._broadcast(now, lifetime, False)
+
+    def positions_at(self, t):
+        """Current positions of live rows (state as of the last tick)."""
+        return self.state[self._alive_rows(), N:D + 1].copy()
+
+    def position_of(self, row, t):
+        return self.state[row, N:D + 1].copy()
+
+    def next_expiry(self, lifetime):
+        rows = self._alive_rows()
+        if len(rows) == 0:
+            return None
+        lt = self.state[rows, LIFETIME]
+        lt = np.where(np.isnan(lt), np.inf if lifetime is None else lifetime, lt)
+        deadline = float((self.state[rows, CREATED] + lt).min())
+        return None if deadline == np.inf else deadline
+
+    def clear(self):
+        removed = len(self._index)
+        self.state[:, ALIVE] = 0.0
+        self.ids[:] = None
+        self._index = {}
+        self._free = [list(range(hi - 1, lo - 1, -1)) for lo, hi in self.bounds]
+        self.changes.append("reset")
+        return removed
+
+    def row(self, target_id):
+        return self._index.get(target_id, -1)
+
+    def id_list(self):
+        return self.ids[self._alive_rows()].tolist()
+
+    @property
+    def pos(self):
+        return self.state[:, N:D + 1]
+
+    @property
+    def vel(self):
+        return self.state[:, VN:VD + 1]
+
+    @property
+    def created(self):
+        return self.state[:, CREATED]
+
+    def snapshot(self, now=None):
+        """Compacted, immutable copy of the live rows (for the existing sinks)."""
+        rows = self._alive_rows()
+        st = self.state
+        return Snapshot(
+            time.time() if now is None else now,
+            self.ids[rows],
+            st[rows, N:D + 1],
+            st[rows, VN:VD + 1],
+            st[rows, CREATED],
+        )
+
+    # --- zero-copy access for sinks ---
+    def _alive_rows(self):
+        return np.flatnonzero(self.state[:, ALIVE] != 0.0)
+
+    def shards(self):
+        """Per-shard (lo, hi, state view) tuples; no data is copied."""
+        return [(lo, hi, self.state[lo:hi]) for lo, hi in self.bounds]
+
+    def map_shards(self, fn):
+        """Run fn(lo, hi, view) for every shard on a thread pool and return the
+        results in shard order. Only call between ticks."""
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        return list(self._pool.map(lambda s: fn(*s), self.shards()))
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send(("stop",))
+            except Exception:
+                pass
+        for p in self._procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        for conn in self._conns:
+            conn.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        self.state = None
+        self.shm.close()
+        self.shm.unlink()
@@ -0,0 +1,243 @@
+"""Shared-memory live snapshot with seqlock versioning.
+
+The generator publishes its current swarm snapshot into a named
+`multiprocessing.shared_memory` block. Readers in any local process attach by
+name and get a consistent view of fixed-size records without touching the
+filesystem or parsing JSON.
+
+Layout: a 64-byte header followed by `capacity` records of RECORD_DTYPE.
+The writer bumps `seq` to an odd value, writes, then bumps it to the next even
+value; a reader retries whenever it sees an odd `seq` or `seq` changed while
+it was copying.
+
+Ids are stored as at most ID_BYTES of UTF-8. Longer ids are cut at a
+character boundary and counted in the header's `clipped` field.
+
+This module only depends on NumPy so it can be imported by the standalone
+server_local.py as well as by the package.
+"""
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+DEFAULT_NAME = "randomtarget_live"
+MAGIC = 0x52544C56  # "RTLV"
+VERSION = 1
+ID_BYTES = 24
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("version", "<u4"),
+    ("seq", "<u8"),
+    ("capacity", "<u4"),
+    ("count", "<u4"),       # records written (<= capacity)
+    ("total", "<u4"),       # targets in the swarm (> count means truncated)
+    ("clipped", "<u4"),     # ids cut to ID_BYTES in this snapshot
+    ("t", "<f8"),           # snapshot time (epoch s)
+    ("pid", "<u8"),         # writer process
+    ("_reserved", "<u8", 2),
+])
+HEADER_SIZE = 64
+assert HEADER_DTYPE.itemsize == HEADER_SIZE
+
+RECORD_DTYPE = np.dtype([
+    ("id", f"S{ID_BYTES}"),
+    ("pos", "<f8", 3),      # north, east, down (m)
+    ("vel", "<f8", 3),      # vn, ve, vd (m/s)
+    ("created", "<f8"),
+])
+
+
+# blocks published by this process; readers here must not unregister them
+_OWNED = set()
+
+
+def _clip_id(raw):
+    """UTF-8 id bytes cut to ID_BYTES without splitting a character."""
+    return raw[:ID_BYTES].decode("utf-8", "ignore").encode("utf-8")
+
+
+def _encode_ids(ids):
+    """Ids as S{ID_BYTES} records, plus how many of them had to be clipped."""
+    try:
+        raw = np.array(ids, dtype=np.bytes_)            # fast path: ASCII ids
+    except UnicodeEncodeError:
+        raw = np.array([str(i).encode("utf-8") for i in ids], dtype=np.bytes_)
+    out = raw.astype(f"S{ID_BYTES}")
+    if raw.dtype.itemsize <= ID_BYTES:
+        return out, 0
+    long = np.char.str_len(raw) > ID_BYTES
+    out[long] = [_clip_id(i) for i in raw[long].tolist()]
+    return out, int(long.sum())
+
+
+def _untrack(shm):
+    """Keep this process's exit from unlinking a block it only attached to."""
+    if shm.name in _OWNED:
+        return
+    try:
+        # Python < 3.13 registers attached blocks with the resource tracker,
+        # which would unlink the writer's block when this process exits.
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        # Windows frees a block with its last handle, so an existing one is always in use
+        # (and os.kill would terminate the process instead of probing it)
+        return True
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except (ProcessLookupError, OverflowError):    # OverflowError: no pid that large
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _unlink_stale(name):
+    """Remove a block left by a generator that is gone; refuse anything else."""
+    existing = shared_memory.SharedMemory(name=name)
+    try:
+        hdr = None
+        if existing.size >= HEADER_SIZE:
+            hdr = np.frombuffer(bytes(existing.buf[:HEADER_SIZE]), dtype=HEADER_DTYPE)[0]
+        if hdr is None or int(hdr["magic"]) != MAGIC:
+            _untrack(existing)
+            raise FileExistsError(f"Shared memory block {name!r} exists and is not a live snapshot; "
+                                  f"choose another SHM_NAME")
+        pid = int(hdr["pid"])
+        if _pid_alive(pid):
+            _untrack(existing)
+            raise FileExistsError(f"Shared memory block {name!r} is in use by another generator (pid {pid})")
+    finally:
+        existing.close()
+    existing.unlink()
+
+
+def records_to_dicts(t, rec):
+    """Convert RECORD_DTYPE rows to the JSON record layout used by the sinks."""
+    return [
+        {
+            "id": tid.decode("utf-8", "replace"),
+            "timestamp": t,
+            "position": {"north": n, "east": e, "down": d},
+            "velocity": {"vn": vn, "ve": ve, "vd": vd},
+        }
+        for tid, (n, e, d), (vn, ve, vd) in zip(rec["id"].tolist(), rec["pos"].tolist(), rec["vel"].tolist())
+    ]
+
+
+class SnapshotPublisher:
+    """Writer side. Owns (creates and unlinks) the shared-memory block."""
+
+    def __init__(self, name=DEFAULT_NAME, capacity=131072):
+        size = HEADER_SIZE + capacity * RECORD_DTYPE.itemsize
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # block left by a crashed generator: replace it (raises if its writer still runs)
+            _unlink_stale(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _OWNED.add(name)
+        self.name = name
+        self.capacity = capacity
+        self._header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        self._records = np.ndarray((capacity,), dtype=RECORD_DTYPE, buffer=self.shm.buf, offset=HEADER_SIZE)
+        self._header["magic"] = MAGIC
+        self._header["version"] = VERSION
+        self._header["capacity"] = capacity
+        self._header["pid"] = os.getpid()
+        self._header["seq"] = 0
+
+    def publish(self, snap):
+        """Copy a swarm Snapshot into shared memory. Returns records written."""
+        n = min(len(snap), self.capacity)
+        hdr = self._header
+        hdr["seq"] += 1                     # odd: write in progress
+        rec = self._records[:n]
+        rec["id"], hdr["clipped"] = _encode_ids(snap.ids[:n].tolist())
+        rec["pos"] = snap.pos[:n]
+        rec["vel"] = snap.vel[:n]
+        rec["created"] = snap.created[:n]
+        hdr["count"] = n
+        hdr["total"] = len(snap)
+        hdr["t"] = snap.t
+        hdr["seq"] += 1                     # even: consistent again
+        return n
+
+    def close(self):
+        self._header = self._records = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        _OWNED.discard(self.name)
+
+
+class SnapshotReader:
+    """Reader side. Attaches to an existing block by name."""
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.shm = shared_memory.SharedMemory(name=name)
+        _untrack(self.shm)
+        self.name = name
+        self._header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if int(self._header["magic"]) != MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory block {name!r} is not a live snapshot")
+        capacity = int(self._header["capacity"])
+        self._records = np.ndarray((capacity,), dtype=RECORD_DTYPE, buffer=self.shm.buf, offset=HEADER_SIZE)
+
+    @property
+    def seq(self):
+        return int(self._header["seq"])
+
+    @property
+    def clipped(self):
+        """Ids of the current snapshot that were cut to ID_BYTES."""
+        return int(self._header["clipped"])
+
+    def view(self):
+        """Zero-copy access: returns (seq, t, records view).
+
+        The view is only guaranteed consistent if `still_valid(seq)` holds
+        after the caller is done reading it.
+        """
+        while True:
+            seq = self.seq
+            if seq & 1 == 0:
+                break
+            time.sleep(0)
+        hdr = self._header
+        return seq, float(hdr["t"]), self._records[: int(hdr["count"])]
+
+    def still_valid(self, seq):
+        return self.seq == seq
+
+    def read(self, retries=1000):
+        """Consistent copy of the current snapshot: (seq, t, total, records)."""
+        for _ in range(retries):
+            seq, t, rec = self.view()
+            total = int(self._header["total"])
+            out = rec.copy()
+            if self.still_valid(seq):
+                return seq, t, total, out
+        raise TimeoutError("snapshot kept changing while being read")
+
+    def to_dicts(self, limit=None):
+        """Read a consistent snapshot in the JSON record layout."""
+        _, t, _, rec = self.read()
+        return records_to_dicts(t, rec if limit is None else rec[:limit])
+
+    def close(self):
+        self._header = self._records = None
+        self.shm.close()
@@ -0,0 +1,382 @@
+"""Fan-out sink pipeline for swarm snapshots.
+
+The logger takes one immutable Snapshot per tick and offers it to every sink.
+Each sink has its own cadence, bounded queue and worker thread, so a slow or
+failing sink (a hung endpoint, a slow disk) only delays itself. Snapshots are
+shared, never copied per sink; their JSON records are built at most once
+(Snapshot.records) and must be treated as read-only.
+"""
+import collections
+import ipaddress
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+from . import telemetry_log, udp_frames
+from .archive import ArchiveWriter
+from .sender import percentile
+
+
+class Sink:
+    """Base sink: cadence, latest-wins queue, worker thread and metrics.
+
+    Subclasses implement write(snap) and optionally close(). `interval` is the
+    minimum snapshot-time spacing in seconds (0 = every snapshot offered).
+    """
+
+    name = "sink"
+
+    def __init__(self, interval=0.0, queue_size=4, enabled=True):
+        self.interval = interval
+        self.enabled = enabled
+        self._queue = collections.deque(maxlen=max(1, int(queue_size)))
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        self._last_accepted = None
+
+        self._stats_lock = threading.Lock()
+        self._lags = collections.deque(maxlen=1024)
+        self._write_times = collections.deque(maxlen=1024)
+        self._window = collections.deque()     # (monotonic time, targets) of recent writes
+        self.offered = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_error = None
+        self._last_print = 0.0
+
+    # ---------- lifecycle ----------
+    def start(self):
+        self._thread = threading.Thread(target=self._worker, name=f"sink-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Stop after draining whatever is still queued."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    # ---------- producer side ----------
+    def offer(self, snap):
+        """Queue a snapshot if the sink is enabled and it is due. Never blocks."""
+        if not self.enabled or self._stop:
+            return False
+        if self.interval and self._last_accepted is not None and snap.t - self._last_accepted < self.interval:
+            return False
+        self._last_accepted = snap.t
+        with self._cond:
+            full = len(self._queue) == self._queue.maxlen
+            self._queue.append(snap)
+            self._cond.notify()
+        with self._stats_lock:
+            self.offered += 1
+            if full:
+                self.dropped += 1
+        return True
+
+    # ---------- worker side ----------
+    def write(self, snap):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stop:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                snap = self._queue.popleft()
+            start = time.perf_counter()
+            try:
+                self.write(snap)
+            except Exception as e:
+                self._record(snap, start, e)
+            else:
+                self._record(snap, start)
+        try:
+            self.close()
+        except Exception as e:
+            print(f"Error closing {self.name} sink: {e}")
+
+    def _record(self, snap, start, error=None):
+        now = time.monotonic()
+        with self._stats_lock:
+            if error is None:
+                self.written += 1
+                self._write_times.append(time.perf_counter() - start)
+                self._lags.append(time.time() - snap.t)
+                self._window.append((now, len(snap)))
+                while self._window and now - self._window[0][0] > 10.0:
+                    self._window.popleft()
+            else:
+                self.failed += 1
+                self.last_error = str(error)
+        if error is not None and now - self._last_print >= 1.0:
+            # at most one line per second so a broken sink doesn't flood the console
+            self._last_print = now
+            print(f"{self.name} sink failed: {error} (failed so far: {self.failed})")
+
+    def stats(self):
+        """Counters, lag (snapshot time to write done) and recent throughput."""
+        now = time.monotonic()
+        with self._stats_lock:
+            lags = sorted(self._lags)
+            writes = sorted(self._write_times)
+            window = [(t, n) for t, n in self._window if now - t <= 10.0]
+            out = {
+                "name": self.name,
+                "enabled": self.enabled,
+                "interval": self.interval,
+                "offered": self.offered,
+                "written": self.written,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "queued": len(self._queue),
+                "last_error": self.last_error,
+                "lag_ms": round(self._lags[-1] * 1000.0, 3) if self._lags else None,
+            }
+        for q in (50, 99):
+            v = percentile(lags, q)
+            out[f"lag_p{q}_ms"] = None if v is None else round(v * 1000.0, 3)
+        v = percentile(writes, 50)
+        out["write_p50_ms"] = None if v is None else round(v * 1000.0, 3)
+        span = (now - window[0][0]) if len(window) > 1 else 0.0
+        out["writes_per_s"] = round((len(window) - 1) / span, 2) if span > 0 else 0.0
+        out["targets_per_s"] = round(sum(n for _, n in window[1:]) / span, 1) if span > 0 else 0.0
+        return out
+
+
+class FileSink(Sink):
+    """Latest-snapshot JSON files (atomic compact replace, or the legacy
+    indented in-place rewrite when `rewrite` is set)."""
+
+    name = "file"
+
+    def __init__(self, paths, rewrite=False, **kwargs):
+        super().__init__(**kwargs)
+        self.paths = list(paths)
+        self.rewrite = rewrite
+
+    def write(self, snap):
+        records = snap.records()
+        if not self.rewrite:
+            body = json.dumps(records, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            for path in self.paths:
+                telemetry_log.write_latest_snapshot(path, body)
+            return
+        for path in self.paths:
+            # write directly (no temp file). flush+fsync to reduce partial-write window.
+            dirpath = os.path.dirname(path)
+            if dirpath and not os.path.exists(dirpath):
+                os.makedirs(dirpath, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(records, f, indent=2, ensure_ascii=False)
+                f.flush()
+                try:
+                    os.fsync(f.fileno())
+                except Exception:
+                    pass
+
+
+class NdjsonSink(Sink):
+    """Append-only segment log (NDJSON lines or binary frames)."""
+
+    name = "ndjson"
+
+    def __init__(self, directory, fmt="ndjson", segment_bytes=64 * 1024 * 1024, fsync_interval=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.fmt = fmt
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.log = None
+
+    def write(self, snap):
+        if self.log is None or self.log.fmt != self.fmt:
+            if self.log is not None:
+                self.log.close()
+            self.log = telemetry_log.SegmentLog(self.directory, fmt=self.fmt, segment_bytes=self.segment_bytes,
+                                                fsync_interval=self.fsync_interval)
+        self.log.fsync_interval = self.fsync_interval
+        self.log.append(snap)
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+
+class ArchiveSink(Sink):
+    """Columnar compressed recording (see archive.py) for later replay.
+
+    One archive file per run, named by start time; closing the sink writes
+    the seek index.
+    """
+
+    name = "archive"
+
+    def __init__(self, directory, chunk_frames=256, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.chunk_frames = chunk_frames
+        self.writer = None
+
+    def write(self, snap):
+        if self.writer is None:
+            path = os.path.join(self.directory, time.strftime("targets_%Y%m%d_%H%M%S.rta", time.localtime(snap.t)))
+            self.writer = ArchiveWriter(path, chunk_frames=self.chunk_frames)
+        self.writer.append_snapshot(snap)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class HttpSink(Sink):
+    """Endpoint POSTs through the pooled sender stage.
+
+    `get_sender` returns the HttpSender to submit to. When `dr_filter` is set
+    only the rows it selects are posted (dead-reckoning publish mode); a
+    payload the sender drops or fails to deliver is handed back to the filter
+    so those targets are sent again.
+    """
+
+    name = "http"
+
+    def __init__(self, get_sender, dr_filter=None, **kwargs):
+        super().__init__(**kwargs)
+        self.get_sender = get_sender
+        self.dr_filter = dr_filter
+
+    def write(self, snap):
+        dr_filter = self.dr_filter
+        if dr_filter is not None:
+            rows = dr_filter.select(snap)
+            if len(rows) == 0:
+                return
+            if len(rows) < len(snap):
+                snap = snap.take(rows)
+            ids = snap.ids.tolist()
+            self.get_sender().submit(snap.records(), on_lost=lambda: dr_filter.forget(ids))
+            return
+        self.get_sender().submit(snap.records())
+
+
+class UdpSink(Sink):
+    """Telemetry datagrams of at most `max_datagram` bytes, unicast or multicast.
+
+    fmt "binary" sends fixed-layout frames with per-datagram sequence numbers
+    (udp_frames.py, decoded by the BMC listener); "ndjson" sends batches of
+    compact NDJSON lines. Fire-and-forget: a datagram never splits a record.
+    """
+
+    name = "udp"
+
+    def __init__(self, host, port, max_datagram=60000, fmt="binary", multicast_ttl=1, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self.max_datagram = max_datagram
+        self.fmt = fmt
+        self.multicast_ttl = multicast_ttl
+        self.sock = None
+        self.encoder = None
+        self.bytes_sent = 0
+        self.datagrams_sent = 0
+
+    def _open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+        if ipaddress.ip_address(socket.gethostbyname(self.host)).is_multicast:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.multicast_ttl)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        return sock
+
+    def _send(self, datagram, addr):
+        self.bytes_sent += self.sock.sendto(datagram, addr)
+        self.datagrams_sent += 1
+
+    def write(self, snap):
+        if self.sock is None:
+            self.sock = self._open()
+        addr = (self.host, self.port)
+        if self.fmt == "binary":
+            if self.encoder is None or self.encoder.max_datagram != self.max_datagram:
+                self.encoder = udp_frames.FrameEncoder(self.max_datagram)
+            for datagram in self.encoder.encode(snap, time.time()):
+                self._send(datagram, addr)
+            return
+        dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+        batch, size = [], 0
+        for rec in snap.records():
+            line = dumps(rec).encode("utf-8") + b"\n"
+            if batch and size + len(line) > self.max_datagram:
+                self._send(b"".join(batch), addr)
+                batch, size = [], 0
+            batch.append(line)
+            size += len(line)
+        if batch:
+            self._send(b"".join(batch), addr)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class StdoutSink(Sink):
+    """One summary line per snapshot, or every record as NDJSON when verbose."""
+
+    name = "stdout"
+
+    def __init__(self, stream=None, verbose=False, **kwargs):
+        super().__init__(**kwargs)
+        self.stream = stream
+        self.verbose = verbose
+
+    def write(self, snap):
+        out = self.stream or sys.stdout
+        if self.verbose:
+            out.write(telemetry_log.encode_ndjson(snap).decode("utf-8"))
+        else:
+            out.write(f"[{time.strftime('%H:%M:%S', time.localtime(snap.t))}] {len(snap)} targets\n")
+        out.flush()
+
+
+class SinkPipeline:
+    """Ordered set of sinks fed from a single snapshot producer."""
+
+    def __init__(self, sinks=()):
+        self.sinks = collections.OrderedDict()
+        for sink in sinks:
+            self.add(sink)
+
+    def add(self, sink):
+        self.sinks[sink.name] = sink.start()
+        return sink
+
+    def __getitem__(self, name):
+        return self.sinks[name]
+
+    def offer(self, snap):
+        """Hand the same snapshot to every sink. Returns how many accepted it."""
+        return sum(1 for sink in self.sinks.values() if sink.offer(snap))
+
+    def stats(self):
+        return [sink.stats() for sink in self.sinks.values()]
+
+    def stop(self, timeout=2.0):
+        for sink in self.sinks.values():
+            sink.stop(timeout=timeout)
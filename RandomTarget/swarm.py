@@ -0,0 +1,258 @@
+"""Vectorized swarm engine: every target lives in NumPy structure-of-arrays
+buffers and the whole swarm is advanced in one batched tick.
+
+Each row stores (t_ref, position at t_ref, velocity). In "integrate" mode the
+engine thread moves position/t_ref forward every tick; in "lazy" mode nothing
+is integrated and positions are evaluated in closed form when a snapshot is
+taken. Both modes read through the same formula, so switching is free.
+"""
+import collections
+import itertools
+import time
+
+import numpy as np
+
+
+class Snapshot:
+    """Immutable copy of the swarm state taken at time `t`.
+
+    Attributes:
+        t:       float, snapshot time (epoch seconds)
+        ids:     object array of target ids
+        pos:     (n, 3) float array, north/east/down in meters
+        vel:     (n, 3) float array, vn/ve/vd in m/s
+        created: (n,) float array, creation time of each target
+    """
+
+    __slots__ = ("t", "ids", "pos", "vel", "created", "_records")
+
+    def __init__(self, t, ids, pos, vel, created):
+        for arr in (ids, pos, vel, created):
+            arr.flags.writeable = False
+        self.t = t
+        self.ids = ids
+        self.pos = pos
+        self.vel = vel
+        self.created = created
+        self._records = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, rows):
+        """Return a new Snapshot holding only the given row indices."""
+        return Snapshot(self.t, self.ids[rows], self.pos[rows], self.vel[rows], self.created[rows])
+
+    def to_dicts(self):
+        """Return the snapshot in the JSON layout used by the file/HTTP sinks."""
+        t = self.t
+        return [
+            {
+                "id": tid,
+                "timestamp": t,
+                "position": {"north": n, "east": e, "down": d},
+                "velocity": {"vn": vn, "ve": ve, "vd": vd},
+            }
+            for tid, (n, e, d), (vn, ve, vd) in zip(self.ids.tolist(), self.pos.tolist(), self.vel.tolist())
+        ]
+
+    def records(self):
+        """to_dicts() built once and shared by every sink. Treat as read-only."""
+        if self._records is None:
+            self._records = self.to_dicts()
+        return self._records
+
+
+class ChangeLog:
+    """Bounded journal of id add/remove events.
+
+    Viewers keep a cursor and apply only what changed since their last look
+    instead of re-reading every id. Events are ("add", ids), ("remove", ids)
+    and ("reset", ()).
+    """
+
+    def __init__(self, maxlen=4096):
+        self._events = collections.deque(maxlen=maxlen)
+        self.seq = 0                # sequence number of the newest event
+
+    def append(self, kind, ids=()):
+        self.seq += 1
+        self._events.append((self.seq, kind, ids))
+
+    def since(self, cursor):
+        """Return (seq, events) after `cursor`; events is None when the journal
+        no longer reaches back that far and the caller must resync."""
+        if cursor == self.seq:
+            return self.seq, []
+        if cursor is None or cursor > self.seq or not self._events or self._events[0][0] > cursor + 1:
+            return self.seq, None
+        start = cursor + 1 - self._events[0][0]
+        return self.seq, [(kind, ids) for _, kind, ids in itertools.islice(self._events, start, None)]
+
+
+class Swarm:
+    """Structure-of-arrays store for all live targets (NED coords).
+
+    Rows [0, len) are live. Expired rows are dropped by masked compaction so
+    the live block stays contiguous. The swarm is not thread-safe on its own;
+    callers hold `config.targets_lock` around every call.
+    """
+
+    FIELDS = ("ids", "pos", "vel", "created", "t_ref", "lifetime")
+
+    def __init__(self, capacity=1024, seed=None, lazy=False):
+        capacity = max(1, int(capacity))
+        self._n = 0
+        self.lazy = lazy                        # True: never integrate, evaluate on read
+        self.ids = np.empty(capacity, dtype=object)
+        self.pos = np.zeros((capacity, 3))      # north, east, down (m) at t_ref
+        self.vel = np.zeros((capacity, 3))      # vn, ve, vd (m/s)
+        self.created = np.zeros(capacity)       # creation time (epoch s)
+        self.t_ref = np.zeros(capacity)         # time at which pos is valid
+        self.lifetime = np.full(capacity, np.nan)   # per-target lifetime (s), NaN = swarm default
+        self.rng = np.random.default_rng(seed)
+        self._index = None                      # lazily built id -> row map
+        self.changes = ChangeLog()              # add/remove events for incremental viewers
+
+    def __len__(self):
+        return self._n
+
+    def _reserve(self, extra):
+        need = self._n + extra
+        cap = len(self.ids)
+        if need <= cap:
+            return
+        while cap < need:
+            cap *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.empty((cap,) + old.shape[1:], dtype=old.dtype)
+            new[: self._n] = old[: self._n]
+            setattr(self, name, new)
+
+    def spawn(self, ids, pos=None, vel=None, now=None, lifetime=None):
+        """Append one target per id. Missing pos/vel are drawn from the same
+        uniform ranges the per-thread Target used; `lifetime` (scalar or per
+        target) overrides the default passed to expire(). Returns the number added."""
+        k = len(ids)
+        if k == 0:
+            return 0
+        now = time.time() if now is None else now
+        if pos is None:
+            pos = np.column_stack((
+                self.rng.uniform(-500, 500, k),
+                self.rng.uniform(-500, 500, k),
+                self.rng.uniform(0, 500, k),
+            ))
+        if vel is None:
+            vel = np.column_stack((
+                self.rng.uniform(-20, 20, k),
+                self.rng.uniform(-20, 20, k),
+                self.rng.uniform(-5, 5, k),
+            ))
+        self._reserve(k)
+        lo, hi = self._n, self._n + k
+        ids = list(ids)
+        self.ids[lo:hi] = ids
+        self.pos[lo:hi] = pos
+        self.vel[lo:hi] = vel
+        self.created[lo:hi] = now
+        self.t_ref[lo:hi] = now
+        self.lifetime[lo:hi] = np.nan if lifetime is None else lifetime
+        if self._index is not None:
+            for i, tid in enumerate(ids, lo):
+                self._index[tid] = i
+        self._n = hi
+        self.changes.append("add", ids)
+        return k
+
+    def tick(self, now=None, lifetime=None):
+        """Advance every target to `now`, then expire old ones.
+
+        In lazy mode only the expiry runs. Returns the list of expired ids.
+        """
+        now = time.time() if now is None else now
+        n = self._n
+        if n and not self.lazy:
+            self.pos[:n] += self.vel[:n] * (now - self.t_ref[:n])[:, None]
+            self.t_ref[:n] = now
+        return self.expire(now, lifetime)
+
+    def positions_at(self, t):
+        """Closed-form positions of every live target at time `t` (new array)."""
+        n = self._n
+        return self.pos[:n] + self.vel[:n] * (t - self.t_ref[:n])[:, None]
+
+    def position_of(self, row, t):
+        """Closed-form position of a single row at time `t`."""
+        return self.pos[row] + self.vel[row] * (t - self.t_ref[row])
+
+    def _lifetimes(self, lifetime):
+        """Effective lifetime of each live row (inf when neither is set)."""
+        lt = self.lifetime[: self._n]
+        default = np.inf if lifetime is None else lifetime
+        return np.where(np.isnan(lt), default, lt)
+
+    def next_expiry(self, lifetime):
+        """Epoch time at which the next target expires, or None if none will."""
+        if self._n == 0:
+            return None
+        deadline = float((self.created[: self._n] + self._lifetimes(lifetime)).min())
+        return None if deadline == np.inf else deadline
+
+    def expire(self, now=None, lifetime=None):
+        """Drop targets older than their lifetime via masked compaction."""
+        n = self._n
+        if n == 0:
+            return []
+        now = time.time() if now is None else now
+        keep = (now - self.created[:n]) < self._lifetimes(lifetime)
+        if keep.all():
+            return []
+        expired = self.ids[:n][~keep].tolist()
+        k = int(np.count_nonzero(keep))
+        for name in self.FIELDS:
+            arr = getattr(self, name)
+            arr[:k] = arr[:n][keep]
+        self.ids[k:n] = None
+        self._n = k
+        index = self._index
+        if index is not None:
+            # rows before the first expired one keep their place; only later survivors moved
+            for tid in expired:
+                del index[tid]
+            first = int(np.argmin(keep))
+            for i, tid in enumerate(self.ids[first:k].tolist(), first):
+                index[tid] = i
+        self.changes.append("remove", expired)
+        return expired
+
+    def clear(self):
+        """Remove every target. Returns the number removed."""
+        removed = self._n
+        self.ids[:removed] = None
+        self._n = 0
+        self._index = None
+        self.changes.append("reset")
+        return removed
+
+    def row(self, target_id):
+        """Return the live row of `target_id`, or -1 if it is not alive."""
+        if self._index is None:
+            self._index = {tid: i for i, tid in enumerate(self.ids[: self._n].tolist())}
+        return self._index.get(target_id, -1)
+
+    def id_list(self):
+        return self.ids[: self._n].tolist()
+
+    def snapshot(self, now=None):
+        """Evaluate positions at `now` into an immutable Snapshot."""
+        n = self._n
+        now = time.time() if now is None else now
+        return Snapshot(
+            now,
+            self.ids[:n].copy(),
+            self.positions_at(now),
+            self.vel[:n].copy(),
+            self.created[:n].copy(),
+        )
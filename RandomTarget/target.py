@@ -1,10 +1,11 @@
 import time
-import random
-import threading
 from . import config
 
 class Target:
-        """Holds the data and logic for a single target in North-East-Down (NED) coords.
+        """View onto one row of the swarm engine, in North-East-Down (NED) coords.
+
+        The data itself lives in `config.swarm`; each attribute read looks up the
+        target's current row, so a view stays valid across compactions.
 
         Attributes:
             north: float (meters)
@@ -13,56 +14,126 @@ class Target:
             vn, ve, vd: velocities in m/s (north, east, down)
         """
 
-        def __init__(self, target_id):
+        def __init__(self, target_id, swarm=None):
                 self.target_id = target_id
-                # store as floats for smoother updates
-                self.north = float(random.uniform(-500, 500))
-                self.east = float(random.uniform(-500, 500))
-                self.down = float(random.uniform(0, 500))
-                # Random constant velocity in NED (m/s)
-                self.vn = float(random.uniform(-20, 20))  # north velocity
-                self.ve = float(random.uniform(-20, 20))  # east velocity
-                self.vd = float(random.uniform(-5, 5))    # down velocity
-                self.creation_time = time.time()
-
-        def update_position(self, dt):
-                """Update NED position using velocities and dt seconds."""
-                # keep float precision for smooth animation
-                self.north = self.north + (self.vn * dt)
-                self.east = self.east + (self.ve * dt)
-                self.down = self.down + (self.vd * dt)
+                self._swarm = config.swarm if swarm is None else swarm
+
+        def _row(self):
+                row = self._swarm.row(self.target_id)
+                if row < 0:
+                    raise LookupError(f"Target {self.target_id} is not alive")
+                return row
+
+        @property
+        def alive(self):
+                return self._swarm.row(self.target_id) >= 0
+
+        def position(self, t=None):
+                """(north, east, down) evaluated at time `t` (default: now)."""
+                t = time.time() if t is None else t
+                return tuple(self._swarm.position_of(self._row(), t).tolist())
+
+        @property
+        def north(self):
+                return self.position()[0]
+
+        @property
+        def east(self):
+                return self.position()[1]
+
+        @property
+        def down(self):
+                return self.position()[2]
+
+        @property
+        def vn(self):
+                return float(self._swarm.vel[self._row(), 0])
+
+        @property
+        def ve(self):
+                return float(self._swarm.vel[self._row(), 1])
+
+        @property
+        def vd(self):
+                return float(self._swarm.vel[self._row(), 2])
+
+        @property
+        def creation_time(self):
+                return float(self._swarm.created[self._row()])
 
         def to_dict(self):
+                now = time.time()
+                row = self._row()
+                n, e, d = self._swarm.position_of(row, now).tolist()
+                vn, ve, vd = self._swarm.vel[row].tolist()
                 return {
                     "id": self.target_id,
-                    "timestamp": time.time(),
-                    "position": {"north": self.north, "east": self.east, "down": self.down},
-                    "velocity": {"vn": self.vn, "ve": self.ve, "vd": self.vd}
+                    "timestamp": now,
+                    "position": {"north": n, "east": e, "down": d},
+                    "velocity": {"vn": vn, "ve": ve, "vd": vd}
                 }
 
-def target_thread_task(target_obj: Target):
-    """Per-target thread: update position and remove after lifetime."""
-    print(f"Thread started for Target ID: {target_obj.target_id}")
-    last_time = time.time()
+def spawn_targets(target_ids):
+    """Add random targets to the swarm in one batched allocation.
+
+    Returns a list of Target views for the new ids.
+    """
+    with config.targets_lock:
+        config.swarm.spawn(target_ids)
+    return [Target(tid) for tid in target_ids]
+
+
+def swarm_thread_task():
+    """Single engine thread: advance the whole swarm and expire old targets.
+
+    In lazy kinematics mode nothing is integrated, so the thread only wakes
+    for the next expiry deadline (at most once per second) and an idle swarm
+    costs essentially nothing.
+    """
+    print("Swarm engine thread started.")
     while not config.stop_threads_event.is_set():
         now = time.time()
-        dt = now - last_time
-        last_time = now
+        with config.targets_lock:
+            config.swarm.lazy = config.KINEMATICS_MODE == "lazy"
+            lazy = config.swarm.lazy        # a sharded swarm always integrates
+            expired = config.swarm.tick(now, config.TARGET_LIFETIME)
+            deadline = config.swarm.next_expiry(config.TARGET_LIFETIME)
+        if expired:
+            print(f"{len(expired)} target(s) expired after {config.TARGET_LIFETIME} seconds.")
 
-        target_obj.update_position(dt)
+        if lazy:
+            wait = 1.0 if deadline is None else min(1.0, max(0.0, deadline - time.time()))
+        else:
+            wait = config.TARGET_UPDATE_RATE
+        config.stop_threads_event.wait(wait)
+    print("Swarm engine thread stopped.")
+
+
+def use_sharded_swarm():
+    """Swap config.swarm for a multi-process ShardedSwarm if SHARD_WORKERS > 0.
+
+    Must run before the engine thread starts. Returns True if sharding is on.
+    """
+    if config.SHARD_WORKERS <= 0:
+        return False
+    from .shard import ShardedSwarm
+    sharded = ShardedSwarm(workers=config.SHARD_WORKERS, capacity=config.SHARD_CAPACITY,
+                           turn_rate_std=config.SHARD_TURN_RATE_STD)
+    with config.targets_lock:
+        old = config.swarm
+        if len(old):
+            snap = old.snapshot()
+            sharded.spawn(snap.ids.tolist(), pos=snap.pos, vel=snap.vel, now=snap.t)
+        config.swarm = sharded
+    print(f"Swarm sharded across {config.SHARD_WORKERS} worker processes.")
+    return True
 
-        age = now - target_obj.creation_time
-        if age >= config.TARGET_LIFETIME:
-            with config.targets_lock:
-                try:
-                    config.active_targets.remove(target_obj)
-                except ValueError:
-                    pass
-            print(f"Target {target_obj.target_id} expired after {config.TARGET_LIFETIME} seconds.")
-            break
 
-        time.sleep(config.TARGET_UPDATE_RATE)
-    print(f"Thread stopped for Target ID: {target_obj.target_id}")
+def shutdown_swarm():
+    """Release worker processes / shared memory held by the swarm, if any."""
+    close = getattr(config.swarm, "close", None)
+    if close is not None:
+        close()
 
 
 def kill_all_targets():
@@ -70,8 +141,6 @@ def kill_all_targets():
 
     Returns the number of targets removed.
     """
-    removed = 0
     with config.targets_lock:
-        removed = len(config.active_targets)
-        config.active_targets.clear()
-    return removed
\ No newline at end of file
+        removed = config.swarm.clear()
+    return removed
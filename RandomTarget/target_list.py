@@ -0,0 +1,112 @@
+"""Virtualized target list for the UI.
+
+The full id list lives in Python (an insertion-ordered dict updated from the
+swarm's add/remove events); the Listbox only ever holds the rows that are
+currently visible, so refreshing costs the same with 50 or 50,000 targets.
+"""
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class VirtualTargetList(tk.Frame):
+    """Scrollable id list that materializes only the visible window."""
+
+    def __init__(self, master, height=30, width=28, on_select=None):
+        super().__init__(master)
+        self.on_select = on_select
+        self.listbox = tk.Listbox(self, height=height, width=width, exportselection=False, activestyle="none")
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.listbox.pack(side=tk.LEFT, fill=tk.Y)
+        self.scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+        self.listbox.bind("<Configure>", lambda e: self.refresh())
+        self._line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace")
+        self._ids = {}          # insertion-ordered set of ids
+        self._order = []        # list(self._ids), rebuilt only after changes
+        self._dirty = False
+        self._shown = []        # ids currently materialized in the Listbox
+        self.top = 0            # index of the first visible row
+        self.selected = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ---------- model ----------
+    def set_ids(self, ids):
+        """Replace the whole list (initial load or resync)."""
+        self._ids = dict.fromkeys(ids)
+        self._dirty = True
+        if self.selected not in self._ids:
+            self.selected = None
+
+    def apply(self, events):
+        """Apply ("add" | "remove" | "reset", ids) events from swarm.changes."""
+        for kind, ids in events:
+            if kind == "add":
+                self._ids.update(dict.fromkeys(ids))
+            elif kind == "remove":
+                for tid in ids:
+                    self._ids.pop(tid, None)
+            elif kind == "reset":
+                self._ids.clear()
+            self._dirty = True
+        if self.selected not in self._ids:
+            self.selected = None
+
+    # ---------- view ----------
+    def visible_rows(self):
+        h = self.listbox.winfo_height()
+        if h <= 1:
+            return int(self.listbox.cget("height"))
+        return max(1, (h - 4) // self._line_height)
+
+    def refresh(self):
+        """Re-materialize the visible window, touching only rows that changed."""
+        if self._dirty:
+            # keep the first visible target at the top while rows come and go above it
+            anchor = self._shown[0] if self._shown else None
+            self._order = list(self._ids)
+            self._dirty = False
+            if anchor in self._ids:
+                self.top = self._order.index(anchor)
+        n, rows = len(self._order), self.visible_rows()
+        self.top = max(0, min(self.top, n - rows))
+        window = self._order[self.top:self.top + rows]
+        if window != self._shown:
+            keep = 0
+            while keep < min(len(window), len(self._shown)) and window[keep] == self._shown[keep]:
+                keep += 1
+            self.listbox.delete(keep, tk.END)
+            if window[keep:]:
+                self.listbox.insert(tk.END, *window[keep:])
+            self._shown = window
+        self.listbox.selection_clear(0, tk.END)
+        if self.selected is not None and self.selected in window:
+            self.listbox.selection_set(window.index(self.selected))
+        if n > rows:
+            self.scrollbar.set(self.top / n, (self.top + rows) / n)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll(self, amount, what):
+        step = self.visible_rows() if what == "pages" else 1
+        self.top += int(amount) * step
+        self.refresh()
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.top = int(float(args[0]) * len(self._order))
+            self.refresh()
+        elif action == "scroll":
+            self.scroll(args[0], args[1])
+
+    def _on_listbox_select(self, event):
+        sel = self.listbox.curselection()
+        if not sel or sel[0] >= len(self._shown):
+            return
+        self.selected = self._shown[sel[0]]
+        if self.on_select is not None:
+            self.on_select(self.selected)
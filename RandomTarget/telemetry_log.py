@@ -0,0 +1,171 @@
+"""Append-only streaming telemetry log with rotating segment files.
+
+Every snapshot is appended as compact NDJSON lines (one per target) or as one
+length-prefixed binary frame. Segments rotate by size, fsync runs on a
+configurable cadence, and nothing already written is ever rewritten.
+
+Binary frame layout (little endian):
+    u32 payload_len
+    payload: f64 t | u32 count | u32 ids_len | ids (utf-8, '\\n' joined)
+             | f64[count*3] pos (north, east, down) | f64[count*3] vel (vn, ve, vd)
+"""
+import json
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+_LEN = struct.Struct("<I")
+_HEAD = struct.Struct("<dII")
+
+
+def encode_ndjson(snap):
+    """Encode a Snapshot as compact NDJSON (one line per target)."""
+    if len(snap) == 0:
+        return b""
+    dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    lines = [dumps(rec) for rec in snap.records()]
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+def encode_frame(snap):
+    """Encode a Snapshot as one length-prefixed binary frame."""
+    ids = "\n".join(str(i) for i in snap.ids.tolist()).encode("utf-8")
+    payload = b"".join((
+        _HEAD.pack(snap.t, len(snap), len(ids)),
+        ids,
+        np.ascontiguousarray(snap.pos, dtype="<f8").tobytes(),
+        np.ascontiguousarray(snap.vel, dtype="<f8").tobytes(),
+    ))
+    return _LEN.pack(len(payload)) + payload
+
+
+def decode_frame(payload):
+    """Decode one binary frame payload into (t, ids, pos, vel)."""
+    t, count, ids_len = _HEAD.unpack_from(payload, 0)
+    off = _HEAD.size
+    ids = payload[off:off + ids_len].decode("utf-8").split("\n") if count else []
+    off += ids_len
+    pos = np.frombuffer(payload, dtype="<f8", count=count * 3, offset=off).reshape(count, 3)
+    off += count * 24
+    vel = np.frombuffer(payload, dtype="<f8", count=count * 3, offset=off).reshape(count, 3)
+    return t, ids, pos, vel
+
+
+def read_frames(path):
+    """Yield (t, ids, pos, vel) for every complete frame in a binary segment."""
+    with open(path, "rb") as f:
+        while True:
+            head = f.read(_LEN.size)
+            if len(head) < _LEN.size:
+                return
+            (size,) = _LEN.unpack(head)
+            payload = f.read(size)
+            if len(payload) < size:
+                return  # torn tail from a crash; ignore
+            yield decode_frame(payload)
+
+
+def write_latest_snapshot(path, records):
+    """Atomically replace `path` with a compact JSON list of records.
+
+    `records` may also be the already encoded JSON bytes.
+    """
+    if not isinstance(records, (bytes, bytearray)):
+        # dumps (C encoder) is much faster than dump, which encodes in Python
+        records = json.dumps(records, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    dirpath = os.path.dirname(path) or "."
+    os.makedirs(dirpath, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dirpath, prefix=".latest_", suffix=".json")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(records)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class SegmentLog:
+    """Append-only writer that rotates segment files by size.
+
+    fsync_interval: seconds between fsyncs (0 = after every append,
+    None = leave it to the OS).
+    """
+
+    def __init__(self, directory, fmt="ndjson", segment_bytes=64 * 1024 * 1024, fsync_interval=1.0):
+        if fmt not in ("ndjson", "binary"):
+            raise ValueError(f"Unknown log format: {fmt}")
+        self.directory = directory
+        self.fmt = fmt
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._size = 0
+        self._seq = 0
+        self._last_fsync = time.monotonic()
+        self.bytes_written = 0
+        self.frames_written = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def current_path(self):
+        return self._file.name if self._file else None
+
+    def _open_segment(self):
+        ext = "ndjson" if self.fmt == "ndjson" else "bin"
+        self._seq += 1
+        name = f"seg_{int(time.time() * 1000)}_{self._seq:06d}.{ext}"
+        self._file = open(os.path.join(self.directory, name), "ab")
+        self._size = 0
+
+    def _rotate(self):
+        self._close_segment()
+        self._open_segment()
+
+    def _close_segment(self):
+        if self._file:
+            self._file.flush()
+            try:
+                os.fsync(self._file.fileno())
+            except OSError:
+                pass
+            self._file.close()
+            self._file = None
+
+    def append(self, snap):
+        """Append one snapshot. Returns the number of bytes written."""
+        data = encode_ndjson(snap) if self.fmt == "ndjson" else encode_frame(snap)
+        if not data:
+            return 0
+        if self._file is None:
+            self._open_segment()
+        elif self._size and self._size + len(data) > self.segment_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+        self.bytes_written += len(data)
+        self.frames_written += 1
+        self._maybe_fsync()
+        return len(data)
+
+    def _maybe_fsync(self):
+        if self.fsync_interval is None:
+            return
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            try:
+                os.fsync(self._file.fileno())
+            except OSError:
+                pass
+            self._last_fsync = now
+
+    def close(self):
+        self._close_segment()
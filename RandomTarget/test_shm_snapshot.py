@@ -0,0 +1,65 @@
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from RandomTarget import shm_snapshot
+from RandomTarget.swarm import Snapshot
+
+
+def make_snapshot(ids):
+    n = len(ids)
+    return Snapshot(1000.0, np.array(ids, dtype=object), np.zeros((n, 3)), np.ones((n, 3)), np.zeros(n))
+
+
+@pytest.fixture
+def name():
+    return f"rt_test_{uuid.uuid4().hex[:12]}"
+
+
+def test_long_non_ascii_id_is_clipped_at_a_character_boundary(name):
+    long_id = "Ziel-" + "ä" * 20          # 45 UTF-8 bytes: the 24-byte cut lands inside an "ä"
+    publisher = shm_snapshot.SnapshotPublisher(name, capacity=4)
+    try:
+        publisher.publish(make_snapshot(["T-1", long_id, "x" * 30]))
+        reader = shm_snapshot.SnapshotReader(name)
+        try:
+            ids = [r["id"] for r in reader.to_dicts()]
+            assert reader.clipped == 2
+        finally:
+            reader.close()
+    finally:
+        publisher.close()
+    assert ids[0] == "T-1"
+    assert long_id.startswith(ids[1]) and len(ids[1].encode("utf-8")) <= shm_snapshot.ID_BYTES
+    assert ids[2] == "x" * shm_snapshot.ID_BYTES
+
+
+def test_records_with_broken_utf8_still_decode():
+    rec = np.zeros(1, dtype=shm_snapshot.RECORD_DTYPE)
+    rec["id"] = "Ziel-ä".encode("utf-8")[:-1]
+    assert shm_snapshot.records_to_dicts(0.0, rec)[0]["id"] == "Ziel-�"
+
+
+def test_publisher_refuses_block_of_a_running_writer(name):
+    first = shm_snapshot.SnapshotPublisher(name, capacity=4)
+    try:
+        with pytest.raises(FileExistsError, match=name):
+            shm_snapshot.SnapshotPublisher(name, capacity=4)
+    finally:
+        first.close()
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows frees blocks with their last handle")
+def test_publisher_replaces_block_of_a_dead_writer(name):
+    stale = shm_snapshot.SnapshotPublisher(name, capacity=4)
+    stale._header["pid"] = 2 ** 31           # beyond any pid_max: no such process
+    stale._header = stale._records = None
+    stale.shm.close()                        # crashed: closed without unlinking
+    shm_snapshot._OWNED.discard(name)
+    publisher = shm_snapshot.SnapshotPublisher(name, capacity=4)
+    try:
+        assert int(publisher._header["pid"]) == os.getpid()
+    finally:
+        publisher.close()
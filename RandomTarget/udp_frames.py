@@ -0,0 +1,87 @@
+"""Fixed-layout binary telemetry frames for the UDP transport.
+
+One datagram carries a header and `count` fixed-size records; records are
+never split across datagrams. Sequence numbers count datagrams per stream
+(a random id chosen per sender), so a receiver can detect loss, reordering
+and sender restarts. The BMC listener (BMC_Code/udp_listener.py) decodes
+the same layout.
+
+Datagram layout (little endian):
+    HEADER: 4s magic b"RTTF" | u16 version | u16 count | u32 stream | u64 seq | f64 sent time
+    count * RECORD: 24s id (utf-8, NUL padded) | f64 timestamp
+                    | f64 north, east, down | f64 vn, ve, vd
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"RTTF"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQd")
+RECORD = struct.Struct("<24sd6d")
+ID_BYTES = 24
+RECORD_DTYPE = np.dtype([("id", f"S{ID_BYTES}"), ("t", "<f8"), ("pos", "<f8", 3), ("vel", "<f8", 3)])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+
+def new_stream_id():
+    return int.from_bytes(os.urandom(4), "little")
+
+
+def records_per_datagram(max_datagram):
+    return max(1, min(0xFFFF, (max_datagram - HEADER.size) // RECORD.size))
+
+
+class FrameEncoder:
+    """Turns Snapshots into datagrams, numbering them within one stream.
+
+    Ids longer than ID_BYTES bytes cannot be represented and are skipped
+    (counted in `skipped`).
+    """
+
+    def __init__(self, max_datagram=60000, stream=None):
+        self.max_datagram = max_datagram
+        self.per_datagram = records_per_datagram(max_datagram)
+        self.stream = new_stream_id() if stream is None else stream
+        self.seq = 0
+        self.skipped = 0
+
+    def encode(self, snap, now):
+        """Return the list of datagrams (bytes) for one snapshot."""
+        ids = [str(i).encode("utf-8") for i in snap.ids.tolist()]
+        keep = [k for k, b in enumerate(ids) if len(b) <= ID_BYTES]
+        if len(keep) < len(ids):
+            self.skipped += len(ids) - len(keep)
+            ids = [ids[k] for k in keep]
+            pos, vel = snap.pos[keep], snap.vel[keep]
+        else:
+            pos, vel = snap.pos, snap.vel
+        rows = np.empty(len(ids), dtype=RECORD_DTYPE)
+        rows["id"] = ids
+        rows["t"] = snap.t
+        rows["pos"] = pos
+        rows["vel"] = vel
+        out = []
+        step = self.per_datagram
+        for lo in range(0, len(rows), step):
+            chunk = rows[lo:lo + step]
+            out.append(HEADER.pack(MAGIC, VERSION, len(chunk), self.stream, self.seq, now) + chunk.tobytes())
+            self.seq += 1
+        return out
+
+
+def decode(datagram):
+    """Decode one datagram into (stream, seq, sent time, rows) or raise ValueError.
+
+    `rows` is a structured array with RECORD_DTYPE fields.
+    """
+    if len(datagram) < HEADER.size:
+        raise ValueError("short datagram")
+    magic, version, count, stream, seq, sent = HEADER.unpack_from(datagram, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a telemetry frame")
+    if len(datagram) < HEADER.size + count * RECORD.size:
+        raise ValueError("truncated datagram")
+    rows = np.frombuffer(datagram, dtype=RECORD_DTYPE, count=count, offset=HEADER.size)
+    return stream, seq, sent, rows
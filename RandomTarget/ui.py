@@ -1,28 +1,68 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import scrolledtext
+from tkinter import filedialog
 import json
 import os
 import threading
 import time
-import math
-from . import config, target, logger
+import collections
+from . import config, target, logger, shm_snapshot, scenario, map_renderer
+from .sender import percentile
+from .target_list import VirtualTargetList
 import subprocess
 import sys
 
 
+class LockTimer:
+    """Context manager around config.targets_lock that records how long the UI
+    waited for and held it, so UI-side contention with the engine is visible."""
+
+    def __init__(self, lock, maxlen=512):
+        self.lock = lock
+        self.waits = collections.deque(maxlen=maxlen)
+        self.holds = collections.deque(maxlen=maxlen)
+        self._acquired = 0.0
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self.lock.acquire()
+        self._acquired = time.perf_counter()
+        self.waits.append(self._acquired - start)
+        return self
+
+    def __exit__(self, *exc):
+        self.holds.append(time.perf_counter() - self._acquired)
+        self.lock.release()
+        return False
+
+    def summary(self):
+        """(hold p50, hold max, wait max) in milliseconds over recent uses."""
+        if not self.holds:
+            return None
+        holds = sorted(self.holds)
+        return percentile(holds, 50) * 1000.0, holds[-1] * 1000.0, max(self.waits) * 1000.0
+
+
 class TargetGeneratorUI:
     def __init__(self, root):
         self.root = root
         self.root.title("3D Target Generator Controller (NED)")
         self.root.geometry("900x640")
         self.target_counter = 0
+        self.scenario_runner = None
+        self.scenario_runs = 0
+        self._scenario_after = None
 
         # top controls
         top = tk.Frame(root)
         top.pack(fill=tk.X, pady=6)
-        self.btn_add_target = tk.Button(top, text="GENERATE TARGET THREAD", command=self.add_target_thread, bg="#4CAF50", fg="white")
+        self.btn_add_target = tk.Button(top, text="GENERATE TARGETS", command=self.add_target_thread, bg="#4CAF50", fg="white")
         self.btn_add_target.pack(side=tk.LEFT, padx=6)
+        tk.Label(top, text="count:").pack(side=tk.LEFT)
+        self.entry_spawn_count = tk.Entry(top, width=6)
+        self.entry_spawn_count.insert(0, "1")
+        self.entry_spawn_count.pack(side=tk.LEFT, padx=4)
 
         tk.Label(top, text="JSON write interval (s):").pack(side=tk.LEFT, padx=(12, 0))
         self.entry_json_rate = tk.Entry(top, width=6)
@@ -38,6 +78,8 @@ class TargetGeneratorUI:
         self.btn_refresh_json.pack(side=tk.LEFT, padx=4)
         self.btn_kill_all = tk.Button(tool_frame, text="KILL ALL TARGETS", command=self.kill_all_targets, bg="#f44336", fg="white")
         self.btn_kill_all.pack(side=tk.LEFT, padx=4)
+        self.btn_load_scenario = tk.Button(tool_frame, text="Load Scenario", command=self.load_scenario)
+        self.btn_load_scenario.pack(side=tk.LEFT, padx=4)
         self.btn_toggle_server = tk.Button(tool_frame, text="Start Server", command=self.toggle_server)
         self.btn_toggle_server.pack(side=tk.LEFT, padx=4)
         self.btn_open_received = tk.Button(tool_frame, text="Open Received Folder", command=self.open_received_folder)
@@ -59,6 +101,24 @@ class TargetGeneratorUI:
         self.chk_send.grid(row=2, column=0, sticky=tk.W, pady=4)
         self.btn_apply_endpoint = tk.Button(ep_frame, text="Apply Endpoint", command=self.apply_endpoint_settings)
         self.btn_apply_endpoint.grid(row=2, column=1, sticky=tk.E, padx=6)
+        dr_frame = tk.Frame(ep_frame)
+        dr_frame.grid(row=3, column=0, columnspan=2, sticky=tk.W)
+        self.var_dead_reckoning = tk.BooleanVar(value=config.PUBLISH_MODE == "dead_reckoning")
+        tk.Checkbutton(dr_frame, text="Dead-reckoning publish, threshold (m):", variable=self.var_dead_reckoning).pack(side=tk.LEFT)
+        self.entry_dr_threshold = tk.Entry(dr_frame, width=6)
+        self.entry_dr_threshold.insert(0, str(config.DR_THRESHOLD))
+        self.entry_dr_threshold.pack(side=tk.LEFT, padx=4)
+        tk.Label(dr_frame, text="heartbeat (s):").pack(side=tk.LEFT)
+        self.entry_dr_staleness = tk.Entry(dr_frame, width=6)
+        self.entry_dr_staleness.insert(0, str(config.DR_MAX_STALENESS))
+        self.entry_dr_staleness.pack(side=tk.LEFT, padx=4)
+        aimd_frame = tk.Frame(ep_frame)
+        aimd_frame.grid(row=4, column=0, columnspan=2, sticky=tk.W)
+        self.var_adaptive = tk.BooleanVar(value=config.SEND_ADAPTIVE)
+        tk.Checkbutton(aimd_frame, text="Adaptive send rate (AIMD), target latency (ms):", variable=self.var_adaptive).pack(side=tk.LEFT)
+        self.entry_aimd_latency = tk.Entry(aimd_frame, width=6)
+        self.entry_aimd_latency.insert(0, str(int(config.AIMD_TARGET_LATENCY * 1000)))
+        self.entry_aimd_latency.pack(side=tk.LEFT, padx=4)
 
         # main panels
         main = tk.Frame(root)
@@ -68,9 +128,12 @@ class TargetGeneratorUI:
         left = tk.Frame(main)
         left.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 8))
         tk.Label(left, text="Active Targets:").pack(anchor=tk.W)
-        self.lst_targets = tk.Listbox(left, height=30, width=28)
+        # only the visible rows are materialized; updated from swarm add/remove events
+        self.lst_targets = VirtualTargetList(left, height=30, width=28, on_select=lambda tid: self.on_select_target(None))
         self.lst_targets.pack(fill=tk.Y, expand=False)
-        self.lst_targets.bind("<<ListboxSelect>>", self.on_select_target)
+        self.list_changes = None
+        self.list_cursor = None
+        self.ui_lock = LockTimer(config.targets_lock)
 
         # Right-top: progress/details + JSON preview
         right = tk.Frame(main)
@@ -90,12 +153,9 @@ class TargetGeneratorUI:
         # reduce canvas height to give more room to JSON preview below
         self.canvas = tk.Canvas(right, height=180, bg="#f8f8f8", bd=1, relief=tk.SUNKEN, highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=False, pady=(4, 6))
-        # mapping objects
-        self.canvas_items = {}
-        # per-target recent position history for trails (screen coords)
-        self.target_trails = {}
-        self.trail_max = 30
-        self.canvas_padding = 20
+        # retained-mode renderer: keyed items, trail ring buffers, LOD above the threshold
+        self.map_renderer = map_renderer.MapRenderer(self.canvas, padding=20, trail_max=30,
+                                                     lod_threshold=config.MAP_LOD_THRESHOLD)
         # schedule canvas updates
         self._schedule_canvas_draw()
 
@@ -109,12 +169,21 @@ class TargetGeneratorUI:
         btn_frame.pack(fill=tk.X, pady=(4, 0))
         self.lbl_json_status = tk.Label(btn_frame, text="")
         self.lbl_json_status.pack(side=tk.LEFT, padx=8)
+        # shared-memory snapshot reader (attached lazily) and preview size cap
+        self.shm_reader = None
+        self.shm_last_seq = None
+        self.preview_limit = 200
 
         # status/footer
         self.label_status = tk.Label(root, text="Active: 0", fg="blue")
         self.label_status.pack(side=tk.BOTTOM, pady=6)
+        self.label_sinks = tk.Label(root, text="", fg="gray25")
+        self.label_sinks.pack(side=tk.BOTTOM)
 
-        # Start logger thread
+        # Start the swarm engine (one thread advances every target) and the logger thread
+        target.use_sharded_swarm()
+        self.engine_thread = threading.Thread(target=target.swarm_thread_task, daemon=False)
+        self.engine_thread.start()
         self.logger_thread = threading.Thread(target=logger.json_logger_task, daemon=False)
         self.logger_thread.start()
 
@@ -127,18 +196,57 @@ class TargetGeneratorUI:
         self._schedule_json_preview()
 
     def add_target_thread(self):
-        self.target_counter += 1
-        new_target = target.Target(target_id=f"T-{self.target_counter}")
-
-        with config.targets_lock:
-            config.active_targets.append(new_target)
-
-        t = threading.Thread(target=target.target_thread_task, args=(new_target,), daemon=False)
-        t.start()
-        config.target_threads.append(t)
+        try:
+            count = max(1, int(self.entry_spawn_count.get()))
+        except ValueError:
+            count = 1
+        first = self.target_counter + 1
+        self.target_counter += count
+        ids = [f"T-{i}" for i in range(first, self.target_counter + 1)]
+        new_targets = target.spawn_targets(ids)
 
         self.update_status_label()
-        print(f"-> Spawned Target {new_target.target_id} (vn={new_target.vn}, ve={new_target.ve}, vd={new_target.vd})")
+        if count == 1:
+            t = new_targets[0]
+            print(f"-> Spawned Target {t.target_id} (vn={t.vn}, ve={t.ve}, vd={t.vd})")
+        else:
+            print(f"-> Spawned {count} targets ({ids[0]} .. {ids[-1]})")
+
+    def load_scenario(self):
+        path = filedialog.askopenfilename(
+            title="Load Scenario",
+            initialdir=os.path.join(os.path.dirname(__file__), "scenarios"),
+            filetypes=[("Scenario files", "*.json *.yaml *.yml"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            sc = scenario.Scenario.load(path)
+        except Exception as e:
+            print(f"Failed to load scenario: {e}")
+            return
+        self.scenario_runs += 1
+        self.scenario_runner = scenario.ScenarioRunner(
+            sc, config.swarm, lock=self.ui_lock, id_prefix=f"S{self.scenario_runs}:")
+        print(f"Scenario '{sc.name}' loaded: {len(sc.schedule)} wave(s), seed={sc.seed}")
+        if self._scenario_after is not None:
+            self.root.after_cancel(self._scenario_after)
+        self._poll_scenario()
+
+    def _poll_scenario(self):
+        self._scenario_after = None
+        runner = self.scenario_runner
+        if runner is None:
+            return
+        start = time.perf_counter()
+        spawned = runner.poll()
+        if spawned:
+            print(f"-> Scenario spawned {spawned} targets in {1000 * (time.perf_counter() - start):.1f} ms")
+        if runner.done:
+            print(f"Scenario '{runner.scenario.name}' finished ({runner.spawned} targets).")
+            self.scenario_runner = None
+            return
+        self._scenario_after = self.root.after(50, self._poll_scenario)
 
     def apply_json_rate(self):
         try:
@@ -154,36 +262,83 @@ class TargetGeneratorUI:
         config.ENDPOINT_URL = self.entry_endpoint.get().strip()
         config.ENDPOINT_API_KEY = self.entry_api_key.get().strip()
         config.SEND_TO_ENDPOINT = bool(self.var_send_enabled.get())
-        print(f"Endpoint set to: {config.ENDPOINT_URL} (send_enabled={config.SEND_TO_ENDPOINT})")
+        config.PUBLISH_MODE = "dead_reckoning" if self.var_dead_reckoning.get() else "all"
+        try:
+            config.DR_THRESHOLD = max(0.0, float(self.entry_dr_threshold.get()))
+            config.DR_MAX_STALENESS = max(0.0, float(self.entry_dr_staleness.get()))
+        except ValueError as e:
+            print(f"Invalid dead-reckoning settings: {e}")
+        config.SEND_ADAPTIVE = bool(self.var_adaptive.get())
+        try:
+            config.AIMD_TARGET_LATENCY = max(0.001, float(self.entry_aimd_latency.get()) / 1000.0)
+        except ValueError as e:
+            print(f"Invalid AIMD target latency: {e}")
+        # a new receiver has no extrapolation state: resend everything
+        logger.dr_filter.reset()
+        print(f"Endpoint set to: {config.ENDPOINT_URL} (send_enabled={config.SEND_TO_ENDPOINT}, publish={config.PUBLISH_MODE})")
 
     def update_status_label(self):
-        with config.targets_lock:
-            ids = [t.target_id for t in config.active_targets]
-        # refresh listbox
-        self.lst_targets.delete(0, tk.END)
-        for tid in ids:
-            self.lst_targets.insert(tk.END, tid)
-        self.label_status.config(text=f"Active: {len(ids)}")
+        # take only the add/remove events since the last refresh (full ids on resync)
+        with self.ui_lock:
+            changes = config.swarm.changes
+            cursor = self.list_cursor if changes is self.list_changes else None
+            cursor, events = changes.since(cursor)
+            ids = config.swarm.id_list() if events is None else None
+            count = len(config.swarm)
+        self.list_changes, self.list_cursor = changes, cursor
+        if events is None:
+            self.lst_targets.set_ids(ids)
+        else:
+            self.lst_targets.apply(events)
+        self.lst_targets.refresh()
+        status = f"Active: {count}"
+        lock_ms = self.ui_lock.summary()
+        if lock_ms is not None:
+            status += f"  |  UI lock hold p50/max: {lock_ms[0]:.2f}/{lock_ms[1]:.2f} ms  wait max: {lock_ms[2]:.2f} ms"
+        if config.PUBLISH_MODE == "dead_reckoning":
+            st = logger.dr_filter.stats()
+            status += f"  |  DR sent: {st['sent']}  suppressed: {st['suppressed']}"
+        if config.SEND_TO_ENDPOINT and logger.sender is not None:
+            st = logger.sender.stats()
+            p50 = "-" if st["latency_p50_ms"] is None else f"{st['latency_p50_ms']:.1f}"
+            p99 = "-" if st["latency_p99_ms"] is None else f"{st['latency_p99_ms']:.1f}"
+            status += f"  |  POST ok: {st['sent']}  failed: {st['failed']}  dropped: {st['dropped']}  p50/p99: {p50}/{p99} ms"
+            if config.SEND_ADAPTIVE:
+                rc = logger.rate_controller.stats()
+                status += f"  |  rate: {rc['rate']:.1f}/s" + (f" (backoff: {rc['backoff_reason']})" if rc["backoff_reason"] else "")
+        self.label_status.config(text=status)
+        if logger.pipeline is not None:
+            parts = []
+            for st in logger.pipeline.stats():
+                if not st["enabled"] and not st["written"]:
+                    continue
+                lag = "-" if st["lag_ms"] is None else f"{st['lag_ms']:.0f}"
+                part = f"{st['name']}: {st['writes_per_s']:.1f}/s lag {lag} ms"
+                if st["dropped"] or st["failed"]:
+                    part += f" (dropped {st['dropped']}, failed {st['failed']})"
+                parts.append(part)
+            self.label_sinks.config(text="  |  ".join(parts))
 
     def on_select_target(self, event):
-        sel = self.lst_targets.curselection()
-        if not sel:
+        tid = self.lst_targets.selected
+        if tid is None:
             self.lbl_progress.config(text="No selection")
             self.progress['value'] = 0
             self.lbl_details.config(text="Details: -")
             return
-        idx = sel[0]
-        tid = self.lst_targets.get(idx)
-        # find target object
-        with config.targets_lock:
-            found = next((t for t in config.active_targets if t.target_id == tid), None)
+        # look up the swarm row through the id index and copy it out as a plain dict
+        with self.ui_lock:
+            view = target.Target(tid)
+            found = view.to_dict() if view.alive else None
+            created = view.creation_time if found else 0.0
         if found:
-            age = time.time() - found.creation_time
+            age = time.time() - created
             remaining = max(0.0, config.TARGET_LIFETIME - age)
             self.progress['maximum'] = config.TARGET_LIFETIME
             self.progress['value'] = min(config.TARGET_LIFETIME, age)
-            self.lbl_progress.config(text=f"ID {found.target_id} — age {age:.1f}s / {config.TARGET_LIFETIME}s (remaining {remaining:.1f}s)")
-            details = f"N={found.north}, E={found.east}, D={found.down}  |  vn={found.vn}, ve={found.ve}, vd={found.vd}"
+            self.lbl_progress.config(text=f"ID {tid} — age {age:.1f}s / {config.TARGET_LIFETIME}s (remaining {remaining:.1f}s)")
+            p, v = found["position"], found["velocity"]
+            details = f"N={p['north']}, E={p['east']}, D={p['down']}  |  vn={v['vn']}, ve={v['ve']}, vd={v['vd']}"
             self.lbl_details.config(text=f"Details: {details}")
         else:
             self.lbl_progress.config(text="Selected target not found")
@@ -205,182 +360,49 @@ class TargetGeneratorUI:
         self.root.after(50, self._schedule_canvas_draw)
 
     def _draw_canvas(self):
-        # simple mapping: find bounds from active targets
-        with config.targets_lock:
-            items = list(config.active_targets)
-
-        w = max(200, self.canvas.winfo_width() or 200)
-        h = max(200, self.canvas.winfo_height() or 200)
-        pad = self.canvas_padding
-
-        # clear canvas each time (easier grid/axes management)
-        self.canvas.delete("all")
-
-        # compute bounds
-        if items:
-            norths = [t.north for t in items]
-            easts = [t.east for t in items]
-            min_n, max_n = min(norths), max(norths)
-            min_e, max_e = min(easts), max(easts)
-            # add small margin and ensure non-zero ranges
-            rng_n = max(1.0, (max_n - min_n) or 1.0)
-            rng_e = max(1.0, (max_e - min_e) or 1.0)
-            # if single or near-single, expand view to show motion
-            if rng_n < 50.0:
-                min_n -= 25.0
-                max_n += 25.0
-                rng_n = max_n - min_n
-            if rng_e < 50.0:
-                min_e -= 25.0
-                max_e += 25.0
-                rng_e = max_e - min_e
-        else:
-            # default bounds
-            min_n, max_n = -500.0, 500.0
-            min_e, max_e = -500.0, 500.0
-            rng_n = max_n - min_n
-            rng_e = max_e - min_e
-
-        # draw background grid and axes
-        # outer border
-        self.canvas.create_rectangle(pad, pad, w - pad, h - pad, outline="#cccccc", width=1)
-        
-        # grid lines (light gray dashed)
-        grid_step = max(50.0, rng_e / 5.0)  # aim for ~5 divisions
-        e = min_e
-        while e <= max_e:
-            x = pad + ((e - min_e) / rng_e) * (w - 2 * pad)
-            self.canvas.create_line(x, pad, x, h - pad, fill="#e0e0e0", dash=(2, 2))
-            e += grid_step
-        
-        grid_step = max(50.0, rng_n / 5.0)
-        n = min_n
-        while n <= max_n:
-            y = pad + ((max_n - n) / rng_n) * (h - 2 * pad)
-            self.canvas.create_line(pad, y, w - pad, y, fill="#e0e0e0", dash=(2, 2))
-            n += grid_step
-        
-        # axis labels (cardinal directions)
-        self.canvas.create_text(w - pad - 5, h - pad - 2, text="E", anchor=tk.SE, font=("Arial", 7, "bold"), fill="#333333")
-        self.canvas.create_text(pad + 5, pad + 3, text="N", anchor=tk.NW, font=("Arial", 7, "bold"), fill="#333333")
-        
-        # center reference cross (if origin is visible)
-        if rng_n > 100 and rng_e > 100:
-            cx = pad + ((0.0 - min_e) / rng_e) * (w - 2 * pad) if min_e <= 0 <= max_e else None
-            cy = pad + ((max_n - 0.0) / rng_n) * (h - 2 * pad) if min_n <= 0 <= max_n else None
-            if cx is not None and pad <= cx <= w - pad:
-                self.canvas.create_line(cx, pad, cx, h - pad, fill="#ffcccc", width=1, dash=(1, 2))
-            if cy is not None and pad <= cy <= h - pad:
-                self.canvas.create_line(pad, cy, w - pad, cy, fill="#ffcccc", width=1, dash=(1, 2))
-
-        # clear target item id mappings (canvas was cleared, items will be recreated)
-        self.canvas_items.clear()
-        self.target_trails.clear()
-
-        # clear and reuse items
-        existing = set(self.canvas_items.keys())
-        now_ids = set(t.target_id for t in items)
-
-        # remove old canvas items (but since canvas.delete("all") was called, just clear the mapping)
-        # items will be recreated below
-
-        # draw each target
-        for t in items:
-            # map east->x, north->y (north up)
-            x = pad + ((t.east - min_e) / rng_e) * (w - 2 * pad)
-            y = pad + ((max_n - t.north) / rng_n) * (h - 2 * pad)
-            # visualize down (z): map down -> circle radius and color
-            # compute down bounds for visual scaling
-            # (we compute per-loop to keep code simple; small cost)
-            downs = [it.down for it in items] if items else [0.0]
-            min_d, max_d = min(downs), max(downs)
-            rng_d = max(1.0, (max_d - min_d) or 1.0)
-
-            # normalized depth 0..1 (shallower -> 0, deeper -> 1)
-            norm_d = max(0.0, min(1.0, (t.down - min_d) / rng_d))
-            # radius between 4..14 px
-            r = 4 + int(norm_d * 10)
-
-            # color transition from blue (shallow) to red (deep)
-            r_col = int(50 + norm_d * 200)
-            g_col = int(80 - norm_d * 60)
-            b_col = int(200 - norm_d * 200)
-            color = f"#{r_col:02x}{g_col:02x}{b_col:02x}"
-
-            # horizontal velocity line scaling
-            scale_h = 60.0
-            x2 = x + (t.ve / (rng_e or 1.0)) * scale_h
-            y2 = y - (t.vn / (rng_n or 1.0)) * scale_h
-
-            # vertical velocity indicator (small vertical line above/below circle)
-            vscale = 6.0
-            v_len = t.vd * vscale
-            # clamp length to reasonable pixels
-            v_len = max(-20.0, min(20.0, v_len))
-            vx1, vy1 = x, y - r - 4
-            vx2, vy2 = x, (y - r - 4) + v_len
-
-            # record screen position into a short trail buffer
-            tr = self.target_trails.get(t.target_id)
-            if tr is None:
-                tr = []
-                self.target_trails[t.target_id] = tr
-            tr.append((x, y))
-            if len(tr) > self.trail_max:
-                tr.pop(0)
-
-            # draw or update circle + hv line + vv line + text + trail
-            if t.target_id in self.canvas_items:
-                existing = self.canvas_items[t.target_id]
-                # handle older tuple shapes gracefully
-                if len(existing) == 3:
-                    o_circ, o_hline, o_text = existing
-                    o_vline = self.canvas.create_line(vx1, vy1, vx2, vy2, fill="#000000")
-                    o_trail = self.canvas.create_line(*sum(tr, ()), fill=color, width=2)
-                    self.canvas_items[t.target_id] = (o_circ, o_hline, o_vline, o_text, o_trail)
-                elif len(existing) == 4:
-                    o_circ, o_hline, o_vline, o_text = existing
-                    o_trail = self.canvas.create_line(*sum(tr, ()), fill=color, width=2)
-                    self.canvas_items[t.target_id] = (o_circ, o_hline, o_vline, o_text, o_trail)
-                else:
-                    o_circ, o_hline, o_vline, o_text, o_trail = existing
-
-                # update coords and style
-                self.canvas.coords(o_circ, x - r, y - r, x + r, y + r)
-                self.canvas.itemconfigure(o_circ, fill=color)
-                self.canvas.coords(o_hline, x, y, x2, y2)
-                self.canvas.coords(o_vline, vx1, vy1, vx2, vy2)
-                # update trail polyline
-                try:
-                    pts = sum(tr, ())
-                    if len(pts) >= 4:
-                        self.canvas.coords(o_trail, *pts)
-                        self.canvas.itemconfigure(o_trail, fill=color)
-                except Exception:
-                    pass
-                # show id, speed and altitude
-                speed = math.sqrt(t.vn * t.vn + t.ve * t.ve + t.vd * t.vd)
-                self.canvas.coords(o_text, x + r + 2, y - r - 2)
-                self.canvas.itemconfigure(o_text, text=f"{t.target_id} {speed:.1f}m/s D={t.down:.1f}m")
-            else:
-                circ = self.canvas.create_oval(x - r, y - r, x + r, y + r, fill=color, outline="#1a1a1a", width=1)
-                hline = self.canvas.create_line(x, y, x2, y2, fill="#666666", width=1)
-                vline = self.canvas.create_line(vx1, vy1, vx2, vy2, fill="#000000", width=1)
-                text = self.canvas.create_text(x + r + 2, y - r - 2, text=t.target_id, anchor=tk.NW, font=("Arial", 8, "bold"), fill="#000000")
-                # create trail polyline (flatten coords)
-                pts = sum(tr, ())
-                trail = None
-                if len(pts) >= 4:
-                    trail = self.canvas.create_line(*pts, fill=color, width=1)
-                self.canvas_items[t.target_id] = (circ, hline, vline, text, trail)
+        # copy the swarm under the lock; the renderer only moves existing items
+        with self.ui_lock:
+            snap = config.swarm.snapshot()
+        self.map_renderer.render(snap)
 
     def _schedule_json_preview(self):
         # update JSON preview every 1 second
         self.load_json_preview()
         self.root.after(1000, self._schedule_json_preview)
 
+    def _read_shm_preview(self):
+        """Return (records, status) from the shared-memory snapshot, or None if
+        it is unavailable. records is None when nothing changed since last read."""
+        if not config.SHM_ENABLED:
+            return None
+        try:
+            if self.shm_reader is None:
+                self.shm_reader = shm_snapshot.SnapshotReader(config.SHM_NAME)
+            seq, t, total, rec = self.shm_reader.read()
+        except Exception:
+            # not published yet (or publisher restarted): retry on next refresh
+            if self.shm_reader is not None:
+                self.shm_reader.close()
+            self.shm_reader = None
+            return None
+        if seq == self.shm_last_seq:
+            return None, None
+        self.shm_last_seq = seq
+        records = shm_snapshot.records_to_dicts(t, rec[: self.preview_limit])
+        status = f"Live (shm) {time.strftime('%H:%M:%S', time.localtime(t))}"
+        if total > len(records):
+            status += f" — showing {len(records)} of {total}"
+        return records, status
+
     def load_json_preview(self):
-        """Read the latest JSON file and display it in the preview box."""
+        """Show the latest snapshot, from shared memory when available, else the JSON file."""
+        shm = self._read_shm_preview()
+        if shm is not None:
+            records, status = shm
+            if records is not None:
+                self._set_json_text(json.dumps(records, indent=2, ensure_ascii=False))
+                self.lbl_json_status.config(text=status)
+            return
         try:
             path = config.JSON_FILENAME
             if not path or not os.path.exists(path):
@@ -416,14 +438,14 @@ class TargetGeneratorUI:
         config.stop_threads_event.set()
 
         # first, stop all targets
-        with config.targets_lock:
-            config.active_targets.clear()
+        target.kill_all_targets()
 
-        for t in list(config.target_threads):
-            t.join(timeout=1.0)
+        if hasattr(self, "engine_thread"):
+            self.engine_thread.join(timeout=1.0)
 
         if hasattr(self, "logger_thread"):
             self.logger_thread.join(timeout=2.0)
+        target.shutdown_swarm()
 
         # stop server if started
         with self.server_lock:
@@ -435,16 +457,17 @@ class TargetGeneratorUI:
                     pass
                 self.server_proc = None
 
+        if self.shm_reader is not None:
+            self.shm_reader.close()
+
         time.sleep(0.05)
         self.root.destroy()
 
     # ---------- New actions ----------
     def kill_all_targets(self):
+        self.scenario_runner = None
         removed = target.kill_all_targets()
         print(f"Killed {removed} targets.")
-        # also join threads
-        for t in list(config.target_threads):
-            t.join(timeout=0.2)
         self.update_status_label()
 
     def toggle_server(self):